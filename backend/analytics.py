@@ -0,0 +1,208 @@
+"""
+Portfolio analytics over stored evaluations, computed with MongoDB aggregation
+
+Results are kept as mergeable partial sums (counts, sums) so a refresh only
+aggregates evaluations not counted yet: those the API reported inserting
+(mark_stale) and any created in the overlap window before the previous
+refresh, minus the ids already counted there. The window catches
+evaluations committed late or by other API processes. A full rebuild runs
+periodically to pick up edits or deletions made outside the API.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from database import mongo_span
+
+# Serve cached analytics for up to this many seconds before checking for new evaluations
+ANALYTICS_MAX_AGE = float(os.getenv("ANALYTICS_MAX_AGE", "60"))
+# Recompute everything from scratch at this interval
+ANALYTICS_FULL_REFRESH = float(os.getenv("ANALYTICS_FULL_REFRESH", "3600"))
+# Re-check evaluations created this many seconds before the previous refresh;
+# longer than any insert takes to commit
+ANALYTICS_OVERLAP = float(os.getenv("ANALYTICS_OVERLAP", "300"))
+
+# Overall scores are weighted section scores on a 0-10 scale
+SCORE_MAX = 10
+SCORE_BINS = 10
+
+
+def _uncounted(since, counted, pending) -> dict:
+    """Match evaluations created at or after `since` that are not in `counted`, plus `pending` ids"""
+    if since is None:
+        return {}
+    return {"$or": [
+        {"created_at": {"$gte": since}, "_id": {"$nin": list(counted)}},
+        {"_id": {"$in": list(pending - counted)}}
+    ]}
+
+
+def _partials_pipeline(match: dict, window_start: datetime) -> list:
+    """One round trip: every partial aggregate as a $facet branch"""
+    bin_width = SCORE_MAX / SCORE_BINS
+    return [
+        {"$match": match},
+        {"$facet": {
+            "scores": [
+                {"$match": {"overall_score": {"$type": "number"}}},
+                {"$group": {
+                    "_id": {"$min": [
+                        SCORE_BINS - 1,
+                        {"$max": [0, {"$floor": {"$divide": ["$overall_score", bin_width]}}]}
+                    ]},
+                    "count": {"$sum": 1},
+                    "sum": {"$sum": "$overall_score"}
+                }}
+            ],
+            "decisions": [
+                {"$group": {"_id": {"$ifNull": ["$decision", "Unknown"]}, "count": {"$sum": 1}}}
+            ],
+            "sections": [
+                {"$unwind": "$section_scores"},
+                {"$group": {
+                    "_id": {
+                        "domain": {"$ifNull": ["$domain", "Unknown"]},
+                        "section": "$section_scores.section"
+                    },
+                    "sum": {"$sum": "$section_scores.score"},
+                    "count": {"$sum": 1}
+                }}
+            ],
+            "budgets": [
+                {"$match": {"budget_analysis.totalBudget": {"$type": "number"}}},
+                {"$group": {
+                    "_id": {"$ifNull": ["$decision", "Unknown"]},
+                    "total": {"$sum": "$budget_analysis.totalBudget"},
+                    "count": {"$sum": 1},
+                    "max": {"$max": "$budget_analysis.totalBudget"}
+                }}
+            ],
+            "latest": [
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": 1},
+                {"$project": {"created_at": 1}}
+            ],
+            # Counted now; the next refresh looks back this far and must skip them
+            "window": [
+                {"$match": {"created_at": {"$gte": window_start}}},
+                {"$project": {"created_at": 1}}
+            ]
+        }}
+    ]
+
+
+class PortfolioAnalytics:
+    """Cached, incrementally refreshed aggregates over the evaluations collection"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.evaluations = 0
+        self.score_bins = [0] * SCORE_BINS
+        self.score_sum = 0.0
+        self.decisions = {}
+        self.sections = {}  # (domain, section) -> [sum, count]
+        self.budgets = {}   # decision -> [total, count, max]
+        self.latest = None       # created_at of the newest counted evaluation
+        self.window_start = None  # the next refresh re-checks evaluations created since
+        self.window_ids = {}     # _id -> created_at of counted evaluations created since window_start
+        self._pending = set()    # inserted by the API since the last refresh
+        self.refreshed_at = None
+        self.rebuilt_at = None
+        self._stale = True
+
+    def mark_stale(self, evaluation_id=None):
+        """Called after inserting an evaluation so the next read picks it up"""
+        if evaluation_id is not None:
+            self._pending.add(evaluation_id)
+        self._stale = True
+
+    def _merge(self, partials: dict):
+        for row in partials["scores"]:
+            self.score_bins[int(row["_id"])] += row["count"]
+            self.score_sum += row["sum"]
+        for row in partials["decisions"]:
+            self.decisions[row["_id"]] = self.decisions.get(row["_id"], 0) + row["count"]
+            self.evaluations += row["count"]
+        for row in partials["sections"]:
+            key = (row["_id"]["domain"], row["_id"]["section"])
+            acc = self.sections.setdefault(key, [0.0, 0])
+            acc[0] += row["sum"]
+            acc[1] += row["count"]
+        for row in partials["budgets"]:
+            acc = self.budgets.setdefault(row["_id"], [0.0, 0, None])
+            acc[0] += row["total"]
+            acc[1] += row["count"]
+            acc[2] = row["max"] if acc[2] is None else max(acc[2], row["max"])
+        if partials["latest"]:
+            created_at = partials["latest"][0]["created_at"]
+            self.latest = created_at if self.latest is None else max(self.latest, created_at)
+
+    async def refresh(self, collection, full: bool = False):
+        """Aggregate evaluations not counted yet (or all of them) into the totals"""
+        async with self._lock:
+            now = time.monotonic()
+            full = full or self.rebuilt_at is None or now - self.rebuilt_at > ANALYTICS_FULL_REFRESH
+            pending, self._pending = self._pending, set()
+            if full:
+                self._reset()
+                pending = set()
+            self._stale = False
+            window_start = datetime.utcnow() - timedelta(seconds=ANALYTICS_OVERLAP)
+            match = _uncounted(self.window_start, set(self.window_ids), pending)
+            with mongo_span("aggregate"):
+                cursor = collection.aggregate(_partials_pipeline(match, window_start), allowDiskUse=True)
+                partials = (await cursor.to_list(length=1))[0]
+            self._merge(partials)
+            # Counted evaluations the next refresh's window still covers
+            window = {oid: created_at for oid, created_at in self.window_ids.items() if created_at >= window_start}
+            window.update((row["_id"], row["created_at"]) for row in partials["window"])
+            self.window_ids = window
+            self.window_start = window_start
+            self.refreshed_at = now
+            if full:
+                self.rebuilt_at = now
+
+    async def get(self, collection) -> dict:
+        """Cached analytics, refreshed first if new evaluations may exist"""
+        if self._stale or self.refreshed_at is None or time.monotonic() - self.refreshed_at > ANALYTICS_MAX_AGE:
+            await self.refresh(collection)
+        return self.snapshot()
+
+    def snapshot(self) -> dict:
+        bin_width = SCORE_MAX / SCORE_BINS
+        scored = sum(self.score_bins)
+        domains = {}
+        for (domain, section), (total, count) in sorted(self.sections.items()):
+            domains.setdefault(domain, {})[section] = round(total / count, 2) if count else None
+        budget_total = sum(b[0] for b in self.budgets.values())
+        budget_count = sum(b[1] for b in self.budgets.values())
+        return {
+            "evaluations": self.evaluations,
+            "score_histogram": [
+                {"min": round(i * bin_width, 2), "max": round((i + 1) * bin_width, 2), "count": count}
+                for i, count in enumerate(self.score_bins)
+            ],
+            "average_score": round(self.score_sum / scored, 2) if scored else None,
+            "decisions": dict(sorted(self.decisions.items())),
+            "section_averages_by_domain": domains,
+            "budget": {
+                "total_requested": round(budget_total, 2),
+                "evaluations": budget_count,
+                "average_requested": round(budget_total / budget_count, 2) if budget_count else None,
+                "by_decision": {
+                    decision: {"total": round(total, 2), "count": count, "max": maximum}
+                    for decision, (total, count, maximum) in sorted(self.budgets.items())
+                },
+            },
+            "last_evaluation_at": self.latest.isoformat() if self.latest else None,
+            "generated_at": datetime.utcnow().isoformat(),
+        }
+
+
+# Process-wide analytics cache used by the API
+portfolio_analytics = PortfolioAnalytics()
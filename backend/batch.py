@@ -0,0 +1,274 @@
+"""
+Batch evaluation of a whole funding round from the command line
+
+    python -m backend.batch proposals/ --concurrency 4
+    python -m backend.batch round1.zip late/ --output results/round1.jsonl --results-dir results/json
+
+Every PDF/DOCX under the given directories (and inside given ZIP archives)
+is evaluated with run_full_evaluation on a bounded worker pool. Each result
+is appended to a JSONL ledger as soon as it finishes; re-running with the
+same ledger skips files whose content hash was already evaluated under the
+same settings and pipeline version, so an interrupted run resumes where it
+stopped. A failing file is recorded and does not stop the batch. A CSV with
+one row per file (decision, score, timing) is written at the end.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+# Allow `evaluation_pipeline` / `src...` imports when run as `python -m backend.batch`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from evaluation_pipeline import run_full_evaluation, PIPELINE_VERSION
+from worker_pool import EvaluationWorkerPool, EXECUTOR_KIND, MAX_WORKERS
+from src.tracing import setup_tracing, shutdown_tracing, span
+
+BATCH_EXTENSIONS = ('.pdf', '.docx')
+# Most files accepted from one batch upload or archive
+BATCH_MAX_FILES = int(os.getenv("EVAL_BATCH_MAX_FILES", "500"))
+HASH_CHUNK_BYTES = 1024 * 1024
+
+CSV_FIELDS = [
+    "file", "status", "decision", "overall_score", "seconds",
+    "content_hash", "duplicate_of", "error", "finished_at",
+]
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_batch_member(name: str) -> bool:
+    """Evaluable archive/directory entry (skips macOS metadata and hidden files)"""
+    base = os.path.basename(name)
+    return (
+        not name.startswith("__MACOSX/")
+        and not base.startswith(".")
+        and os.path.splitext(base)[1].lower() in BATCH_EXTENSIONS
+    )
+
+
+def extract_archive(zip_path: str, dest_dir: str, max_files: int | None = BATCH_MAX_FILES) -> list[tuple[str, str]]:
+    """
+    Copy evaluable members of a ZIP archive into dest_dir.
+    Returns [(member name, extracted path)]; members are streamed, never
+    read into memory whole, and written under generated names.
+    `max_files=None` accepts archives of any size.
+    """
+    extracted = []
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [m for m in archive.infolist() if not m.is_dir() and is_batch_member(m.filename)]
+        if max_files is not None and len(members) > max_files:
+            raise ValueError(f"Archive holds {len(members)} proposals; at most {max_files} per batch")
+        for i, member in enumerate(members):
+            ext = os.path.splitext(member.filename)[1].lower()
+            path = os.path.join(dest_dir, f"{i:05d}{ext}")
+            with archive.open(member) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_BYTES)
+            extracted.append((member.filename, path))
+    return extracted
+
+
+def collect_files(inputs: list[str], scratch_dir: str) -> list[tuple[str, str]]:
+    """[(display name, path on disk)] for every proposal under the given paths, in sorted order"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, names in os.walk(item):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    rel = os.path.relpath(path, item)
+                    if is_batch_member(rel):
+                        files.append((os.path.join(os.path.basename(os.path.normpath(item)), rel), path))
+        elif item.lower().endswith(".zip"):
+            dest = tempfile.mkdtemp(dir=scratch_dir)
+            # The upload limit does not apply on the command line: the runner
+            # submits at most the pool's capacity at a time
+            members = extract_archive(item, dest, max_files=None)
+            files.extend((f"{os.path.basename(item)}:{name}", path) for name, path in members)
+        elif is_batch_member(item):
+            files.append((item, item))
+        else:
+            print(f"[WARNING] Skipping {item}: not a directory, ZIP archive, PDF or DOCX")
+    return files
+
+
+def load_ledger(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    rows = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+    return rows
+
+
+def settings_key(max_budget: float, chunk_size: int | None) -> dict:
+    return {"max_budget": max_budget, "chunk_size": chunk_size, "pipeline_version": PIPELINE_VERSION}
+
+
+class BatchRunner:
+    """Evaluate files on a worker pool, appending one ledger row per file"""
+
+    def __init__(self, ledger_path: str, max_budget: float, chunk_size: int | None,
+                 concurrency: int, executor: str, results_dir: str | None = None):
+        self.ledger_path = ledger_path
+        self.max_budget = max_budget
+        self.chunk_size = chunk_size
+        self.results_dir = results_dir
+        self.pool = EvaluationWorkerPool(kind=executor, max_workers=concurrency, max_queue=concurrency)
+        self.key = settings_key(max_budget, chunk_size)
+
+        # Hashes evaluated successfully under the same settings -> their ledger row
+        self.done = {}
+        for row in load_ledger(ledger_path):
+            if row.get("status") == "ok" and all(row.get(k) == v for k, v in self.key.items()):
+                self.done[row["content_hash"]] = row
+
+    def _append(self, row: dict):
+        row.update(self.key, finished_at=datetime.utcnow().isoformat())
+        with open(self.ledger_path, "a") as f:
+            f.write(json.dumps(row) + "\n")
+
+    async def _evaluate(self, slots: asyncio.Semaphore, name: str, path: str, content_hash: str,
+                        copies: list[str]) -> list[dict]:
+        """Evaluate one file, then record its identical `copies` with the outcome"""
+        async with slots:
+            row = await self._evaluate_one(name, path, content_hash)
+        return [row] + [self._record_copy(copy, row) for copy in copies]
+
+    def _record_copy(self, name: str, original: dict) -> dict:
+        # A copy is a "duplicate" only of a success; otherwise it failed too and is retried next run
+        if original["status"] == "ok":
+            row = {"file": name, "content_hash": original["content_hash"], "status": "duplicate",
+                   "duplicate_of": original["file"], "decision": original.get("decision"),
+                   "overall_score": original.get("overall_score")}
+        else:
+            row = {"file": name, "content_hash": original["content_hash"], "status": "failed",
+                   "duplicate_of": original["file"],
+                   "error": f"Identical to {original['file']}, which failed: {original.get('error')}"}
+        self._append(row)
+        print(f"[INFO] {row['status']:>6} {name} (same file as {original['file']})")
+        return row
+
+    async def _evaluate_one(self, name: str, path: str, content_hash: str) -> dict:
+        started = time.perf_counter()
+        try:
+            with span("batch_file", {"batch.file": name, "evaluation.content_hash": content_hash}):
+                result = await self.pool.submit(
+                    run_full_evaluation,
+                    file_path=path,
+                    max_budget=self.max_budget,
+                    chunk_size=self.chunk_size
+                )
+            if self.results_dir:
+                with open(os.path.join(self.results_dir, f"{content_hash}.json"), "w") as f:
+                    json.dump({"file": name, **result}, f, indent=2, default=str)
+            row = {
+                "file": name,
+                "content_hash": content_hash,
+                "status": "ok",
+                "decision": result.get("decision"),
+                "overall_score": result.get("overall_score"),
+            }
+        except Exception as e:
+            # One bad proposal must not stop the round
+            row = {"file": name, "content_hash": content_hash, "status": "failed", "error": str(e)}
+        row["seconds"] = round(time.perf_counter() - started, 2)
+        self._append(row)
+        print(f"[INFO] {row['status']:>6} {name} ({row['seconds']}s) {row.get('decision') or row.get('error', '')}")
+        return row
+
+    async def run(self, files: list[tuple[str, str]]) -> dict:
+        counts = {"ok": 0, "failed": 0, "skipped": 0, "duplicate": 0}
+        copies = {}  # hash -> names of later files with the same bytes
+        # Never submit more than the pool admits, or the overflow is rejected
+        slots = asyncio.Semaphore(self.pool.capacity)
+        tasks = []
+        for name, path in files:
+            content_hash = hash_file(path)
+            if content_hash in self.done:
+                counts["skipped"] += 1
+                print(f"[INFO] skip   {name} (already evaluated as {self.done[content_hash]['file']})")
+            elif content_hash in copies:
+                # Same bytes twice in this batch: evaluate once, record both
+                copies[content_hash].append(name)
+            else:
+                copies[content_hash] = []
+                tasks.append(self._evaluate(slots, name, path, content_hash, copies[content_hash]))
+
+        await asyncio.to_thread(self.pool.start)
+        try:
+            for rows in await asyncio.gather(*tasks):
+                for row in rows:
+                    counts[row["status"]] += 1
+        finally:
+            self.pool.shutdown()
+        return counts
+
+
+def write_csv(ledger_path: str, csv_path: str):
+    """One row per file, keeping the latest ledger entry for each file"""
+    latest = {}
+    for row in load_ledger(ledger_path):
+        latest[row["file"]] = row
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for name in sorted(latest):
+            writer.writerow(latest[name])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Directories, ZIP archives or individual PDF/DOCX files")
+    parser.add_argument("--concurrency", type=int, default=MAX_WORKERS, help="Evaluations running at once")
+    parser.add_argument("--executor", choices=["thread", "process"], default=EXECUTOR_KIND)
+    parser.add_argument("--max-budget", type=float, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=None, help="Defaults to retrieval.chunk_size in config.yaml")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL ledger (appended, used to resume)")
+    parser.add_argument("--csv", default=None, help="Summary CSV (default: ledger path with .csv)")
+    parser.add_argument("--results-dir", default=None, help="Also write each full result as <content_hash>.json")
+    args = parser.parse_args()
+
+    for path in (os.path.dirname(os.path.abspath(args.output)), args.results_dir):
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    setup_tracing()
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        files = collect_files(args.inputs, scratch_dir)
+        print(f"[INFO] {len(files)} proposals found, concurrency {args.concurrency} ({args.executor})")
+        runner = BatchRunner(args.output, args.max_budget, args.chunk_size,
+                             args.concurrency, args.executor, args.results_dir)
+        started = time.perf_counter()
+        counts = asyncio.run(runner.run(files))
+
+    shutdown_tracing()
+    csv_path = args.csv or os.path.splitext(args.output)[0] + ".csv"
+    write_csv(args.output, csv_path)
+    elapsed = time.perf_counter() - started
+    print(f"[INFO] Done in {elapsed:.1f}s: " + ", ".join(f"{v} {k}" for k, v in counts.items()))
+    print(f"[INFO] Ledger: {args.output}  Summary: {csv_path}")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
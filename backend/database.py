@@ -3,10 +3,16 @@ MongoDB Atlas database connection and collections
 """
 
 import os
+import sys
 from pathlib import Path
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
+# Allow `src/...` imports when run from the backend directory (e.g. test_db.py)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tracing import span
+
 # Load .env from the backend directory
 backend_dir = Path(__file__).parent
 env_path = backend_dir / '.env'
@@ -26,6 +32,16 @@ evaluations_collection = None
 settings_collection = None
 
 
+def mongo_span(operation: str, collection: str = "evaluations"):
+    """Trace span around one MongoDB operation"""
+    return span(f"mongo.{operation}", {
+        "db.system": "mongodb",
+        "db.namespace": DATABASE_NAME,
+        "db.collection.name": collection,
+        "db.operation.name": operation,
+    })
+
+
 async def connect_to_mongo():
     """Initialize MongoDB connection"""
     global client, database, evaluations_collection, settings_collection
@@ -54,6 +70,15 @@ async def connect_to_mongo():
     try:
         await evaluations_collection.create_index("created_at")
         await evaluations_collection.create_index("file_name")
+        # Duplicate-upload lookup: same bytes, settings and pipeline version, newest first
+        await evaluations_collection.create_index(
+            [("content_hash", 1), ("max_budget", 1), ("chunk_size", 1), ("pipeline_version", 1), ("created_at", -1)]
+        )
+        # List endpoint: keyset pagination newest first, optionally filtered by decision or domain
+        await evaluations_collection.create_index([("created_at", -1), ("_id", -1)])
+        await evaluations_collection.create_index([("decision", 1), ("created_at", -1), ("_id", -1)])
+        await evaluations_collection.create_index([("domain", 1), ("created_at", -1), ("_id", -1)])
+        await evaluations_collection.create_index([("overall_score", 1), ("created_at", -1)])
         print("Database indexes created")
     except Exception as e:
         print(f"Warning: Could not create indexes: {e}")
@@ -3,112 +3,257 @@ Grant Evaluation Pipeline
 Orchestrates the full evaluation process from document loading to final decision.
 """
 
+import functools
 import sys
 import os
 
 # Allow `src/...` imports when executed as script
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.agents.input_agent import input_agent
-from src.agents.vectorstore_agent import vectorstore_agent
+from src.agents.input_agent import iter_input_pages
+from src.agents.vectorstore_agent import StreamingVectorstoreBuilder
 from src.agents.summarizer import run_summarizer_extended
 from src.agents.domain_selection import classify_domain
 from src.agents.scoring import run_grant_scoring
-from src.config.domain_weights import compute_weighted_score
+from src.agents.scoring import compute_weighted_score
 from src.agents.critique import run_grant_critique
 from src.agents.budget_agent import run_budget_agent
 from src.agents.decision import run_final_decision_agent
 from src.llm_wrapper import set_deterministic_mode
+from src.metrics import collect_timings, track_stage
+from src.tracing import span, set_span_attributes
+from src.pipeline import Stage, run_stage_graph
 
 
-def run_full_evaluation(file_path: str, max_budget: float = 50000):
+# Bump whenever prompts, agents or scoring change so stored results of
+# identical uploads are no longer reused
+PIPELINE_VERSION = "8"
+
+# Stage names reported to progress callbacks. Independent stages run
+# concurrently, so completion order may differ from this listing.
+PIPELINE_STAGES = [
+    "load",
+    "vectorstore",
+    "summary",
+    "domain",
+    "scoring",
+    "critique",
+    "budget",
+    "decision",
+]
+
+
+def _report(progress_callback, stage: str, payload: dict | None = None):
+    """Notify the caller that a stage finished; never let reporting break the pipeline."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(stage, payload or {})
+    except Exception as e:
+        print(f"[WARNING] Progress callback failed for stage '{stage}': {e}")
+
+
+def _timed(stage: str, fn):
+    """Wrap a stage function so its wall time and LLM usage are recorded under `stage`"""
+    @functools.wraps(fn)
+    def run(**deps):
+        with track_stage(stage):
+            return fn(**deps)
+    return run
+
+
+def run_full_evaluation(file_path: str, max_budget: float = 50000, progress_callback=None,
+                        chunk_size: int | None = None):
     """
     Run complete adaptive grant evaluation pipeline.
 
     Args:
         file_path: Path to the grant proposal file (PDF/DOCX)
         max_budget: Maximum allowed requested budget
+        progress_callback: Optional callable(stage, payload) invoked as each
+            stage in PIPELINE_STAGES completes. Payloads are small, JSON-safe dicts.
+        chunk_size: Retrieval chunk size (the `chunk_size` setting); None uses config.yaml
+
+    Stages run as a dependency graph: domain classification overlaps with
+    vectorstore building and summarization, and critique overlaps with
+    budget analysis. Pages are embedded in batches while later pages are
+    still being extracted. Each agent receives exactly the inputs it did when the
+    stages ran sequentially, so results are unchanged.
 
     Returns:
-        dict: structured evaluation result for frontend
+        dict: structured evaluation result for frontend, with a `timings`
+        block (stage seconds, LLM tokens and estimated cost per agent)
     """
+    # Every stage, embedding batch and LLM call of this run records into `timings`
+    attributes = {
+        "evaluation.file": os.path.basename(file_path),
+        "evaluation.max_budget": max_budget,
+        "evaluation.chunk_size": chunk_size,
+        "evaluation.pipeline_version": PIPELINE_VERSION,
+    }
+    with span("run_full_evaluation", attributes), collect_timings() as timings:
+        try:
+            response = _run_evaluation(file_path, max_budget, progress_callback, chunk_size)
+        except Exception as e:
+            # Travels with the exception out of worker processes (see worker_pool)
+            e.timings = timings.to_dict()
+            raise
+        set_span_attributes({"evaluation.decision": response["decision"]})
+    response["timings"] = timings.to_dict()
+    return response
+
 
+def _run_evaluation(file_path: str, max_budget: float, progress_callback, chunk_size: int | None):
     # Make evaluation deterministic to remove LLM randomness
     try:
         set_deterministic_mode(True)
     except:
         pass
 
+    # Step 2 — Build vectorstore fresh each run (avoid cross-proposal contamination),
+    # fed page by page from step 1
+    builder = StreamingVectorstoreBuilder(chunk_size=chunk_size)
+
     # Step 1 — Extract text pages
-    print(f"[INFO] Loading document: {file_path}")
-    pages = input_agent(file_path)
-    if not pages:
-        raise ValueError("Document extraction failed.")
-    print(f"[INFO] Loaded {len(pages)} pages")
-
-    # Step 2 — Build vectorstore fresh each run (avoid cross-proposal contamination)
-    print("[INFO] Creating in-memory vectorstore...")
-    vs = vectorstore_agent(pages, persist_dir=None)
-
-    # Step 3 — Structured summarization (section-wise)
-    print("[INFO] Generating structured summary...")
-    summary = run_summarizer_extended(vs["ask"])
-
-    # Step 4 — Domain classification
-    print("[INFO] Detecting academic / research domain...")
-    domain = classify_domain(" ".join([p.page_content for p in pages]))
-    print(f"[INFO] Domain Detected → {domain}")
-
-    # Step 5 — Scoring (raw, before weighting)
-    print("[INFO] Running scoring agent...")
-    scores = run_grant_scoring(summary, domain)
-
-    # Step 6 — Apply adaptive weighting model
-    print("[INFO] Computing weighted score...")
-    final_weighted_score = compute_weighted_score(scores["scores"], domain)
-    print(f"[INFO] Weighted Score = {final_weighted_score}")
+    def load():
+        print(f"[INFO] Loading document: {file_path}")
+        pages = []
+        try:
+            for page in iter_input_pages(file_path):
+                pages.append(page)
+                builder.add_page(page)
+        except Exception:
+            builder.abort()
+            raise
+        if not pages:
+            builder.abort()
+            raise ValueError("Document extraction failed.")
+        builder.close()
+        print(f"[INFO] Loaded {len(pages)} pages")
+        return pages
+
+    def vectorstore(load):
+        print("[INFO] Finishing in-memory vectorstore...")
+        return builder.finish()
+
+    # Step 3 — Structured summarization (section-wise, overlapping chunks merged)
+    context_stats = {}
+
+    def summarize(vectorstore):
+        print("[INFO] Generating structured summary...")
+        return run_summarizer_extended(
+            vectorstore["ask"],
+            batch_retriever_fn=vectorstore["ask_many"],
+            context_stats=context_stats
+        )
+
+    # Step 4 — Domain classification (needs only the raw text, runs alongside steps 2-3)
+    def detect_domain(load):
+        print("[INFO] Detecting academic / research domain...")
+        domain = classify_domain(" ".join([p.page_content for p in load]))
+        print(f"[INFO] Domain Detected → {domain}")
+        return domain
+
+    # Step 5 — Scoring (raw, before weighting), then Step 6 — adaptive weighting model
+    def score(summary, domain):
+        print("[INFO] Running scoring agent...")
+        scores = run_grant_scoring(summary, domain)
+
+        print("[INFO] Computing weighted score...")
+        final_weighted_score = compute_weighted_score(scores["scores"], domain)
+        print(f"[INFO] Weighted Score = {final_weighted_score}")
+        return scores, final_weighted_score
 
     # Step 7 — Critique (uses scoring, does NOT modify score)
-    print("[INFO] Generating critique...")
-    critique = run_grant_critique(
-        scorer_json=scores,
-        summaries_json=summary,
-        domain=domain
-    )
+    def critique(summary, scoring, domain):
+        print("[INFO] Generating critique...")
+        scores, _ = scoring
+        return run_grant_critique(
+            scorer_json=scores,
+            summaries_json=summary,
+            domain=domain
+        )
 
-    # Step 8 — Budget analysis
-    print("[INFO] Evaluating budget...")
-    budget_input = {
-        "text": summary.get("Budget", {}).get("text", ""),
-        "notes": summary.get("Budget", {}).get("notes", ""),
-        "references": summary.get("Budget", {}).get("references", []),
-        "score": scores.get("scores", {}).get("Budget", {}).get("score", 0),
-        "summary": scores.get("scores", {}).get("Budget", {}).get("summary", ""),
-        "strengths": scores.get("scores", {}).get("Budget", {}).get("strengths", []),
-        "weaknesses": scores.get("scores", {}).get("Budget", {}).get("weaknesses", [])
-    }
+    # Step 8 — Budget analysis (independent of the critique, runs alongside step 7)
+    def budget(summary, scoring, domain):
+        print("[INFO] Evaluating budget...")
+        scores, _ = scoring
+        budget_input = {
+            "text": summary.get("Budget", {}).get("text", ""),
+            "notes": summary.get("Budget", {}).get("notes", ""),
+            "references": summary.get("Budget", {}).get("references", []),
+            "score": scores.get("scores", {}).get("Budget", {}).get("score", 0),
+            "summary": scores.get("scores", {}).get("Budget", {}).get("summary", ""),
+            "strengths": scores.get("scores", {}).get("Budget", {}).get("strengths", []),
+            "weaknesses": scores.get("scores", {}).get("Budget", {}).get("weaknesses", [])
+        }
 
-    budget_evaluation = run_budget_agent(
-        budget_input,
-        max_budget=max_budget,
-        domain=domain
-    )
+        return run_budget_agent(
+            budget_input,
+            max_budget=max_budget,
+            domain=domain
+        )
 
     # Step 9 — Final decision (uses weighted score, does NOT recalc score)
-    print("[INFO] Finalizing decision...")
-    final_decision = run_final_decision_agent(
-        summary_json=summary,
-        scores_json=scores,
-        critique_json=critique,
-        budget_json=budget_evaluation,
-        final_weighted_score=final_weighted_score,
-        domain=domain
-    )
+    def decide(summary, scoring, critique, budget, domain):
+        print("[INFO] Finalizing decision...")
+        scores, final_weighted_score = scoring
+        return run_final_decision_agent(
+            summary_json=summary,
+            scores_json=scores,
+            critique_json=critique,
+            budget_json=budget,
+            final_weighted_score=final_weighted_score,
+            domain=domain
+        )
+
+    stages = [
+        Stage("load", _timed("load", load)),
+        Stage("vectorstore", _timed("vectorstore", vectorstore), deps=["load"]),
+        Stage("summary", _timed("summary", summarize), deps=["vectorstore"]),
+        Stage("domain", _timed("domain", detect_domain), deps=["load"]),
+        Stage("scoring", _timed("scoring", score), deps=["summary", "domain"]),
+        Stage("critique", _timed("critique", critique), deps=["summary", "scoring", "domain"]),
+        Stage("budget", _timed("budget", budget), deps=["summary", "scoring", "domain"]),
+        Stage("decision", _timed("decision", decide), deps=["summary", "scoring", "critique", "budget", "domain"]),
+    ]
+
+    try:
+        results = run_stage_graph(
+            stages,
+            on_complete=lambda stage, result: _report(
+                progress_callback, stage,
+                _stage_payload(stage, (result, context_stats) if stage == "summary" else result)
+            )
+        )
+    finally:
+        builder.release()
+
+    scores, final_weighted_score = results["scoring"]
 
     # Done — format into frontend-ready shape
-    return format_evaluation_response(
-        summary, scores, critique, budget_evaluation, final_decision, final_weighted_score
+    response = format_evaluation_response(
+        results["summary"], scores, results["critique"], results["budget"],
+        results["decision"], final_weighted_score
     )
+    response["domain"] = results["domain"]
+    response["context_stats"] = context_stats
+    return response
+
+
+def _stage_payload(stage: str, result) -> dict:
+    """Small JSON-safe progress payload for a finished stage"""
+    if stage == "load":
+        return {"pages": len(result)}
+    if stage == "summary":
+        return {"sections": len(result[0]), **result[1]}
+    if stage == "domain":
+        return {"domain": result}
+    if stage == "scoring":
+        return {"overall_score": result[1]}
+    if stage == "decision":
+        return {"decision": result.get("decision")}
+    return {}
 
 
 def format_evaluation_response(summary, scores, critique, budget_eval, decision, final_weighted_score):
@@ -0,0 +1,184 @@
+"""
+In-memory registry of asynchronous evaluation jobs and their progress events
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+# Finished jobs kept for status polling before the oldest are dropped
+MAX_FINISHED_JOBS = int(os.getenv("EVAL_MAX_FINISHED_JOBS", "500"))
+# Seconds a finished batch keeps its jobs from being pruned
+BATCH_RETENTION_SECONDS = int(os.getenv("EVAL_BATCH_RETENTION_SECONDS", "3600"))
+# Seconds between SSE keep-alive comments while a job is idle
+SSE_KEEPALIVE_SECONDS = 15
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class EvaluationJob:
+    """State of a single evaluation job plus its ordered event log"""
+
+    def __init__(self, file_name: str, file_size: int):
+        self.id = uuid.uuid4().hex
+        self.file_name = file_name
+        self.file_size = file_size
+        self.status = JOB_QUEUED
+        self.stages = []
+        self.evaluation_id = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+        self.events = []
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def publish(self, event: str, data: dict | None = None):
+        """Append an event and wake every stream waiting on this job"""
+        self.updated_at = datetime.utcnow()
+        self.events.append({"event": event, "data": data or {}})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def on_stage(self, stage: str, payload: dict):
+        """Progress callback target for the pipeline (runs on the event loop)"""
+        if self.status == JOB_QUEUED:
+            self.status = JOB_RUNNING
+        self.stages.append(stage)
+        self.publish("stage", {"stage": stage, **payload})
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "file_name": self.file_name,
+            "file_size": self.file_size,
+            "stages": list(self.stages),
+            "evaluation_id": self.evaluation_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    async def stream(self, last_event_id: int = -1):
+        """
+        Yield Server-Sent Events for this job, starting after `last_event_id`,
+        until the job finishes. Sends keep-alive comments while idle.
+        """
+        index = last_event_id + 1
+        while True:
+            while index < len(self.events):
+                event = self.events[index]
+                yield f"id: {index}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                index += 1
+            if self.finished:
+                return
+            waiter = self._changed
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+
+class JobManager:
+    """Creates jobs, runs them in the background and keeps them for polling"""
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._batches = OrderedDict()
+        self._tasks = set()
+
+    def create(self, file_name: str, file_size: int) -> EvaluationJob:
+        job = EvaluationJob(file_name, file_size)
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def start(self, job: EvaluationJob, runner):
+        """
+        Schedule `runner(job)` as a background task. The runner returns the
+        stored evaluation id; exceptions mark the job failed.
+        """
+        task = asyncio.create_task(self._run(job, runner))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, job: EvaluationJob, runner):
+        try:
+            job.evaluation_id = await runner(job)
+            job.status = JOB_COMPLETED
+            job.publish("completed", {"evaluation_id": job.evaluation_id})
+        except Exception as e:
+            print(f"[ERROR] Evaluation job {job.id} failed: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+            job.publish("failed", {"error": job.error})
+
+    def create_batch(self, job_ids: list[str], rejected: list[dict] | None = None) -> str:
+        """Group jobs under one batch id for aggregate polling"""
+        batch_id = uuid.uuid4().hex
+        self._batches[batch_id] = {
+            "job_ids": list(job_ids),
+            "rejected": list(rejected or []),
+            "created_at": datetime.utcnow(),
+        }
+        while len(self._batches) > self.max_finished:
+            self._batches.popitem(last=False)
+        return batch_id
+
+    def batch_status(self, batch_id: str):
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+        jobs = [job for job in map(self._jobs.get, batch["job_ids"]) if job is not None]
+        counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED)}
+        for job in jobs:
+            counts[job.status] += 1
+        return {
+            "id": batch_id,
+            "total": len(batch["job_ids"]),
+            "counts": counts,
+            "jobs": [job.to_dict() for job in jobs],
+            "rejected": batch["rejected"],
+            "created_at": batch["created_at"].isoformat(),
+        }
+
+    def _batch_job_ids(self) -> set:
+        """Jobs owned by a batch that is still running or finished recently"""
+        now = datetime.utcnow()
+        owned = set()
+        for batch in self._batches.values():
+            jobs = [job for job in map(self._jobs.get, batch["job_ids"]) if job is not None]
+            last_update = max((job.updated_at for job in jobs), default=batch["created_at"])
+            if (any(not job.finished for job in jobs)
+                    or (now - last_update).total_seconds() < BATCH_RETENTION_SECONDS):
+                owned.update(batch["job_ids"])
+        return owned
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        excess = len(finished) - self.max_finished
+        if excess <= 0:
+            return
+        # Batch polling reads its jobs from here, so keep those of live batches
+        owned = self._batch_job_ids()
+        for job_id in [job_id for job_id in finished if job_id not in owned][:excess]:
+            del self._jobs[job_id]
+
+
+# Process-wide job registry used by the API
+job_manager = JobManager()
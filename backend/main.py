@@ -3,23 +3,45 @@ FastAPI Backend for Grant Evaluator
 Supports file upload, grant evaluation pipeline, and MongoDB Atlas storage
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, Response, PlainTextResponse
 from typing import List, Optional
 import os
 import sys
+import asyncio
+import base64
+import math
 import tempfile
+import hashlib
+import shutil
 from datetime import datetime
 from bson import ObjectId
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import EvaluationResponse, SettingsModel, EvaluationCreate
-from database import get_database
+from models import (
+    EvaluationResponse, SettingsModel, EvaluationCreate, EvaluationJobResponse, BatchEvaluationResponse,
+    EvaluationListResponse, EvaluationCountResponse, AnalyticsResponse
+)
+from database import get_database, mongo_span
 import database
-from evaluation_pipeline import run_full_evaluation
-from src.agents.pdf_generator import generate_evaluation_report_pdf
+from evaluation_pipeline import run_full_evaluation, PIPELINE_VERSION
+from worker_pool import worker_pool, PoolSaturatedError
+from jobs import job_manager
+from batch import BATCH_MAX_FILES, extract_archive, hash_file
+from analytics import portfolio_analytics
+from report_cache import report_cache, report_etag
+from src.llm_cache import cache_stats
+from src.llm_log import llm_call_log
+from src.llm_providers import LLM_PROVIDER
+from src.llm_resilience import CircuitOpenError, llm_caller
+from src.embeddings import get_embedding_service, embedding_metrics
+from src.embedding_cache import embedding_cache_stats
+from src.query_embeddings import get_query_embedding_store
+from src.metrics import track_stage, observe_timings, observe_pool, render_metrics
+from src.tracing import setup_tracing, shutdown_tracing, span, set_span_attributes
+from src.agents.summarizer import SECTION_QUERIES
 
 app = FastAPI(
     title="Grant Evaluator API",
@@ -43,10 +65,43 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def trace_requests(request, call_next):
+    """One server span per request, continuing a caller's `traceparent` if sent"""
+    with span(f"{request.method} {request.url.path}", {
+        "http.request.method": request.method,
+        "url.path": request.url.path,
+    }, server=True, carrier=dict(request.headers)) as current:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if current is not None and route is not None:
+            # Name by route template so traces group across ids
+            current.update_name(f"{request.method} {route.path}")
+        set_span_attributes({
+            "http.route": getattr(route, "path", None),
+            "http.response.status_code": response.status_code,
+        })
+        return response
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connection on startup"""
+    """Start workers, warm up the embedding model and connect to MongoDB"""
     from database import connect_to_mongo
+    setup_tracing()
+    worker_pool.start()
+    
+    # Load the embedding model and the section query embeddings once,
+    # off the event loop, before taking traffic
+    def warm_up_embeddings():
+        get_embedding_service().warm_up()
+        get_query_embedding_store().register(SECTION_QUERIES)
+    
+    try:
+        await asyncio.to_thread(warm_up_embeddings)
+    except Exception as e:
+        print(f"[WARNING] Embedding model warm-up failed: {e}")
+    
     try:
         await connect_to_mongo()
     except Exception as e:
@@ -62,7 +117,10 @@ async def startup_event():
 async def shutdown_event():
     """Close database connection on shutdown"""
     from database import close_mongo_connection
+    worker_pool.shutdown()
+    report_cache.shutdown()
     await close_mongo_connection()
+    shutdown_tracing()
 
 
 @app.get("/")
@@ -83,72 +141,228 @@ async def root():
         "service": "Grant Evaluator API",
         "version": "1.0.0",
         "mongodb": mongo_status,
-        "database": database.name if database is not None else None
+        "database": database.name if database is not None else None,
+        "workers": worker_pool.stats(),
+        "reports": report_cache.stats(),
+        "llm_provider": LLM_PROVIDER,
+        "llm_cache": cache_stats(),
+        "llm_log": llm_call_log.stats(),
+        "llm_calls": llm_caller.stats(),
+        "embeddings": embedding_metrics(),
+        "embedding_cache": embedding_cache_stats()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage latencies, LLM calls/tokens/cost, worker pool queue"""
+    observe_pool(worker_pool.stats())
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+ALLOWED_EXTENSIONS = ['.pdf', '.docx']
+# Jobs of one batch holding workers at once (the rest wait their turn)
+BATCH_CONCURRENCY = int(os.getenv("EVAL_BATCH_CONCURRENCY", str(worker_pool.max_workers)))
+
+
+def validate_upload(file: UploadFile) -> str:
+    """Check the upload's extension and return it"""
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    return file_ext
+
+
+def ensure_worker_capacity():
+    """Reject early when the worker pool is saturated (429) or the LLM circuit is open (503)"""
+    try:
+        worker_pool.check_capacity()
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    open_for = llm_caller.breaker.open_for()
+    if open_for > 0:
+        e = CircuitOpenError(open_for)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(open_for))})
+
+
+# Uploads are copied to disk in pieces of this size, hashed on the way
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+async def save_upload(file: UploadFile, suffix: str) -> tuple[str, int, str]:
+    """Stream an upload to a temp file; returns (path, size in bytes, sha256 hex)"""
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                digest.update(chunk)
+                tmp_file.write(chunk)
+                size += len(chunk)
+        except Exception:
+            tmp_file.close()
+            os.unlink(tmp_file.name)
+            raise
+    return tmp_file.name, size, digest.hexdigest()
+
+
+async def get_evaluation_settings() -> tuple[float, int | None]:
+    """(max_budget, chunk_size) from saved settings; chunk_size None falls back to config.yaml"""
+    settings = await database.settings_collection.find_one()
+    if not settings:
+        return 50000, None
+    return settings.get('max_budget', 50000), settings.get('chunk_size')
+
+
+# Result fields copied when a byte-identical upload reuses a prior evaluation
+RESULT_FIELDS = [
+    "decision",
+    "domain",
+    "overall_score",
+    "scores",
+    "critique_domains",
+    "section_scores",
+    "full_critique",
+    "budget_analysis",
+]
+
+
+def serialize_evaluation(doc: dict) -> dict:
+    """Make a stored evaluation JSON-ready (string ids, ISO dates)"""
+    doc["id"] = str(doc["_id"])
+    doc["_id"] = str(doc["_id"])
+    doc["created_at"] = doc["created_at"].isoformat()
+    doc["updated_at"] = doc["updated_at"].isoformat()
+    return doc
+
+
+async def find_cached_evaluation(content_hash: str, max_budget: float, chunk_size: int | None):
+    """Latest evaluation of the same file bytes under the same settings and pipeline version"""
+    with mongo_span("find_one"):
+        return await database.evaluations_collection.find_one(
+            {
+                "content_hash": content_hash,
+                "max_budget": max_budget,
+                "chunk_size": chunk_size,
+                "pipeline_version": PIPELINE_VERSION
+            },
+            sort=[("created_at", -1)]
+        )
+
+
+async def clone_evaluation(original: dict, file_name: str, file_size: int) -> dict:
+    """Store a copy of a prior evaluation under the new upload's name"""
+    evaluation_doc = {field: original.get(field) for field in RESULT_FIELDS}
+    evaluation_doc.update({
+        "file_name": file_name,
+        "file_size": file_size,
+        "content_hash": original["content_hash"],
+        "max_budget": original["max_budget"],
+        "chunk_size": original.get("chunk_size"),
+        "pipeline_version": original["pipeline_version"],
+        "duplicate_of": str(original["_id"]),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    })
+    
+    with track_stage("mongo_write"), mongo_span("insert_one"):
+        result = await database.evaluations_collection.insert_one(evaluation_doc)
+    evaluation_doc["_id"] = result.inserted_id
+    portfolio_analytics.mark_stale(result.inserted_id)
+    print(f"[INFO] Reused evaluation {original['_id']} for identical upload '{file_name}'")
+    evaluation_doc = serialize_evaluation(evaluation_doc)
+    report_cache.prerender(evaluation_doc)
+    return evaluation_doc
+
+
+async def save_evaluation(file_name: str, file_size: int, evaluation_result: dict,
+                          content_hash: str, max_budget: float, chunk_size: int | None) -> dict:
+    """Insert a pipeline result into MongoDB and return the JSON-ready document"""
+    evaluation_doc = {
+        "file_name": file_name,
+        "file_size": file_size,
+        "content_hash": content_hash,
+        "max_budget": max_budget,
+        "chunk_size": chunk_size,
+        "pipeline_version": PIPELINE_VERSION,
+        "decision": evaluation_result["decision"],
+        "overall_score": evaluation_result["overall_score"],
+        "domain": evaluation_result.get("domain"),
+        "scores": evaluation_result["scores"],
+        "critique_domains": evaluation_result.get("critique_domains", []),
+        "section_scores": evaluation_result["section_scores"],
+        "full_critique": evaluation_result["full_critique"],
+        "budget_analysis": evaluation_result["budget_analysis"],
+        "context_stats": evaluation_result.get("context_stats", {}),
+        "timings": evaluation_result.get("timings"),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     }
+    # Worker processes keep their own metrics; fold this run into the API's
+    if worker_pool.kind == "process" and evaluation_result.get("timings"):
+        observe_timings(evaluation_result["timings"])
+    
+    # Insert into MongoDB
+    with track_stage("mongo_write"), mongo_span("insert_one"):
+        result = await database.evaluations_collection.insert_one(evaluation_doc)
+    evaluation_doc["_id"] = result.inserted_id
+    portfolio_analytics.mark_stale(result.inserted_id)
+    
+    evaluation_doc = serialize_evaluation(evaluation_doc)
+    report_cache.prerender(evaluation_doc)
+    return evaluation_doc
 
 
 @app.post("/api/evaluations", response_model=EvaluationResponse)
 async def create_evaluation(
     file: UploadFile = File(...),
+    force: bool = False,
     db=Depends(get_database)
 ):
     """
     Upload and evaluate a grant proposal (PDF or DOCX)
-    Returns comprehensive evaluation with scores, critique, and budget analysis
+    Returns comprehensive evaluation with scores, critique, and budget analysis.
+    A byte-identical file already evaluated with the same settings and
+    pipeline version is answered from the stored result unless force=true.
     """
     
-    # Validate file type
-    allowed_extensions = ['.pdf', '.docx']
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-        )
+    file_ext = validate_upload(file)
     
-    # Get settings for max_budget
-    settings = await database.settings_collection.find_one()
-    max_budget = settings.get('max_budget', 50000) if settings else 50000
+    # Get settings for max_budget and chunk_size
+    max_budget, chunk_size = await get_evaluation_settings()
     
     # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-        content = await file.read()
-        tmp_file.write(content)
-        tmp_file_path = tmp_file.name
+    tmp_file_path, file_size, content_hash = await save_upload(file, file_ext)
     
     try:
-        # Run evaluation pipeline
-        evaluation_result = run_full_evaluation(
-            file_path=tmp_file_path,
-            max_budget=max_budget
-        )
+        if not force:
+            cached = await find_cached_evaluation(content_hash, max_budget, chunk_size)
+            if cached is not None:
+                return await clone_evaluation(cached, file.filename, file_size)
         
-        # Prepare document for MongoDB
-        evaluation_doc = {
-            "file_name": file.filename,
-            "file_size": len(content),
-            "decision": evaluation_result["decision"],
-            "overall_score": evaluation_result["overall_score"],
-            "scores": evaluation_result["scores"],
-            "critique_domains": evaluation_result["critique_domains"],
-            "section_scores": evaluation_result["section_scores"],
-            "full_critique": evaluation_result["full_critique"],
-            "budget_analysis": evaluation_result["budget_analysis"],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        # Insert into MongoDB
-        result = await database.evaluations_collection.insert_one(evaluation_doc)
-        evaluation_doc["id"] = str(result.inserted_id)
-        evaluation_doc["_id"] = str(result.inserted_id)
+        ensure_worker_capacity()
         
-        # Convert datetime to ISO string for JSON response
-        evaluation_doc["created_at"] = evaluation_doc["created_at"].isoformat()
-        evaluation_doc["updated_at"] = evaluation_doc["updated_at"].isoformat()
+        # Run evaluation pipeline on the worker pool so the event loop stays free
+        evaluation_result = await worker_pool.submit(
+            run_full_evaluation,
+            file_path=tmp_file_path,
+            max_budget=max_budget,
+            chunk_size=chunk_size
+        )
         
-        return evaluation_doc
+        return await save_evaluation(
+            file.filename, file_size, evaluation_result, content_hash, max_budget, chunk_size
+        )
         
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         import traceback
         print("[ERROR] Exception in /api/evaluations:", str(e))
@@ -160,20 +374,341 @@ async def create_evaluation(
             os.unlink(tmp_file_path)
 
 
-@app.get("/api/evaluations", response_model=List[EvaluationResponse])
-async def get_evaluations(db=Depends(get_database)):
-    """Get all evaluations, sorted by creation date (newest first)"""
+@app.post("/api/evaluations/jobs", response_model=EvaluationJobResponse, status_code=202)
+async def create_evaluation_job(
+    file: UploadFile = File(...),
+    force: bool = False,
+    db=Depends(get_database)
+):
+    """
+    Upload a grant proposal and evaluate it in the background.
+    Returns a job id immediately; poll /api/evaluations/jobs/{id} or stream
+    /api/evaluations/jobs/{id}/events for per-stage progress.
+    Identical uploads complete immediately from the stored result unless force=true.
+    """
+    
+    file_ext = validate_upload(file)
+    max_budget, chunk_size = await get_evaluation_settings()
+    
+    tmp_file_path, file_size, content_hash = await save_upload(file, file_ext)
+    file_name = file.filename
+    
+    try:
+        cached = None if force else await find_cached_evaluation(content_hash, max_budget, chunk_size)
+        if cached is None:
+            ensure_worker_capacity()
+    except Exception:
+        os.unlink(tmp_file_path)
+        raise
+    
+    job, task = start_evaluation_job(
+        file_name, tmp_file_path, file_size, content_hash, max_budget, chunk_size, cached
+    )
+    if cached is not None:
+        # Cloning is a single insert, so finish before answering
+        await task
+    return job.to_dict()
+
+
+def start_evaluation_job(file_name: str, tmp_file_path: str, file_size: int, content_hash: str,
+                         max_budget: float, chunk_size: int | None, cached: dict | None = None,
+                         slots: asyncio.Semaphore | None = None):
+    """
+    Create a background job for a saved upload and return (job, task).
+    With `cached`, the job just clones that evaluation. With `slots`, the job
+    waits for a slot before taking a worker and, instead of failing with 429,
+    retries while the pool is saturated (used by batches).
+    """
+    job = job_manager.create(file_name, file_size)
+    
+    if cached is not None:
+        os.unlink(tmp_file_path)
+        
+        async def reuse(job):
+            evaluation_doc = await clone_evaluation(cached, file_name, job.file_size)
+            return evaluation_doc["id"]
+        
+        return job, job_manager.start(job, reuse)
     
-    cursor = database.evaluations_collection.find().sort("created_at", -1)
-    evaluations = []
+    async def evaluate(job):
+        while True:
+            try:
+                return await worker_pool.submit_with_progress(
+                    run_full_evaluation,
+                    job.on_stage,
+                    file_path=tmp_file_path,
+                    max_budget=max_budget,
+                    chunk_size=chunk_size
+                )
+            except PoolSaturatedError as e:
+                if slots is None:
+                    raise
+                await asyncio.sleep(e.retry_after)
     
-    async for doc in cursor:
-        doc["id"] = str(doc["_id"])
-        doc["created_at"] = doc["created_at"].isoformat()
-        doc["updated_at"] = doc["updated_at"].isoformat()
-        evaluations.append(doc)
+    async def runner(job):
+        try:
+            if slots is None:
+                evaluation_result = await evaluate(job)
+            else:
+                async with slots:
+                    evaluation_result = await evaluate(job)
+            evaluation_doc = await save_evaluation(
+                file_name, job.file_size, evaluation_result, content_hash, max_budget, chunk_size
+            )
+            return evaluation_doc["id"]
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.unlink(tmp_file_path)
     
-    return evaluations
+    return job, job_manager.start(job, runner)
+
+
+def start_copy_job(file_name: str, tmp_file_path: str, file_size: int, original_job, original_task: asyncio.Task):
+    """
+    Create a job for an upload with the same bytes as `original_job` in this
+    batch: it waits for that job and clones its evaluation, or fails with it.
+    """
+    os.unlink(tmp_file_path)
+    job = job_manager.create(file_name, file_size)
+    
+    async def copy(job):
+        await asyncio.shield(original_task)
+        if original_job.evaluation_id is None:
+            raise RuntimeError(f"Identical to {original_job.file_name}, which failed: {original_job.error}")
+        with mongo_span("find_one"):
+            original = await database.evaluations_collection.find_one({"_id": ObjectId(original_job.evaluation_id)})
+        evaluation_doc = await clone_evaluation(original, file_name, job.file_size)
+        return evaluation_doc["id"]
+    
+    return job, job_manager.start(job, copy)
+
+
+@app.post("/api/evaluations/batch", response_model=BatchEvaluationResponse, status_code=202)
+async def create_batch_evaluation(
+    files: List[UploadFile] = File(...),
+    force: bool = False,
+    db=Depends(get_database)
+):
+    """
+    Upload many proposals (PDF/DOCX files and/or ZIP archives of them) and
+    evaluate each as a background job. At most EVAL_BATCH_CONCURRENCY of a
+    batch's jobs hold workers at once, leaving room for interactive uploads.
+    A file that cannot be read or evaluated fails alone; unsupported files
+    are listed under `rejected`. Identical files in one batch are evaluated
+    once; the others copy that result (or fail with it). Poll
+    /api/evaluations/batch/{id} for progress.
+    """
+    
+    max_budget, chunk_size = await get_evaluation_settings()
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    jobs, rejected = [], []
+    first_jobs = {}  # content hash -> (job, task) of its first file in this batch
+    
+    async def add(file_name: str, tmp_file_path: str, file_size: int, content_hash: str):
+        if len(jobs) >= BATCH_MAX_FILES:
+            os.unlink(tmp_file_path)
+            rejected.append({"file_name": file_name, "error": f"More than {BATCH_MAX_FILES} files in one batch"})
+            return
+        if content_hash in first_jobs:
+            job, _ = start_copy_job(file_name, tmp_file_path, file_size, *first_jobs[content_hash])
+            jobs.append(job)
+            return
+        cached = None if force else await find_cached_evaluation(content_hash, max_budget, chunk_size)
+        job, task = start_evaluation_job(
+            file_name, tmp_file_path, file_size, content_hash, max_budget, chunk_size, cached, slots
+        )
+        first_jobs[content_hash] = (job, task)
+        jobs.append(job)
+    
+    for file in files:
+        file_ext = os.path.splitext(file.filename or "")[1].lower()
+        if file_ext == ".zip":
+            zip_path, _, _ = await save_upload(file, file_ext)
+            scratch_dir = tempfile.mkdtemp()
+            try:
+                members = await asyncio.to_thread(extract_archive, zip_path, scratch_dir)
+            except Exception as e:
+                rejected.append({"file_name": file.filename, "error": f"Could not read archive: {e}"})
+                members = []
+            finally:
+                os.unlink(zip_path)
+            for name, path in members:
+                # Jobs own (and delete) their files, so give each its own temp file
+                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(name)[1].lower()) as tmp_file:
+                    tmp_file_path = tmp_file.name
+                os.replace(path, tmp_file_path)
+                size = os.path.getsize(tmp_file_path)
+                await add(os.path.basename(name), tmp_file_path, size, await asyncio.to_thread(hash_file, tmp_file_path))
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        elif file_ext in ALLOWED_EXTENSIONS:
+            tmp_file_path, file_size, content_hash = await save_upload(file, file_ext)
+            await add(file.filename, tmp_file_path, file_size, content_hash)
+        else:
+            rejected.append({
+                "file_name": file.filename,
+                "error": f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS + ['.zip'])}"
+            })
+    
+    if not jobs:
+        raise HTTPException(status_code=400, detail={"message": "No evaluable files in batch", "rejected": rejected})
+    
+    batch_id = job_manager.create_batch([job.id for job in jobs], rejected)
+    return job_manager.batch_status(batch_id)
+
+
+@app.get("/api/evaluations/batch/{batch_id}", response_model=BatchEvaluationResponse)
+async def get_batch_evaluation(batch_id: str):
+    """Per-status counts and job states for a batch"""
+    
+    batch = job_manager.batch_status(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+@app.get("/api/evaluations/jobs/{job_id}", response_model=EvaluationJobResponse)
+async def get_evaluation_job(job_id: str):
+    """Get the status of a background evaluation job"""
+    
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/evaluations/jobs/{job_id}/events")
+async def stream_evaluation_job(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of a job's progress: one `stage` event per
+    pipeline stage, then a final `completed` or `failed` event.
+    """
+    
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    try:
+        resume_from = int(last_event_id) if last_event_id is not None else -1
+    except ValueError:
+        resume_from = -1
+    
+    return StreamingResponse(
+        job.stream(resume_from),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+# Fields returned by the evaluation list (the critique and budget blobs stay in MongoDB)
+LIST_PROJECTION = {"file_name": 1, "decision": 1, "overall_score": 1, "domain": 1, "created_at": 1}
+LIST_SORT = [("created_at", -1), ("_id", -1)]
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(doc: dict) -> str:
+    """Opaque keyset cursor for the position just after `doc`"""
+    raw = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        created_at, oid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_evaluation_filter(decision: Optional[List[str]], min_score: Optional[float], max_score: Optional[float],
+                            domain: Optional[str], created_after: Optional[datetime],
+                            created_before: Optional[datetime]) -> dict:
+    """MongoDB filter for the list and count endpoints"""
+    query = {}
+    if decision:
+        query["decision"] = {"$in": decision}
+    if domain:
+        query["domain"] = domain
+    if min_score is not None or max_score is not None:
+        query["overall_score"] = {}
+        if min_score is not None:
+            query["overall_score"]["$gte"] = min_score
+        if max_score is not None:
+            query["overall_score"]["$lte"] = max_score
+    if created_after is not None or created_before is not None:
+        query["created_at"] = {}
+        if created_after is not None:
+            query["created_at"]["$gte"] = created_after
+        if created_before is not None:
+            query["created_at"]["$lt"] = created_before
+    return query
+
+
+@app.get("/api/evaluations", response_model=EvaluationListResponse)
+async def get_evaluations(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    decision: Optional[List[str]] = Query(None),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    domain: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db=Depends(get_database)
+):
+    """
+    List evaluations, newest first, one page at a time.
+    Pass the returned `next_cursor` as `cursor` for the next page; it is
+    null on the last page. Items carry only summary fields; fetch
+    /api/evaluations/{id} for the full evaluation.
+    """
+    
+    query = build_evaluation_filter(decision, min_score, max_score, domain, created_after, created_before)
+    if cursor:
+        # Keyset pagination: strictly after the last (created_at, _id) seen
+        created_at, oid = decode_cursor(cursor)
+        after = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": oid}}
+        ]}
+        query = {"$and": [query, after]} if query else after
+    
+    with mongo_span("find"):
+        docs = await database.evaluations_collection.find(query, LIST_PROJECTION) \
+            .sort(LIST_SORT).limit(limit + 1).to_list(length=limit + 1)
+    
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    items = [
+        {
+            "id": str(doc["_id"]),
+            "file_name": doc["file_name"],
+            "decision": doc["decision"],
+            "overall_score": doc["overall_score"],
+            "domain": doc.get("domain"),
+            "created_at": doc["created_at"].isoformat(),
+        }
+        for doc in docs[:limit]
+    ]
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
+
+
+@app.get("/api/evaluations/count", response_model=EvaluationCountResponse)
+async def count_evaluations(
+    decision: Optional[List[str]] = Query(None),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    domain: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db=Depends(get_database)
+):
+    """Number of evaluations matching the same filters as the list endpoint"""
+    
+    query = build_evaluation_filter(decision, min_score, max_score, domain, created_after, created_before)
+    with mongo_span("count_documents"):
+        return {"total": await database.evaluations_collection.count_documents(query)}
 
 
 @app.get("/api/evaluations/{evaluation_id}", response_model=EvaluationResponse)
@@ -185,7 +720,8 @@ async def get_evaluation_by_id(evaluation_id: str, db=Depends(get_database)):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid evaluation ID format")
     
-    doc = await database.evaluations_collection.find_one({"_id": obj_id})
+    with mongo_span("find_one"):
+        doc = await database.evaluations_collection.find_one({"_id": obj_id})
     
     if not doc:
         raise HTTPException(status_code=404, detail="Evaluation not found")
@@ -197,43 +733,107 @@ async def get_evaluation_by_id(evaluation_id: str, db=Depends(get_database)):
     return doc
 
 
+def report_filename(file_name: Optional[str], evaluation_id: str) -> str:
+    base = (file_name or 'report').replace('.pdf', '').replace('.docx', '')
+    return f"grant_evaluation_{base}_{evaluation_id[:8]}.pdf"
+
+
 @app.get("/api/evaluations/{evaluation_id}/download")
-async def download_evaluation_pdf(evaluation_id: str, db=Depends(get_database)):
-    """Download evaluation as PDF report"""
+async def download_evaluation_pdf(
+    evaluation_id: str,
+    if_none_match: Optional[str] = Header(None),
+    db=Depends(get_database)
+):
+    """
+    Download evaluation as PDF report.
+    Reports are rendered once per evaluation version (off the event loop)
+    and cached on disk; the ETag lets clients revalidate with If-None-Match.
+    """
     
     try:
         obj_id = ObjectId(evaluation_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid evaluation ID format")
     
-    doc = await database.evaluations_collection.find_one({"_id": obj_id})
+    # Only the version fields first: a cached report needs nothing else
+    with mongo_span("find_one"):
+        meta = await database.evaluations_collection.find_one({"_id": obj_id}, {"file_name": 1, "updated_at": 1})
     
-    if not doc:
+    if not meta:
         raise HTTPException(status_code=404, detail="Evaluation not found")
     
-    # Prepare data for PDF generation
-    doc["id"] = str(doc["_id"])
-    doc["created_at"] = doc["created_at"].isoformat()
-    doc["updated_at"] = doc["updated_at"].isoformat()
+    etag = report_etag(evaluation_id, meta["updated_at"])
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Access-Control-Expose-Headers": "Content-Disposition, ETag"
+    }
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
     
-    try:
-        # Generate PDF
-        pdf_buffer = generate_evaluation_report_pdf(doc)
-        
-        # Create filename
-        filename = f"grant_evaluation_{doc.get('file_name', 'report').replace('.pdf', '').replace('.docx', '')}_{evaluation_id[:8]}.pdf"
-        
-        # Return PDF as streaming response
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+    path = report_cache.cached_path(evaluation_id, meta["updated_at"])
+    if path is None:
+        with mongo_span("find_one"):
+            doc = await database.evaluations_collection.find_one({"_id": obj_id})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Evaluation not found")
+        try:
+            path = await report_cache.get_or_render(serialize_evaluation(doc))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+    
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=report_filename(meta.get("file_name"), evaluation_id),
+        headers=headers
+    )
+
+
+@app.get("/api/analytics", response_model=AnalyticsResponse)
+async def get_analytics(refresh: bool = False, db=Depends(get_database)):
+    """
+    Portfolio analytics across all evaluations: overall score histogram,
+    decision counts, average section scores per domain and requested budget
+    totals. Computed in MongoDB and cached; new evaluations are folded in
+    incrementally. refresh=true recomputes everything.
+    """
+    
+    if refresh:
+        await portfolio_analytics.refresh(database.evaluations_collection, full=True)
+    return await portfolio_analytics.get(database.evaluations_collection)
+
+
+@app.get("/api/analytics/scores")
+async def get_score_analytics(db=Depends(get_database)):
+    """Overall score histogram and average"""
+    
+    analytics = await portfolio_analytics.get(database.evaluations_collection)
+    return {key: analytics[key] for key in ("evaluations", "score_histogram", "average_score")}
+
+
+@app.get("/api/analytics/decisions")
+async def get_decision_analytics(db=Depends(get_database)):
+    """Number of evaluations per decision"""
+    
+    analytics = await portfolio_analytics.get(database.evaluations_collection)
+    return {key: analytics[key] for key in ("evaluations", "decisions")}
+
+
+@app.get("/api/analytics/domains")
+async def get_domain_analytics(db=Depends(get_database)):
+    """Average score of each section, per detected domain"""
+    
+    analytics = await portfolio_analytics.get(database.evaluations_collection)
+    return analytics["section_averages_by_domain"]
+
+
+@app.get("/api/analytics/budget")
+async def get_budget_analytics(db=Depends(get_database)):
+    """Requested budget totals, overall and per decision"""
+    
+    analytics = await portfolio_analytics.get(database.evaluations_collection)
+    return analytics["budget"]
 
 
 @app.get("/api/settings", response_model=SettingsModel)
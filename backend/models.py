@@ -3,7 +3,7 @@ Pydantic models for request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 
 
@@ -74,6 +74,8 @@ class EvaluationCreate(BaseModel):
 
 class EvaluationResponse(EvaluationCreate):
     id: str
+    domain: Optional[str] = None
+    timings: Optional[Dict] = None
     created_at: str
     updated_at: str
     
@@ -81,6 +83,81 @@ class EvaluationResponse(EvaluationCreate):
         populate_by_name = True
 
 
+class EvaluationListItem(BaseModel):
+    id: str
+    file_name: str
+    decision: str
+    overall_score: float
+    domain: Optional[str] = None
+    created_at: str
+
+
+class EvaluationListResponse(BaseModel):
+    items: List[EvaluationListItem]
+    next_cursor: Optional[str] = None
+    limit: int
+
+
+class EvaluationCountResponse(BaseModel):
+    total: int
+
+
+class EvaluationJobResponse(BaseModel):
+    id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    file_name: str
+    file_size: int
+    stages: List[str]
+    evaluation_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class BatchRejectedFile(BaseModel):
+    file_name: Optional[str] = None
+    error: str
+
+
+class BatchEvaluationResponse(BaseModel):
+    id: str
+    total: int
+    counts: Dict[str, int]
+    jobs: List[EvaluationJobResponse]
+    rejected: List[BatchRejectedFile] = []
+    created_at: str
+
+
+class ScoreBin(BaseModel):
+    min: float
+    max: float
+    count: int
+
+
+class BudgetByDecision(BaseModel):
+    total: float
+    count: int
+    max: Optional[float] = None
+
+
+class BudgetTotals(BaseModel):
+    total_requested: float
+    evaluations: int
+    average_requested: Optional[float] = None
+    by_decision: Dict[str, BudgetByDecision]
+
+
+class AnalyticsResponse(BaseModel):
+    evaluations: int
+    score_histogram: List[ScoreBin]
+    average_score: Optional[float] = None
+    decisions: Dict[str, int]
+    section_averages_by_domain: Dict[str, Dict[str, Optional[float]]]
+    budget: BudgetTotals
+    last_evaluation_at: Optional[str] = None
+    generated_at: str
+
+
 class SettingsModel(BaseModel):
     id: Optional[str] = None
     max_budget: int = 50000
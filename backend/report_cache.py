@@ -0,0 +1,178 @@
+"""
+On-disk cache of rendered PDF reports
+
+A report is identified by its evaluation id and `updated_at`, so any change
+to the evaluation produces a new file and a new ETag. Rendering runs in a
+separate pool (ReportLab is pure Python and would otherwise hold the event
+loop's GIL), concurrent downloads of the same report share one render, and
+the newest REPORT_CACHE_MAX_FILES reports are kept.
+"""
+
+import asyncio
+import calendar
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Allow `src/...` imports inside spawned worker processes
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.metrics import STAGE_SECONDS
+from src.tracing import span
+
+REPORT_CACHE_DIR = Path(os.getenv("REPORT_CACHE_DIR", os.path.join("cache", "reports")))
+REPORT_CACHE_MAX_FILES = int(os.getenv("REPORT_CACHE_MAX_FILES", "1000"))
+REPORT_EXECUTOR = os.getenv("REPORT_EXECUTOR", "process").lower()
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# Render the report as soon as an evaluation is stored
+REPORT_PRERENDER = os.getenv("REPORT_PRERENDER", "1").lower() not in ("0", "false", "off")
+# Bump when the report layout changes so cached files and ETags are invalidated
+REPORT_VERSION = "1"
+
+
+def report_version(updated_at) -> int:
+    """
+    `updated_at` (UTC datetime or ISO string) as whole epoch milliseconds,
+    MongoDB's precision, so a freshly stored document and the same document
+    read back map to the same report.
+    """
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    return calendar.timegm(updated_at.utctimetuple()) * 1000 + updated_at.microsecond // 1000
+
+
+def report_etag(evaluation_id: str, updated_at) -> str:
+    return f'"{evaluation_id}-{report_version(updated_at)}-v{REPORT_VERSION}"'
+
+
+def render_report(evaluation: dict, path: str):
+    """Render one report to `path` (atomically); runs in a pool worker"""
+    from src.agents.pdf_generator import generate_evaluation_report_pdf
+
+    pdf_buffer = generate_evaluation_report_pdf(evaluation)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_buffer.getvalue())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ReportCache:
+    """Rendered reports on disk, keyed by evaluation id and updated_at"""
+
+    def __init__(self, cache_dir: Path = REPORT_CACHE_DIR, max_files: int = REPORT_CACHE_MAX_FILES,
+                 kind: str = REPORT_EXECUTOR, workers: int = REPORT_WORKERS):
+        self.cache_dir = Path(cache_dir)
+        self.max_files = max_files
+        self.kind = kind
+        self.workers = max(1, workers)
+        self._executor = None
+        self._rendering = {}
+        self._tasks = set()
+        self.hits = 0
+        self.renders = 0
+
+    def path_for(self, evaluation_id: str, updated_at) -> Path:
+        return self.cache_dir / f"{evaluation_id}_{report_version(updated_at)}_v{REPORT_VERSION}.pdf"
+
+    def cached_path(self, evaluation_id: str, updated_at):
+        path = self.path_for(evaluation_id, updated_at)
+        return path if path.exists() else None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report")
+        return self._executor
+
+    async def get_or_render(self, evaluation: dict) -> Path:
+        """
+        Path of the rendered report for a JSON-ready evaluation (string id,
+        ISO dates), rendering it first if needed.
+        """
+        path = self.path_for(evaluation["id"], evaluation["updated_at"])
+        if path.exists():
+            self.hits += 1
+            return path
+
+        # Concurrent requests for the same report wait on one render
+        future = self._rendering.get(path)
+        if future is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(
+                loop.run_in_executor(self._get_executor(), render_report, evaluation, str(path))
+            )
+            self._rendering[path] = future
+            started = time.perf_counter()
+
+            def done(_):
+                self._rendering.pop(path, None)
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="pdf_render")
+
+            future.add_done_callback(done)
+            self.renders += 1
+        with span("pdf_render", {"evaluation.id": evaluation["id"], "report.executor": self.kind}):
+            await asyncio.shield(future)
+        await asyncio.to_thread(self._evict, evaluation["id"], path)
+        return path
+
+    def prerender(self, evaluation: dict):
+        """Render in the background after an evaluation is stored (errors are only logged)"""
+        if not REPORT_PRERENDER:
+            return
+
+        async def run():
+            try:
+                await self.get_or_render(evaluation)
+            except Exception as e:
+                print(f"[WARNING] Pre-rendering report for {evaluation.get('id')} failed: {e}")
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _evict(self, evaluation_id: str, keep: Path):
+        """Drop older renders of this evaluation, then the oldest files beyond max_files"""
+        try:
+            for stale in self.cache_dir.glob(f"{evaluation_id}_*.pdf"):
+                if stale != keep:
+                    stale.unlink(missing_ok=True)
+            files = sorted(self.cache_dir.glob("*.pdf"), key=lambda p: p.stat().st_mtime)
+            for old in files[:max(0, len(files) - self.max_files)]:
+                if old != keep:
+                    old.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"[WARNING] Report cache eviction failed: {e}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "hits": self.hits,
+            "renders": self.renders,
+            "rendering": len(self._rendering),
+        }
+
+
+# Process-wide report cache used by the API
+report_cache = ReportCache()
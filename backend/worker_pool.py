@@ -0,0 +1,263 @@
+"""
+Bounded worker pool for running evaluation jobs off the event loop
+"""
+
+import asyncio
+import functools
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Allow `src/...` imports inside spawned worker processes
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.metrics import observe_timings
+from src.tracing import inject_context, run_with_context, setup_tracing
+
+# Pool configuration (override via environment)
+EXECUTOR_KIND = os.getenv("EVAL_EXECUTOR", "thread").lower()
+MAX_WORKERS = int(os.getenv("EVAL_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_QUEUE = int(os.getenv("EVAL_MAX_QUEUE", "16"))
+DEFAULT_RETRY_AFTER = int(os.getenv("EVAL_RETRY_AFTER", "30"))
+
+
+class PoolSaturatedError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Evaluation queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _warm_worker(processes: int = 0):
+    """
+    Executor initializer: build per-worker state once instead of per job.
+    Imports the heavy pipeline modules, pins deterministic LLM settings and
+    loads the shared embedding model (a no-op for threads after the first).
+    Worker processes (`processes` of them) split the LLM rate limits.
+    """
+    import evaluation_pipeline  # noqa: F401  (warms LangChain / Gemini imports)
+    from src.llm_wrapper import set_deterministic_mode, split_limits
+    from src.embeddings import get_embedding_service
+    from src.query_embeddings import get_query_embedding_store
+    from src.agents.summarizer import SECTION_QUERIES
+
+    setup_tracing()
+    if processes:
+        split_limits(processes)
+    try:
+        set_deterministic_mode(True)
+    except Exception:
+        pass
+
+    try:
+        get_embedding_service().warm_up()
+        get_query_embedding_store().register(SECTION_QUERIES)
+    except Exception as e:
+        print(f"[WARNING] Embedding warm-up failed in worker: {e}")
+
+
+class _QueueProgress:
+    """Picklable progress callback that forwards a job's events through the shared manager queue"""
+
+    def __init__(self, queue, job: int):
+        self.queue = queue
+        self.job = job
+
+    def __call__(self, stage, payload):
+        self.queue.put((self.job, stage, payload))
+
+
+class EvaluationWorkerPool:
+    """
+    Thread or process pool with admission control.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more wait
+    for a free worker; anything beyond that is rejected with PoolSaturatedError
+    so the API can answer 429 instead of piling up work.
+    """
+
+    def __init__(self, kind: str = EXECUTOR_KIND, max_workers: int = MAX_WORKERS, max_queue: int = MAX_QUEUE):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}. Use 'thread' or 'process'.")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = None
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._avg_duration = None
+        self._manager = None
+        self._progress_queue = None
+        self._relay = None
+        self._listeners = {}
+        self._job_ids = itertools.count()
+        self._start_lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def start(self):
+        """
+        Create the underlying executor (called from the FastAPI startup hook;
+        otherwise submit() calls it on a helper thread). Process pools also
+        start the manager that relays progress events. Both spawn processes
+        and block, so this never runs on the event loop.
+        """
+        with self._start_lock:
+            if self._executor is None:
+                self._start()
+
+    def _start(self):
+        if self.kind == "process":
+            self._manager = multiprocessing.get_context("spawn").Manager()
+            self._progress_queue = self._manager.Queue()
+            self._relay = threading.Thread(target=self._relay_progress, name="evaluation-progress", daemon=True)
+            self._relay.start()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(self.max_workers,),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="evaluation",
+                initializer=_warm_worker,
+            )
+        print(f"[INFO] Evaluation pool started: {self.max_workers} {self.kind} workers, queue size {self.max_queue}")
+
+    def shutdown(self):
+        """Stop accepting jobs and wait for running ones to finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._progress_queue.put(None)
+            self._relay.join()
+            self._manager.shutdown()
+            self._manager = None
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up"""
+        if self._avg_duration is None:
+            return DEFAULT_RETRY_AFTER
+        waiting = max(0, self._in_flight - self.max_workers) + 1
+        return max(1, math.ceil(self._avg_duration * waiting / self.max_workers))
+
+    def check_capacity(self):
+        """Raise PoolSaturatedError if a new job would be rejected"""
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            raise PoolSaturatedError(self.retry_after())
+
+    async def submit(self, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` on a worker and await its result.
+        For the process executor `fn` and its arguments must be picklable.
+        """
+        self.check_capacity()
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            # Not started at startup: spawning workers blocks, so keep it off the event loop
+            await loop.run_in_executor(None, self.start)
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            # Carry the trace context so the job's spans join the request's trace
+            result = await loop.run_in_executor(
+                self._executor, functools.partial(run_with_context, inject_context(), fn, *args, **kwargs)
+            )
+            self._completed += 1
+            return result
+        except Exception as e:
+            self._failed += 1
+            # Worker processes keep their own metrics; fold in the failed run's LLM errors
+            if self.kind == "process" and getattr(e, "timings", None):
+                observe_timings(e.timings)
+            raise
+        finally:
+            self._in_flight -= 1
+            self._record_duration(time.perf_counter() - started)
+
+    async def submit_with_progress(self, fn, on_progress, *args, **kwargs):
+        """
+        Like submit(), but passes `progress_callback` to `fn` and delivers each
+        (stage, payload) it reports to `on_progress` on the event loop thread.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.kind == "thread":
+            def progress_callback(stage, payload):
+                loop.call_soon_threadsafe(on_progress, stage, payload)
+
+            return await self.submit(fn, *args, progress_callback=progress_callback, **kwargs)
+
+        # Worker processes cannot call back into this loop; their events go
+        # through one shared queue that a single relay thread dispatches
+        self.check_capacity()
+        if self._manager is None:
+            await loop.run_in_executor(None, self.start)
+        job = next(self._job_ids)
+        delivered = asyncio.Event()
+        self._listeners[job] = (loop, on_progress, delivered)
+        try:
+            return await self.submit(
+                fn, *args, progress_callback=_QueueProgress(self._progress_queue, job), **kwargs
+            )
+        finally:
+            # The job's events are queued before its result returns; this marker
+            # follows them, so every event is delivered before we return
+            self._progress_queue.put((job, None, None))
+            await delivered.wait()
+            del self._listeners[job]
+
+    def _relay_progress(self):
+        """Relay thread: hand each (job, stage, payload) to that job's loop"""
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                return
+            job, stage, payload = item
+            listener = self._listeners.get(job)
+            if listener is None:
+                continue
+            loop, on_progress, delivered = listener
+            if stage is None:
+                loop.call_soon_threadsafe(delivered.set)
+            else:
+                loop.call_soon_threadsafe(on_progress, stage, payload)
+
+    def _record_duration(self, seconds: float):
+        # Exponentially weighted average keeps Retry-After close to recent load
+        if self._avg_duration is None:
+            self._avg_duration = seconds
+        else:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * seconds
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.max_workers,
+            "queue_size": self.max_queue,
+            "running": min(self._in_flight, self.max_workers),
+            "queued": max(0, self._in_flight - self.max_workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_duration_s": round(self._avg_duration, 2) if self._avg_duration is not None else None,
+        }
+
+
+# Process-wide pool used by the API
+worker_pool = EvaluationWorkerPool()
@@ -1,8 +1,20 @@
-import type { Evaluation, Settings } from '../types/evaluation';
+import type { Evaluation, EvaluationFilters, EvaluationPage, Settings } from '../types/evaluation';
 
 // Backend API base URL
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api';
 
+function filterParams(filters: EvaluationFilters): URLSearchParams {
+  const params = new URLSearchParams();
+  filters.decision?.forEach((decision) => params.append('decision', decision));
+  for (const key of ['min_score', 'max_score', 'domain', 'created_after', 'created_before'] as const) {
+    const value = filters[key];
+    if (value !== undefined && value !== '') {
+      params.set(key, String(value));
+    }
+  }
+  return params;
+}
+
 export const evaluationService = {
   async saveEvaluation(file: File): Promise<Evaluation> {
     const formData = new FormData();
@@ -21,8 +33,18 @@ export const evaluationService = {
     return await response.json();
   },
 
-  async getEvaluations(): Promise<Evaluation[]> {
-    const response = await fetch(`${API_BASE_URL}/evaluations`);
+  async getEvaluations(
+    filters: EvaluationFilters = {},
+    cursor?: string | null,
+    limit = 20
+  ): Promise<EvaluationPage> {
+    const params = filterParams(filters);
+    params.set('limit', String(limit));
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+
+    const response = await fetch(`${API_BASE_URL}/evaluations?${params}`);
 
     if (!response.ok) {
       throw new Error('Failed to fetch evaluations');
@@ -31,6 +53,16 @@ export const evaluationService = {
     return await response.json();
   },
 
+  async countEvaluations(filters: EvaluationFilters = {}): Promise<number> {
+    const response = await fetch(`${API_BASE_URL}/evaluations/count?${filterParams(filters)}`);
+
+    if (!response.ok) {
+      throw new Error('Failed to count evaluations');
+    }
+
+    return (await response.json()).total;
+  },
+
   async getEvaluationById(id: string): Promise<Evaluation | null> {
     const response = await fetch(`${API_BASE_URL}/evaluations/${id}`);
 
@@ -62,10 +62,35 @@ export interface Evaluation {
   section_scores: SectionScore[];
   full_critique: FullCritique;
   budget_analysis: BudgetAnalysis;
+  domain?: string | null;
   created_at: string;
   updated_at: string;
 }
 
+export interface EvaluationListItem {
+  id: string;
+  file_name: string;
+  decision: Evaluation['decision'];
+  overall_score: number;
+  domain: string | null;
+  created_at: string;
+}
+
+export interface EvaluationPage {
+  items: EvaluationListItem[];
+  next_cursor: string | null;
+  limit: number;
+}
+
+export interface EvaluationFilters {
+  decision?: Evaluation['decision'][];
+  min_score?: number;
+  max_score?: number;
+  domain?: string;
+  created_after?: string;
+  created_before?: string;
+}
+
 export interface Settings {
   id: string;
   max_budget: number;
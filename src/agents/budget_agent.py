@@ -2,6 +2,7 @@ import json
 import re
 from src.llm_wrapper import gemini_llm  # your LLM wrapper
 from src.prompts import BUDGET_PROMPT  # your prompt template
+from src.context_packing import get_token_budget, pack_json, log_prompt
 
 
 def strip_codeblock(text: str) -> str:
@@ -11,7 +12,7 @@ def strip_codeblock(text: str) -> str:
     return re.sub(r"^```(?:json)?\n|```$", "", text.strip(), flags=re.MULTILINE)
 
 
-def run_budget_agent(budget_input, max_budget=None):
+def run_budget_agent(budget_input, max_budget=None, domain: str = "General"):
     """
     Evaluate the Budget section of a grant using LLM.
 
@@ -19,18 +20,25 @@ def run_budget_agent(budget_input, max_budget=None):
         budget_input (dict): Combined Budget info from summarizer and scorer.
             Expected keys: text, notes, references, score, summary, strengths, weaknesses
         max_budget (float, optional): Maximum allowed budget to flag overages.
+        domain (str, optional): Research domain of the proposal.
 
     Returns:
-        dict: LLM output with budget_score, budget_summary, flags, recommendations
+        dict: LLM output with totalBudget, breakdown, flags, summary,
+            budget_score and recommendations
     """
-    # Convert input to JSON string
-    budget_json_str = json.dumps(budget_input, indent=2)
+    # Convert input to compact JSON within the budget agent's token budget
+    budget = get_token_budget("budget")
+    budget_json_str = pack_json(
+        budget_input, budget,
+        priority=["text", "score", "weaknesses", "strengths", "summary", "notes", "references"]
+    )
 
     # Prepare prompt
-    prompt = BUDGET_PROMPT.format(budget_json=budget_json_str, max_budget=max_budget or "N/A")
+    prompt = BUDGET_PROMPT.format(budget_json=budget_json_str, max_budget=max_budget or "N/A", domain=domain)
+    log_prompt("budget", prompt, budget)
 
     # Call LLM
-    response = gemini_llm(prompt)
+    response = gemini_llm(prompt, json_response=True)
 
     cleaned_response = strip_codeblock(response)
 
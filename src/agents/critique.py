@@ -2,6 +2,7 @@ from src.llm_wrapper import gemini_llm
 import json
 import re
 from src.prompts import MASTER_CRITIQUE_PROMPT
+from src.context_packing import get_token_budget, pack_json, log_prompt
 
 
 def strip_codeblock(text: str) -> str:
@@ -11,7 +12,7 @@ def strip_codeblock(text: str) -> str:
     return re.sub(r"^```(?:json)?\n|```$", "", text.strip(), flags=re.MULTILINE)
 
 
-def run_grant_critique(scorer_json, summaries_json=None):
+def run_grant_critique(scorer_json, summaries_json=None, domain: str = "General"):
     """
     Pass the Scorer Agent's JSON output (and optionally Summary Agent output)
     to Gemini LLM for a comprehensive multi-domain critique.
@@ -31,6 +32,8 @@ def run_grant_critique(scorer_json, summaries_json=None):
         The structured output from the Scorer Agent, including scores, strengths, and weaknesses.
     summaries_json : dict, optional
         The structured summaries from the Summary Agent for deeper context.
+    domain : str, optional
+        Research domain the critique is framed for.
 
     Returns
     -------
@@ -44,14 +47,17 @@ def run_grant_critique(scorer_json, summaries_json=None):
         "scorer_output": scorer_json,
     }
 
-    # Convert to string for prompt formatting
-    input_json_str = json.dumps(combined_input, indent=2)
+    # Convert to compact JSON within the critique token budget; the scorer
+    # output is what the critique expands on, so summaries are trimmed first
+    budget = get_token_budget("critique")
+    input_json_str = pack_json(combined_input, budget, priority=["scorer_output", "summaries"])
 
     # Prepare the full prompt
-    prompt = MASTER_CRITIQUE_PROMPT.format(input_json=input_json_str)
+    prompt = MASTER_CRITIQUE_PROMPT.format(input_json=input_json_str, domain=domain)
+    log_prompt("critique", prompt, budget)
 
     # Call Gemini LLM
-    response = gemini_llm(prompt)
+    response = gemini_llm(prompt, json_response=True)
 
     # Clean Markdown wrappers
     cleaned_response = strip_codeblock(response)
@@ -30,7 +30,7 @@ def run_crosscheck(summary: str, scores: dict, critiques: dict, budget: dict, re
         budget=budget
     )
 
-    response = gemini_llm(prompt)
+    response = gemini_llm(prompt, json_response=True)
     # LLM should return JSON: {"consistent": bool, "issues": [str, ...]}
     import json
     try:
@@ -2,13 +2,16 @@ from src.llm_wrapper import gemini_llm
 import json
 import re
 from src.prompts import FINAL_DECISION_PROMPT
+from src.context_packing import get_token_budget, pack_json, log_prompt
 
 def strip_codeblock(text: str) -> str:
     return re.sub(r"^```(?:json)?\n|```$", "", text.strip(), flags=re.MULTILINE)
 
-def run_final_decision_agent(scores_json, critique_json, budget_json, summary_json):
+def run_final_decision_agent(scores_json, critique_json, budget_json, summary_json,
+                             final_weighted_score: float, domain: str = "General"):
     """
     Combines outputs from scoring, critique, and budget agents with summary for final decision.
+    `final_weighted_score` comes from compute_weighted_score and is passed through unchanged.
     """
     full_input = {
         "scores": scores_json,
@@ -17,9 +20,16 @@ def run_final_decision_agent(scores_json, critique_json, budget_json, summary_js
         "summary": summary_json
     }
 
-    prompt = FINAL_DECISION_PROMPT.format(data=json.dumps(full_input, indent=2))
+    # Scores and budget drive the decision; the summary is trimmed first
+    budget = get_token_budget("decision")
+    data = pack_json(full_input, budget, priority=["scores", "budget", "critique", "summary"])
 
-    response = gemini_llm(prompt)
+    prompt = FINAL_DECISION_PROMPT.format(
+        data=data, final_weighted_score=final_weighted_score, domain=domain
+    )
+    log_prompt("decision", prompt, budget)
+
+    response = gemini_llm(prompt, json_response=True)
     cleaned = strip_codeblock(response)
 
     try:
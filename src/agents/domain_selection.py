@@ -2,7 +2,12 @@
 
 from src.llm_wrapper import gemini_llm
 from src.prompts import DOMAIN_CLASSIFIER_PROMPT
+from src.context_packing import get_token_budget, sample_text, log_prompt
+from src.agents.local_domain_classifier import get_classifier_settings, predict_domain, is_confident
+from src.config.domain_examples import DOMAIN_EXAMPLES
+from src.config.domain_weights import DOMAIN_WEIGHTS
 import re
+import time
 
 def strip_response(text: str) -> str:
     """
@@ -12,27 +17,72 @@ def strip_response(text: str) -> str:
     text = re.sub(r"```(?:.*)?```", "", text)  # remove accidental codeblocks
     return text.split("\n")[0].strip()  # only keep first non-empty line
 
+
+# Labels the classifier may return
+ALLOWED_DOMAINS = [
+    "AI / Computer Science",
+    "Biotechnology / Life Sciences",
+    "Healthcare / Medicine",
+    "Education / Learning Sciences",
+    "Environment / Climate / Sustainability",
+    "Social Sciences / Policy",
+    "Agriculture / Food Systems"
+]
+
+# Every label must have local prototypes and scoring weights, or a classified
+# proposal would fail in compute_weighted_score
+if not set(ALLOWED_DOMAINS) == set(DOMAIN_EXAMPLES) == set(DOMAIN_WEIGHTS):
+    raise RuntimeError(
+        "Domain labels differ between ALLOWED_DOMAINS, DOMAIN_EXAMPLES and DOMAIN_WEIGHTS: "
+        f"{sorted(set(ALLOWED_DOMAINS) ^ set(DOMAIN_EXAMPLES) | set(ALLOWED_DOMAINS) ^ set(DOMAIN_WEIGHTS))}"
+    )
+
+
 def classify_domain(proposal_text: str) -> str:
+    """
+    Classify proposal into a domain.
+
+    The local embedding classifier answers first; only when it is not
+    confident (see `domain_classifier:` in config.yaml) does the LLM decide.
+    """
+    settings = get_classifier_settings()
+    if settings["local"]:
+        try:
+            started = time.perf_counter()
+            prediction = predict_domain(proposal_text)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if is_confident(prediction, settings) and prediction["domain"] in ALLOWED_DOMAINS:
+                print(
+                    f"[INFO] Domain classified locally in {elapsed_ms:.0f}ms "
+                    f"(confidence {prediction['confidence']:.2f}, margin {prediction['margin']:.3f})"
+                )
+                return prediction["domain"]
+            print(
+                f"[INFO] Local domain classifier unsure ({prediction['domain']}, "
+                f"confidence {prediction['confidence']:.2f}, margin {prediction['margin']:.3f}); asking LLM"
+            )
+        except Exception as e:
+            print(f"[WARNING] Local domain classifier failed, asking LLM: {e}")
+
+    return classify_domain_llm(proposal_text)
+
+
+def classify_domain_llm(proposal_text: str) -> str:
     """
     Classify proposal into a domain using the LLM.
+    Long proposals are sampled (opening + evenly spaced excerpts) to fit the
+    `domain` token budget; a label needs far less than the whole document.
     """
-    prompt = DOMAIN_CLASSIFIER_PROMPT.format(context=proposal_text)
-    response = gemini_llm(prompt)
+    budget = get_token_budget("domain")
+    prompt = DOMAIN_CLASSIFIER_PROMPT.format(context=sample_text(proposal_text, budget))
+    log_prompt("domain", prompt, budget)
+    # The answer is a single domain label
+    response = gemini_llm(prompt, max_output_tokens=64)
 
     domain = strip_response(response)
 
     # Optional: safety fallback if model outputs garbage
-    allowed_domains = [
-        "AI / Computer Science",
-        "Biotechnology / Life Sciences",
-        "Healthcare / Medicine",
-        "Education / Learning Sciences",
-        "Environment / Climate / Sustainability",
-        "Social Sciences / Policy",
-        "Agriculture / Food Systems"
-    ]
-
-    if domain not in allowed_domains:
+    if domain not in ALLOWED_DOMAINS:
         domain = "Social Sciences / Policy"  # default safest domain
 
     return domain
@@ -0,0 +1,150 @@
+"""
+Embedding-based nearest-centroid domain classifier.
+
+Each domain is represented by the normalized mean embedding (prototype) of
+its labeled examples in src/config/domain_examples.py. A proposal is embedded
+as the mean of a few text windows and assigned to the closest prototype.
+Prototypes are cached on disk per embedding model and rebuilt whenever the
+examples change.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.config.domain_examples import DOMAIN_EXAMPLES
+from src.embeddings import get_embedding_service, load_config
+
+PROTOTYPE_DIR = Path(os.getenv("DOMAIN_PROTOTYPES_DIR", "cache"))
+
+# all-MiniLM-L6-v2 reads at most 256 word pieces, so long text is embedded in windows
+WINDOW_CHARS = 800
+MAX_WINDOWS = 16
+# Softmax temperature over cosine similarities (cosines sit in a narrow band)
+SOFTMAX_TEMPERATURE = 0.02
+
+# The thresholds were only checked against the seed examples; keep the
+# classifier opt-in until they are calibrated on labelled proposals
+DEFAULT_SETTINGS = {
+    "local": False,
+    "min_confidence": 0.6,
+    "min_margin": 0.03,
+}
+
+_prototypes = {}
+_lock = threading.Lock()
+
+
+def get_classifier_settings(config_path="config.yaml") -> dict:
+    cfg = (load_config(config_path) or {}).get("domain_classifier") or {}
+    return {**DEFAULT_SETTINGS, **cfg}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _examples_fingerprint(examples: dict) -> str:
+    return hashlib.sha256(json.dumps(examples, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_prototypes(examples: dict, service) -> tuple[list[str], np.ndarray]:
+    """Return (labels, prototype matrix) from {label: [example texts]}."""
+    labels = list(examples)
+    centroids = []
+    for label in labels:
+        vectors = _normalize(service.encode(examples[label]))
+        centroids.append(vectors.mean(axis=0))
+    return labels, _normalize(np.stack(centroids)).astype(np.float32)
+
+
+def _prototype_path(model_name: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return PROTOTYPE_DIR / f"domain_prototypes_{slug}.npz"
+
+
+def load_prototypes(config_path="config.yaml") -> tuple[list[str], np.ndarray]:
+    """Prototypes for the configured embedding model, from disk when still valid."""
+    service = get_embedding_service(config_path)
+    fingerprint = _examples_fingerprint(DOMAIN_EXAMPLES)
+    cached = _prototypes.get(service.model_name)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1], cached[2]
+
+    with _lock:
+        path = _prototype_path(service.model_name)
+        labels = centroids = None
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    if str(data["fingerprint"]) == fingerprint and str(data["model"]) == service.model_name:
+                        labels, centroids = data["labels"].tolist(), data["centroids"]
+            except Exception as e:
+                print(f"[WARNING] Could not read domain prototypes at {path}: {e}")
+
+        if labels is None:
+            labels, centroids = build_prototypes(DOMAIN_EXAMPLES, service)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                np.savez(path, model=np.array(service.model_name), fingerprint=np.array(fingerprint),
+                         labels=np.array(labels), centroids=centroids)
+                print(f"[INFO] Built domain prototypes for {len(labels)} domains -> {path}")
+            except Exception as e:
+                print(f"[WARNING] Could not persist domain prototypes to {path}: {e}")
+
+        _prototypes[service.model_name] = (fingerprint, labels, centroids)
+        return labels, centroids
+
+
+def _text_windows(text: str) -> list[str]:
+    """Up to MAX_WINDOWS evenly spaced windows covering the document."""
+    text = " ".join(text.split())
+    if len(text) <= WINDOW_CHARS:
+        return [text] if text else []
+    starts = np.linspace(0, len(text) - WINDOW_CHARS, num=min(MAX_WINDOWS, len(text) // WINDOW_CHARS + 1))
+    return [text[int(s):int(s) + WINDOW_CHARS] for s in starts]
+
+
+def predict_domain(text: str, config_path="config.yaml", prototypes=None) -> dict:
+    """
+    Score `text` against every domain prototype (or the given
+    `(labels, centroids)`, e.g. held-out prototypes in an evaluation).
+
+    Returns dict with `domain` (best label), `confidence` (softmax probability
+    of the best label), `margin` (cosine gap to the runner-up) and `scores`.
+    """
+    labels, centroids = prototypes if prototypes is not None else load_prototypes(config_path)
+    windows = _text_windows(text)
+    if not windows:
+        return {"domain": None, "confidence": 0.0, "margin": 0.0, "scores": {}}
+
+    service = get_embedding_service(config_path)
+    doc_vector = _normalize(_normalize(service.encode(windows)).mean(axis=0))
+    similarities = centroids @ doc_vector
+
+    logits = (similarities - similarities.max()) / SOFTMAX_TEMPERATURE
+    probabilities = np.exp(logits) / np.exp(logits).sum()
+    order = np.argsort(-similarities)
+    best = int(order[0])
+    runner_up = int(order[1]) if len(order) > 1 else best
+
+    return {
+        "domain": labels[best],
+        "confidence": float(probabilities[best]),
+        "margin": float(similarities[best] - similarities[runner_up]),
+        "scores": {label: round(float(s), 4) for label, s in zip(labels, similarities)},
+    }
+
+
+def is_confident(prediction: dict, settings: dict) -> bool:
+    return (
+        prediction["domain"] is not None
+        and prediction["confidence"] >= settings["min_confidence"]
+        and prediction["margin"] >= settings["min_margin"]
+    )
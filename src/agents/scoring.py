@@ -1,6 +1,7 @@
 from src.llm_wrapper import gemini_llm
 import json
 from src.prompts import SCORING_PROMPT
+from src.context_packing import get_token_budget, pack_json, log_prompt
 import re
 
 def strip_codeblock(text: str) -> str:
@@ -10,19 +11,36 @@ def strip_codeblock(text: str) -> str:
     return re.sub(r"^```(?:json)?\n|```$", "", text.strip(), flags=re.MULTILINE)
 
 
+# Summary sections kept longest when the summary must be shortened
+SUMMARY_PRIORITY = [
+    "Objectives",
+    "Methodology",
+    "Budget",
+    "Feasibility",
+    "Innovation",
+    "EvaluationPlan",
+    "ExpectedOutcomes",
+    "Sustainability",
+    "CoverLetter",
+    "LettersOfSupport"
+]
+
+
 def run_grant_scoring(summary_json, domain: str):
     """
     Pass a structured grant summary JSON to Gemini LLM and get section-wise scores.
     NOTE: These scores are *raw* — adaptive weighting happens later in backend.
     """
-    # Convert summary to JSON string for the prompt
-    grant_json_str = json.dumps(summary_json, indent=2)
+    # Convert summary to compact JSON within the scoring token budget
+    budget = get_token_budget("scoring")
+    grant_json_str = pack_json(summary_json, budget, priority=SUMMARY_PRIORITY)
 
     # Prepare full prompt WITH DOMAIN CONTEXT
     prompt = SCORING_PROMPT.format(grant_json=grant_json_str, domain=domain)
+    log_prompt("scoring", prompt, budget)
 
     # Call Gemini LLM
-    response = gemini_llm(prompt)
+    response = gemini_llm(prompt, json_response=True)
 
     cleaned_response = strip_codeblock(response)
 
@@ -44,6 +44,7 @@ from src.llm_wrapper import gemini_llm
 import json
 import re
 from src.prompts import SUMMARY_PROMPT
+from src.context_packing import count_tokens, get_token_budget, log_prompt
 
 # Define all key grant sections
 GRANT_SECTIONS = [
@@ -59,13 +60,92 @@ GRANT_SECTIONS = [
     "LettersOfSupport"
 ]
 
+# Retrieval query per section; constant across proposals
+SECTION_QUERIES = [
+    f"Find the {section} section of this grant proposal, including metrics, responsibilities, and relevant details"
+    for section in GRANT_SECTIONS
+]
+
 def strip_codeblock(text: str) -> str:
     """
     Remove Markdown-style code block wrappers (```json ... ```) if present.
     """
     return re.sub(r"^```(?:json)?\n|```$", "", text.strip(), flags=re.MULTILINE)
 
-def run_summarizer_extended(retriever_fn):
+def _page_sort_key(page_num):
+    try:
+        return (0, int(page_num))
+    except (TypeError, ValueError):
+        return (1, 0)
+
+
+def _format_chunks(chunks) -> str:
+    context_text = ""
+    for chunk in chunks:
+        sections = ", ".join(chunk["sections"])
+        context_text += f"[Page {chunk['page_number']} | Source: {chunk['source']} | Sections: {sections}]\n{chunk['text']}\n\n"
+    return context_text
+
+
+def assemble_context(section_docs, max_tokens: int | None = None) -> tuple[str, dict]:
+    """
+    Merge retrieved chunks across all section queries into one context.
+
+    Each unique chunk (same source, page and text) appears once, in page
+    order, tagged with every section whose query retrieved it. If the result
+    exceeds `max_tokens`, chunks retrieved by the fewest sections are dropped
+    first. Returns the context text and stats comparing it with pasting every
+    hit per section.
+    """
+    chunks = {}
+    naive_text = ""
+    total_hits = 0
+
+    for section, docs in zip(GRANT_SECTIONS, section_docs):
+        for doc in docs or []:
+            page_num = doc.get("page_number", "Unknown")
+            text = doc.get("text", "")
+            source = doc.get("source", "Unknown")
+            total_hits += 1
+            naive_text += f"[Page {page_num} | Source: {source} | Section: {section}]\n{text}\n\n"
+
+            key = (source, str(page_num), text)
+            if key not in chunks:
+                chunks[key] = {"page_number": page_num, "source": source, "text": text, "sections": []}
+            if section not in chunks[key]["sections"]:
+                chunks[key]["sections"].append(section)
+
+    # Stable ordering: page number, then first retrieval, so prompt inputs are deterministic
+    ordered = sorted(chunks.values(), key=lambda c: _page_sort_key(c["page_number"]))
+    context_text = _format_chunks(ordered)
+    unique_chunks = len(ordered)
+
+    if max_tokens is not None and count_tokens(context_text) > max_tokens:
+        # Keep the chunks most sections agree on; earlier pages win ties
+        by_priority = sorted(ordered, key=lambda c: -len(c["sections"]))
+        kept, used = [], 0
+        for chunk in by_priority:
+            cost = count_tokens(_format_chunks([chunk]))
+            if used + cost > max_tokens:
+                continue
+            kept.append(chunk)
+            used += cost
+        kept_ids = {id(c) for c in kept}
+        ordered = [c for c in ordered if id(c) in kept_ids]
+        context_text = _format_chunks(ordered)
+
+    stats = {
+        "retrieved_chunks": total_hits,
+        "unique_chunks": unique_chunks,
+        "packed_chunks": len(ordered),
+        "tokens_before": count_tokens(naive_text),
+        "tokens_after": count_tokens(context_text),
+    }
+    return context_text, stats
+
+
+def run_summarizer_extended(retriever_fn, batch_retriever_fn=None, context_stats: dict | None = None,
+                            domain: str | None = None):
     """
     Fetch chunks via retriever_fn for each grant section and return
     a complete structured summary JSON with:
@@ -73,34 +153,40 @@ def run_summarizer_extended(retriever_fn):
     - pages
     - references
     - notes
+
+    If batch_retriever_fn is given (e.g. vectorstore_agent's `ask_many`), all
+    section queries are answered in one batched call instead of one each.
+    Overlapping hits are merged by assemble_context(); pass a dict as
+    `context_stats` to receive its chunk and token counts.
+
+    The pipeline summarizes before the domain is classified, so `domain`
+    is usually None and the prompt asks for a generalist reviewer.
     """
-    context_text = ""
-    
-    # Retrieve chunks for each section individually
-    for section in GRANT_SECTIONS:
-        docs = retriever_fn(f"Find the {section} section of this grant proposal, including metrics, responsibilities, and relevant details")
-        if not docs:
-            continue
-        # Stable ordering: sort by page number when possible so prompt inputs are deterministic
-        try:
-            docs_sorted = sorted(docs, key=lambda d: int(d.get('page_number', 0)))
-        except Exception:
-            docs_sorted = docs
-
-        for doc in docs_sorted:
-            page_num = doc.get("page_number", "Unknown")
-            text = doc.get("text", "")
-            source = doc.get("source", "Unknown")
-            context_text += f"[Page {page_num} | Source: {source} | Section: {section}]\n{text}\n\n"
+    if batch_retriever_fn is not None:
+        section_docs = batch_retriever_fn(SECTION_QUERIES)
+    else:
+        section_docs = [retriever_fn(query) for query in SECTION_QUERIES]
+
+    budget = get_token_budget("summary")
+    context_text, stats = assemble_context(section_docs, max_tokens=budget)
+    print(
+        f"[INFO] Summary context: {stats['retrieved_chunks']} hits -> {stats['unique_chunks']} unique chunks "
+        f"({stats['packed_chunks']} packed), {stats['tokens_before']} -> {stats['tokens_after']} tokens"
+    )
+    if context_stats is not None:
+        context_stats.update(stats)
 
     if not context_text:
         return {}
 
     # Prepare full prompt
-    prompt = SUMMARY_PROMPT.format(context=context_text)
+    prompt = SUMMARY_PROMPT.format(context=context_text, domain=domain or "the proposal's research area")
+    prompt_tokens = log_prompt("summary", prompt, budget)
+    if context_stats is not None:
+        context_stats["prompt_tokens"] = prompt_tokens
 
     # Call Gemini LLM
-    response = gemini_llm(prompt)
+    response = gemini_llm(prompt, json_response=True)
 
     # Strip code block if present
     clean_response = strip_codeblock(response)
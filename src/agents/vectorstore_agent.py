@@ -1,36 +1,83 @@
-from src.embeddings import get_embedder
-from src.vectorstore import create_vectorstore
+from src.embeddings import get_embedder, load_config
+from src.vectorstore import create_vectorstore, empty_vectorstore, release_vectorstore
+from src.query_embeddings import get_query_embedding_store
+from src.preprocessing import split_docs
+from src.metrics import track_stage
 from langchain.schema import Document
+import contextvars
+import queue
+import threading
 
-def vectorstore_agent(pages: list, config_path="config.yaml", persist_dir=None, deterministic: bool = True):
+RETRIEVAL_K = 10
+
+# Streaming builds embed pages in batches; at most MAX_PENDING_BATCHES wait
+# for the embedder before page extraction blocks
+STREAM_BATCH_PAGES = 8
+MAX_PENDING_BATCHES = 4
+
+
+def get_vectorstore_backend(config_path="config.yaml") -> str:
+    """Backend named by `vectorstore: backend:` in config.yaml (default: chroma)."""
+    cfg = load_config(config_path) or {}
+    return (cfg.get("vectorstore") or {}).get("backend") or "chroma"
+
+
+def vectorstore_agent(pages: list, config_path="config.yaml", persist_dir=None, deterministic: bool = True,
+                      chunk_size: int | None = None):
     """
     Create vectorstore and return a retriever wrapper.
-    
+
     Args:
         pages: List of document pages
         config_path: Path to config file
         persist_dir: Directory to persist vectorstore. If None (default), uses in-memory mode for isolation.
         deterministic: Use deterministic retrieval settings
-    
+        chunk_size: Characters per chunk; defaults to `retrieval.chunk_size` in config.yaml
+
     Returns:
-        dict with 'vectorstore' and 'ask' function
+        dict with 'vectorstore', 'ask' (one query) and 'ask_many' (a list of
+        queries embedded in a single batch) functions. `ask_many` reuses
+        precomputed embeddings for known queries (see src/query_embeddings.py).
     """
-    # Use actual Document objects for Chroma, preserving metadata
+    # Use actual Document objects, preserving metadata, split into chunks
+    # (each chunk keeps its page number for the summarizer's references)
     documents = [Document(page_content=p.page_content, metadata=p.metadata) for p in pages]
+    documents = split_docs(documents, config_path, chunk_size=chunk_size)
 
     embedder = get_embedder(config_path)
-    
+    backend = get_vectorstore_backend(config_path)
+
     # Create vectorstore WITHOUT persistence by default (in-memory) to avoid contamination
     # Each evaluation gets a fresh, isolated vectorstore
-    db = create_vectorstore(documents, embedder, persist_dir=persist_dir)
-    
-    # Use deterministic retriever settings by default (fixed k, similarity search)
-    retriever = db.as_retriever(search_type="similarity", search_kwargs={"k": 10})
+    db = create_vectorstore(documents, embedder, persist_dir=persist_dir, backend=backend)
+    return _retriever_api(db, backend, config_path)
 
-    # wrapped retriever
-    def ask(query: str):
-        # Ensure a stable ordering of retrieved documents
-        retrieved_docs = retriever.get_relevant_documents(query)
+
+def _retriever_api(db, backend: str, config_path="config.yaml") -> dict:
+    query_store = get_query_embedding_store(config_path)
+
+    if backend == "numpy":
+        def search(query: str):
+            # Exact top-k, ties broken by document order
+            return db.similarity_search(query, k=RETRIEVAL_K)
+
+        def search_many(queries: list[str]):
+            if not queries:
+                return []
+            return db.similarity_search_by_vectors(query_store.embed_queries(queries), k=RETRIEVAL_K)
+    else:
+        # Use deterministic retriever settings by default (fixed k, similarity search)
+        retriever = db.as_retriever(search_type="similarity", search_kwargs={"k": RETRIEVAL_K})
+
+        def search(query: str):
+            return retriever.get_relevant_documents(query)
+
+        def search_many(queries: list[str]):
+            # Stored or single-batch query embeddings, then per-vector searches
+            vectors = query_store.embed_queries(queries) if queries else []
+            return [db.similarity_search_by_vector(v.tolist(), k=RETRIEVAL_K) for v in vectors]
+
+    def to_dicts(retrieved_docs):
         return [
             {
                 "page_number": doc.metadata.get("page", "Unknown"),
@@ -39,5 +86,90 @@ def vectorstore_agent(pages: list, config_path="config.yaml", persist_dir=None,
             }
             for doc in retrieved_docs
         ]
-    
-    return {"vectorstore": db, "ask": ask}
+
+    # wrapped retriever
+    def ask(query: str):
+        # Ensure a stable ordering of retrieved documents
+        with track_stage("retrieve"):
+            return to_dicts(search(query))
+
+    def ask_many(queries: list[str]):
+        with track_stage("retrieve"):
+            return [to_dicts(docs) for docs in search_many(list(queries))]
+
+    return {"vectorstore": db, "ask": ask, "ask_many": ask_many}
+
+
+class StreamingVectorstoreBuilder:
+    """
+    Build the in-memory vectorstore while pages are still being extracted.
+
+    The loader calls add_page() for each page and close() at the end; a
+    background thread chunks and embeds pages in batches of
+    STREAM_BATCH_PAGES into the configured backend (numpy or chroma).
+    finish() waits for the last batch and returns the same retriever dict as
+    vectorstore_agent(); release() frees the store once the evaluation ends.
+    """
+
+    _DONE = object()
+
+    def __init__(self, config_path="config.yaml", chunk_size: int | None = None):
+        self.config_path = config_path
+        self.chunk_size = chunk_size
+        self.backend = get_vectorstore_backend(config_path)
+        self._batch = []
+        self._error = None
+        self._aborted = False
+        self._closed = False
+        self._index = empty_vectorstore(get_embedder(config_path), self.backend)
+        self._queue = queue.Queue(maxsize=MAX_PENDING_BATCHES)
+        # Run in the caller's context so embedding time counts toward its evaluation
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._consume,),
+                                        name="vectorstore-builder", daemon=True)
+        self._thread.start()
+
+    def _consume(self):
+        while True:
+            batch = self._queue.get()
+            if batch is self._DONE:
+                return
+            if self._error is not None or self._aborted:
+                continue  # drain so the producer never blocks
+            try:
+                self._index.add_documents(split_docs(batch, self.config_path, chunk_size=self.chunk_size))
+            except Exception as e:
+                self._error = e
+
+    def add_page(self, page):
+        self._batch.append(Document(page_content=page.page_content, metadata=page.metadata))
+        if len(self._batch) >= STREAM_BATCH_PAGES:
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def close(self):
+        """No more pages; flush the partial batch."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+        self._queue.put(self._DONE)
+
+    def abort(self):
+        """Stop embedding (e.g. extraction failed) and release the worker thread."""
+        self._aborted = True
+        self.close()
+
+    def finish(self) -> dict:
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return _retriever_api(self._index, self.backend, self.config_path)
+
+    def release(self):
+        """Stop the worker thread if still running and free the store."""
+        if not self._closed:
+            self.abort()
+        self._thread.join()
+        release_vectorstore(self._index)
@@ -0,0 +1,168 @@
+"""
+Exercise the LLM retry / hedging / circuit-breaker policy against a fake provider.
+
+    python -m src.benchmarks.bench_llm_resilience --calls 200 --scale 0.01
+
+No network access or API key is needed: FakeLLM draws latencies from a
+lognormal distribution (with an optional slow tail), fails a fraction of
+calls with 503s and can hang. `--scale` converts the fake's nominal seconds
+into real ones so the whole run takes a few seconds. Scenarios:
+
+  flaky    30% transient errors: success rate with and without retries
+  tail     5% of calls 20x slower: p50/p99 with and without hedging
+  outage   provider down, then back: calls sent vs rejected by the breaker
+  hang     every 4th request hangs: per-attempt timeouts keep calls bounded
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.llm_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class ProviderError(Exception):
+    """Stand-in for google.api_core exceptions, which carry the HTTP status as `code`"""
+
+    def __init__(self, code: int):
+        super().__init__(f"fake provider error {code}")
+        self.code = code
+
+
+class FakeLLM:
+    """Thread-safe fake provider; call(timeout) behaves like the SDK with a request timeout"""
+
+    def __init__(self, scale: float, median: float = 2.0, sigma: float = 0.3, error_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_factor: float = 20.0, hang_every: int = 0, seed: int = 0):
+        self.scale = scale
+        self.median = median
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.hang_every = hang_every
+        self.down = False
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, timeout: float) -> str:
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+            latency = self.median * self._rng.lognormvariate(0, self.sigma)
+            if self._rng.random() < self.slow_rate:
+                latency *= self.slow_factor
+            fails = self.down or self._rng.random() < self.error_rate
+        if self.hang_every and n % self.hang_every == 0:
+            latency = float("inf")
+        seconds = latency * self.scale
+        if seconds > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("fake request timed out")
+        time.sleep(seconds)
+        if fails:
+            raise ProviderError(503)
+        return '{"ok": true}'
+
+
+def make_caller(scale: float, **overrides) -> ResilientCaller:
+    # Nominal seconds: 30s attempt timeout, 120s deadline, 1s backoff base
+    settings = dict(timeout=30 * scale, deadline=120 * scale, max_attempts=4, backoff_base=1 * scale,
+                    backoff_max=10 * scale, hedge_percentile=0, hedge_min_samples=20,
+                    breaker=CircuitBreaker(failures=0))
+    settings.update(overrides)
+    return ResilientCaller(**settings)
+
+
+def run_calls(caller: ResilientCaller, llm: FakeLLM, calls: int, concurrency: int = 8):
+    """[(seconds, outcome)] for `calls` calls made from `concurrency` threads"""
+    def one(_):
+        started = time.perf_counter()
+        try:
+            caller.call(llm.call, "fake")
+            outcome = "ok"
+        except CircuitOpenError:
+            outcome = "rejected"
+        except Exception:
+            outcome = "failed"
+        return time.perf_counter() - started, outcome
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(calls)))
+
+
+def summarize(label: str, results, scale: float, requests: int):
+    latencies = sorted(s for s, outcome in results if outcome == "ok")
+    ok = len(latencies)
+
+    def seconds(value):
+        return f"{value / scale:6.2f}s" if ok else "     -"
+
+    outcomes = {o: sum(1 for _, x in results if x == o) for o in ("ok", "failed", "rejected")}
+    print(f"  {label:<32} ok {outcomes['ok']:>4}  failed {outcomes['failed']:>4}  rejected {outcomes['rejected']:>4}  "
+          f"requests {requests:>4}  p50 {seconds(latencies[ok // 2] if ok else 0)}  "
+          f"p99 {seconds(latencies[min(ok - 1, int(0.99 * ok))] if ok else 0)}  "
+          f"mean {seconds(statistics.mean(latencies) if ok else 0)}")
+
+
+def scenario_flaky(args):
+    print("flaky: 30% of requests fail with 503")
+    for label, attempts in (("no retries", 1), ("retries (4 attempts)", 4)):
+        llm = FakeLLM(args.scale, error_rate=0.3, seed=1)
+        results = run_calls(make_caller(args.scale, max_attempts=attempts), llm, args.calls)
+        summarize(label, results, args.scale, llm.requests)
+
+
+def scenario_tail(args):
+    print("tail: 5% of requests are 20x slower")
+    for label, percentile in (("no hedging", 0), ("hedge after p90", 90)):
+        llm = FakeLLM(args.scale, slow_rate=0.05, seed=2)
+        caller = make_caller(args.scale, hedge_percentile=percentile, timeout=60 * args.scale)
+        run_calls(caller, llm, 40)  # warm the latency window
+        llm.requests = 0
+        results = run_calls(caller, llm, args.calls)
+        summarize(label, results, args.scale, llm.requests)
+
+
+def scenario_outage(args):
+    print("outage: provider down for the first half, back for the second")
+    for label, failures in (("no breaker", 0), ("breaker (5 failures)", 5)):
+        llm = FakeLLM(args.scale, median=0.5, seed=3)
+        breaker = CircuitBreaker(failures=failures, reset_after=5 * args.scale)
+        caller = make_caller(args.scale, breaker=breaker, max_attempts=2)
+        llm.down = True
+        down = run_calls(caller, llm, args.calls // 2)
+        sent_while_down = llm.requests
+        llm.down = False
+        time.sleep(5 * args.scale)
+        up = run_calls(caller, llm, args.calls // 2)
+        summarize(label + ", down", down, args.scale, sent_while_down)
+        summarize(label + ", recovered", up, args.scale, llm.requests - sent_while_down)
+
+
+def scenario_hang(args):
+    print("hang: every 4th request never answers")
+    for label, timeout in (("timeout 30s", 30), ("timeout 5s", 5)):
+        llm = FakeLLM(args.scale, hang_every=4, seed=4)
+        results = run_calls(make_caller(args.scale, timeout=timeout * args.scale), llm, args.calls)
+        summarize(label, results, args.scale, llm.requests)
+
+
+SCENARIOS = {"flaky": scenario_flaky, "tail": scenario_tail, "outage": scenario_outage, "hang": scenario_hang}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=0.01, help="Real seconds per nominal second")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    args = parser.parse_args()
+    for name in args.scenarios:
+        SCENARIOS[name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare PDF text extraction engines on synthetic proposals.
+
+    python -m src.benchmarks.bench_pdf_extract --pages 10 100 500 --workers 1 2 4
+
+Engines: LangChain's PyMuPDFLoader (the previous load_pdf path) and
+src.pdf_extract with each worker count (1 = in-process). The process pool
+is warmed up before timing, as it is in a long-running server. Every engine
+must return the same page texts as the single-process run.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import pymupdf
+from langchain_community.document_loaders import PyMuPDFLoader
+
+from src import pdf_extract
+
+WORDS = (
+    "grant research budget objective method evaluation outcome impact community "
+    "data model analysis student climate health policy innovation timeline staff "
+    "partner survey pilot training equipment travel sustainability risk metric"
+).split()
+
+
+def make_pdf(path: str, n_pages: int, words_per_page: int = 450, seed: int = 0):
+    rng = random.Random(seed)
+    with pymupdf.open() as pdf:
+        for i in range(n_pages):
+            page = pdf.new_page()
+            text = f"Page {i + 1}\n" + " ".join(rng.choice(WORDS) for _ in range(words_per_page))
+            page.insert_textbox(pymupdf.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=9)
+        pdf.save(path)
+
+
+def extract_with(engine: str, path: str) -> list[str]:
+    if engine == "langchain":
+        return [doc.page_content for doc in PyMuPDFLoader(path).load()]
+    workers = int(engine.split("=")[1])
+    return list(pdf_extract.iter_pdf_texts(path, workers=workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Measure the parallel path at every size, including small files
+    pdf_extract.PARALLEL_MIN_PAGES = 0
+    engines = ["langchain"] + [f"workers={w}" for w in args.workers]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        warm_path = os.path.join(tmp, "warm.pdf")
+        make_pdf(warm_path, 8)
+        for workers in args.workers:
+            if workers > 1:
+                list(pdf_extract.iter_pdf_texts(warm_path, workers=workers))
+
+        print(f"{'engine':<11} {'pages':>6} {'median ms':>10} {'pages/s':>9} {'speedup':>8}")
+        for n_pages in args.pages:
+            path = os.path.join(tmp, f"synthetic_{n_pages}.pdf")
+            make_pdf(path, n_pages)
+            reference = extract_with("workers=1", path)
+
+            baseline = None
+            for engine in engines:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    texts = extract_with(engine, path)
+                    timings.append(time.perf_counter() - started)
+                if engine != "langchain" and texts != reference:
+                    raise AssertionError(f"{engine} returned different page text for {n_pages} pages")
+                median = statistics.median(timings)
+                baseline = baseline or median
+                print(f"{engine:<11} {n_pages:>6} {median * 1000:>10.1f} {n_pages / median:>9.0f} "
+                      f"{baseline / median:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Throughput of the full evaluation pipeline with an offline LLM backend.
+
+    python -m src.benchmarks.bench_pipeline_throughput --docs 8 --pages 12 --concurrency 1 2 4
+
+Generates proposal PDFs and evaluates them with run_full_evaluation through
+the evaluation worker pool at each concurrency. No network access or API key
+is needed: LLM_PROVIDER is set to "synthetic" (or "replay", see
+src/llm_providers.py) with --latency / --sigma seconds per call, and the LLM
+response cache is off so every run makes all of its calls. Embeddings use the
+local model with a chunk embedding cache private to the run; one warm-up
+evaluation runs before timing, worker processes are started (and warmed)
+before their level is timed, and each concurrency gets fresh documents so
+the cache does not favour later levels.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+SECTIONS = [
+    "Cover Letter", "Objectives", "Methodology", "Evaluation Plan", "Expected Outcomes",
+    "Budget", "Feasibility", "Innovation", "Sustainability", "Letters of Support"
+]
+WORDS = (
+    "grant research budget objective method evaluation outcome impact community "
+    "data model analysis student climate health policy innovation timeline staff "
+    "partner survey pilot training equipment travel sustainability risk metric"
+).split()
+
+
+def make_proposal(path: str, n_pages: int, words_per_page: int = 400, seed: int = 0):
+    """A PDF whose pages walk through the grant sections in order"""
+    rng = random.Random(seed)
+    with pymupdf.open() as pdf:
+        for i in range(n_pages):
+            section = SECTIONS[i * len(SECTIONS) // n_pages]
+            body = " ".join(rng.choice(WORDS) for _ in range(words_per_page))
+            if section == "Budget":
+                body += f" Total requested budget ${rng.randint(10, 90) * 1000:,}."
+            page = pdf.new_page()
+            page.insert_textbox(pymupdf.Rect(50, 50, page.rect.width - 50, page.rect.height - 50),
+                                f"{section}\n{body}", fontsize=9)
+        pdf.save(path)
+
+
+def worker_pid() -> int:
+    time.sleep(0.1)
+    return os.getpid()
+
+
+async def start_workers(pool, count: int):
+    """Submit until `count` distinct workers have answered, so their start-up is not timed"""
+    seen = set()
+    while len(seen) < count:
+        seen.update(await asyncio.gather(*(pool.submit(worker_pid) for _ in range(count))))
+
+
+async def evaluate_all(pool, run_full_evaluation, paths: list[str], max_budget: float) -> list[dict]:
+    return await asyncio.gather(*(pool.submit(run_full_evaluation, path, max_budget) for path in paths))
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=8, help="Documents per concurrency level")
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--provider", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--latency", type=float, default=1.0, help="Median seconds per LLM call")
+    parser.add_argument("--sigma", type=float, default=0.4, help="Lognormal spread of LLM call latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls failing with a 503")
+    parser.add_argument("--max-budget", type=float, default=50000)
+    args = parser.parse_args()
+
+    # Read at import time by the LLM modules, and inherited by worker processes
+    os.environ["LLM_PROVIDER"] = args.provider
+    os.environ["LLM_FAKE_LATENCY"] = str(args.latency)
+    os.environ["LLM_FAKE_LATENCY_SIGMA"] = str(args.sigma)
+    os.environ["LLM_FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LLM_CACHE"] = "0"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A private chunk embedding cache, so vectors from earlier runs are not reused
+        os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(tmp, "cache")
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
+        from evaluation_pipeline import run_full_evaluation
+        from worker_pool import EvaluationWorkerPool
+
+        warm_path = os.path.join(tmp, "warm.pdf")
+        make_proposal(warm_path, args.pages, seed=-1)
+        run_full_evaluation(warm_path, args.max_budget)
+
+        print(f"\n{args.provider} LLM, median {args.latency}s/call, {args.docs} docs x {args.pages} pages, "
+              f"{args.executor} workers")
+        print(f"{'workers':>7} {'wall s':>8} {'docs/min':>9} {'p50 s':>7} {'p95 s':>7} "
+              f"{'llm calls':>9} {'speedup':>8}  mean stage seconds")
+        baseline = None
+        for level, concurrency in enumerate(args.concurrency):
+            paths = []
+            for i in range(args.docs):
+                path = os.path.join(tmp, f"proposal_{level}_{i}.pdf")
+                make_proposal(path, args.pages, seed=level * args.docs + i)
+                paths.append(path)
+
+            pool = EvaluationWorkerPool(kind=args.executor, max_workers=concurrency, max_queue=args.docs)
+            pool.start()
+            try:
+                if args.executor == "process":
+                    asyncio.run(start_workers(pool, concurrency))
+                started = time.perf_counter()
+                results = asyncio.run(evaluate_all(pool, run_full_evaluation, paths, args.max_budget))
+                wall = time.perf_counter() - started
+            finally:
+                pool.shutdown()
+
+            timings = [r["timings"] for r in results]
+            totals = [t["total_seconds"] for t in timings]
+            calls = sum(u["calls"] for t in timings for u in t["llm"].values())
+            stages = {}
+            for t in timings:
+                for stage, seconds in t["stages"].items():
+                    stages.setdefault(stage, []).append(seconds)
+            stage_means = " ".join(f"{stage}={statistics.mean(s):.2f}" for stage, s in stages.items())
+            throughput = args.docs / wall * 60
+            baseline = baseline or throughput
+            print(f"{concurrency:>7} {wall:>8.1f} {throughput:>9.1f} {percentile(totals, 50):>7.2f} "
+                  f"{percentile(totals, 95):>7.2f} {calls:>9} {throughput / baseline:>7.2f}x  {stage_means}")
+
+
+if __name__ == "__main__":
+    main()
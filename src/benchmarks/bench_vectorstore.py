@@ -0,0 +1,118 @@
+"""
+Compare per-proposal vectorstore backends: build + query latency and peak memory.
+
+    python -m src.benchmarks.bench_vectorstore --pages 20 50 200 --repeat 3
+    python -m src.benchmarks.bench_vectorstore --real-embeddings
+
+By default embeddings are precomputed once and replayed, so the numbers
+isolate index build/search cost (which is what differs between backends).
+Peak memory is Python-heap allocations traced by tracemalloc; Chroma's native
+(Rust/SQLite) allocations are not included, so its figure is a lower bound.
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from langchain.schema import Document
+
+from src.agents.summarizer import SECTION_QUERIES
+from src.vectorstore import create_vectorstore
+
+WORDS = (
+    "grant research budget objective method evaluation outcome impact community "
+    "data model analysis student climate health policy innovation timeline staff "
+    "partner survey pilot training equipment travel sustainability risk metric"
+).split()
+
+QUERIES = SECTION_QUERIES
+
+
+class ReplayEmbeddings:
+    """Embeddings wrapper that serves precomputed vectors (falls back to the real model)."""
+
+    def __init__(self, inner, texts):
+        self.inner = inner
+        self.vectors = dict(zip(texts, inner.embed_documents(texts)))
+
+    def embed_documents(self, texts):
+        missing = [t for t in texts if t not in self.vectors]
+        if missing:
+            self.vectors.update(zip(missing, self.inner.embed_documents(missing)))
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def make_pages(n_pages: int, words_per_page: int = 400, seed: int = 0) -> list[Document]:
+    rng = random.Random(seed)
+    return [
+        Document(
+            page_content=" ".join(rng.choice(WORDS) for _ in range(words_per_page)),
+            metadata={"source": "synthetic.pdf", "page": i + 1}
+        )
+        for i in range(n_pages)
+    ]
+
+
+def run_once(backend: str, pages: list[Document], embeddings) -> tuple[float, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    db = create_vectorstore(pages, embeddings, backend=backend)
+    built = time.perf_counter()
+    for query in QUERIES:
+        db.similarity_search(query, k=10)
+    finished = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if backend == "chroma":
+        # Drop the collection so repeated runs don't accumulate state
+        db.delete_collection()
+    return built - started, finished - built, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--real-embeddings", action="store_true",
+                        help="Embed on every run instead of replaying precomputed vectors")
+    args = parser.parse_args()
+
+    from src.embeddings import get_embedding_service
+    service = get_embedding_service()
+
+    print(f"{'backend':<8} {'pages':>6} {'build ms':>10} {'query ms':>10} {'total ms':>10} {'peak MiB':>9}")
+    for n_pages in args.pages:
+        pages = make_pages(n_pages)
+        embeddings = service if args.real_embeddings else ReplayEmbeddings(
+            service, [p.page_content for p in pages] + QUERIES
+        )
+        for backend in args.backends:
+            runs = [run_once(backend, pages, embeddings) for _ in range(args.repeat)]
+            build = statistics.median(r[0] for r in runs) * 1000
+            query = statistics.median(r[1] for r in runs) * 1000
+            peak = max(r[2] for r in runs) / (1024 * 1024)
+            print(f"{backend:<8} {n_pages:>6} {build:>10.1f} {query:>10.1f} {build + query:>10.1f} {peak:>9.2f}")
+
+    # Sanity check: both backends should agree on the top hit for every query
+    if {"chroma", "numpy"} <= set(args.backends):
+        pages = make_pages(args.pages[0])
+        embeddings = ReplayEmbeddings(service, [p.page_content for p in pages] + QUERIES)
+        chroma = create_vectorstore(pages, embeddings, backend="chroma")
+        numpy_index = create_vectorstore(pages, embeddings, backend="numpy")
+        agree = np.mean([
+            chroma.similarity_search(q, k=1)[0].metadata["page"] == numpy_index.similarity_search(q, k=1)[0].metadata["page"]
+            for q in QUERIES
+        ])
+        chroma.delete_collection()
+        print(f"\nTop-1 agreement chroma vs numpy: {agree:.0%}")
+
+
+if __name__ == "__main__":
+    main()
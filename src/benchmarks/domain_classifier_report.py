@@ -0,0 +1,108 @@
+"""
+Offline accuracy / latency report for the local domain classifier.
+
+    python -m src.benchmarks.domain_classifier_report
+    python -m src.benchmarks.domain_classifier_report --labeled data/labeled_domains.jsonl
+    python -m src.benchmarks.domain_classifier_report --labeled data/proposals.jsonl --llm
+
+Without --labeled, runs leave-one-out over the seed examples: each example
+is classified by prototypes built from all the others. A labeled JSONL file
+({"text": ..., "domain": ...} per line) is classified against the full
+prototypes instead. Only a labelled set of real proposals shows whether the
+thresholds are safe for `domain_classifier: local: true`. Reports overall
+accuracy, how many proposals would be answered locally at the configured
+thresholds, accuracy on that confident subset, and per-prediction latency.
+
+With --llm every case is also sent to the LLM classifier the pipeline uses
+today, and the report adds how often the local answer agrees with it. Rows
+may then omit "domain", so real proposals can be checked before labelling.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from src.agents import local_domain_classifier as ldc
+from src.agents.domain_selection import classify_domain_llm
+from src.config.domain_examples import DOMAIN_EXAMPLES
+from src.embeddings import get_embedding_service
+
+
+def leave_one_out_cases():
+    for label, texts in DOMAIN_EXAMPLES.items():
+        for i, text in enumerate(texts):
+            held_out = {k: [t for j, t in enumerate(v) if not (k == label and j == i)] for k, v in DOMAIN_EXAMPLES.items()}
+            yield text, label, held_out
+
+
+def labeled_cases(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                yield row["text"], row.get("domain"), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labeled", help="JSONL file with text/domain rows")
+    parser.add_argument("--llm", action="store_true", help="also classify every case with the LLM and report agreement")
+    args = parser.parse_args()
+
+    service = get_embedding_service()
+    settings = ldc.get_classifier_settings()
+    labels, centroids = ldc.load_prototypes()
+    cases = labeled_cases(args.labeled) if args.labeled else leave_one_out_cases()
+
+    results = []
+    for text, expected, held_out in cases:
+        if held_out is not None:
+            prototypes = ldc.build_prototypes(held_out, service)
+        else:
+            prototypes = (labels, centroids)
+        started = time.perf_counter()
+        prediction = ldc.predict_domain(text, prototypes=prototypes)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        llm_domain = classify_domain_llm(text) if args.llm else None
+        results.append((expected, prediction, ldc.is_confident(prediction, settings), elapsed_ms, llm_domain))
+
+    labelled = [r for r in results if r[0] is not None]
+    confident = [r for r in results if r[2]]
+    latencies = sorted(r[3] for r in results)
+
+    def rate(rows, agrees):
+        return f"{sum(1 for r in rows if agrees(r)) / len(rows):.1%}"
+
+    def correct(r):
+        return r[1]["domain"] == r[0]
+
+    def agrees(r):
+        return r[1]["domain"] == r[4]
+
+    print(f"Cases:                   {len(results)}")
+    if labelled:
+        print(f"Accuracy (all):          {rate(labelled, correct)}")
+    print(f"Answered locally:        {len(confident) / len(results):.1%} "
+          f"(min_confidence={settings['min_confidence']}, min_margin={settings['min_margin']})")
+    if labelled and [r for r in confident if r[0] is not None]:
+        print(f"Accuracy (local subset): {rate([r for r in confident if r[0] is not None], correct)}")
+    if args.llm:
+        print(f"Agrees with LLM (all):   {rate(results, agrees)}")
+        if confident:
+            print(f"Agrees with LLM (local): {rate(confident, agrees)}")
+        if labelled:
+            print(f"LLM accuracy:            {rate(labelled, lambda r: r[4] == r[0])}")
+    print(f"Latency p50 / p95:       {statistics.median(latencies):.1f}ms / "
+          f"{latencies[int(0.95 * (len(latencies) - 1))]:.1f}ms")
+
+    print("\nMisclassified:" if not args.llm else "\nMisclassified or disagreeing with the LLM:")
+    for expected, prediction, is_local, _, llm_domain in results:
+        if (expected is not None and prediction["domain"] != expected) or (args.llm and prediction["domain"] != llm_domain):
+            flag = "local" if is_local else "-> LLM"
+            llm = f", LLM: {llm_domain}" if args.llm else ""
+            print(f"  {expected} -> {prediction['domain']} "
+                  f"(confidence {prediction['confidence']:.2f}, margin {prediction['margin']:.3f}, {flag}{llm})")
+
+
+if __name__ == "__main__":
+    main()
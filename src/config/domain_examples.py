@@ -0,0 +1,62 @@
+# Labeled seed examples for the local nearest-centroid domain classifier.
+# Each entry reads like a proposal abstract; add real labeled abstracts here
+# to sharpen the prototypes (they are rebuilt automatically when this changes).
+
+DOMAIN_EXAMPLES = {
+    "AI / Computer Science": [
+        "We propose a transformer-based deep learning architecture for low-resource language understanding, evaluated on standard NLP benchmarks.",
+        "This project develops scalable distributed algorithms for training graph neural networks on billion-edge datasets using GPU clusters.",
+        "We will build a reinforcement learning framework for autonomous robot navigation and evaluate it in simulation and on physical hardware.",
+        "The research designs privacy-preserving federated learning protocols with formal differential privacy guarantees for edge devices.",
+        "We investigate program synthesis and automated software verification using large language models and static analysis tools.",
+        "This proposal develops computer vision models for real-time object detection and benchmarks accuracy and latency against state-of-the-art baselines.",
+    ],
+    "Biotechnology / Life Sciences": [
+        "We will use CRISPR-Cas9 genome editing to characterize gene regulatory networks controlling stem cell differentiation in mouse models.",
+        "This project engineers microbial strains through synthetic biology to produce high-value biochemicals in fermentation bioreactors.",
+        "We propose single-cell RNA sequencing of tumor microenvironments to identify protein targets for novel antibody therapeutics.",
+        "The research characterizes protein folding and enzyme kinetics using cryo-electron microscopy and molecular dynamics simulation.",
+        "We will develop a biosensor platform based on engineered aptamers for detecting metabolites in cell cultures.",
+        "This study maps the plant microbiome and the molecular genetics of symbiotic nitrogen fixation in legume roots.",
+    ],
+    "Healthcare / Medicine": [
+        "We propose a randomized controlled clinical trial evaluating a new intervention to reduce hospital readmissions among heart failure patients.",
+        "This project deploys a telemedicine program to improve diabetes management and patient outcomes in rural primary care clinics.",
+        "We will study the effectiveness of a community health worker model for maternal and child health in underserved populations.",
+        "The research evaluates early screening protocols for cancer detection and their impact on patient survival and treatment costs.",
+        "We propose a mental health intervention delivered through hospitals and clinics, measuring depression and anxiety outcomes in patients.",
+        "This study improves infection control practices in intensive care units and tracks patient safety indicators and mortality.",
+    ],
+    "Education / Learning Sciences": [
+        "We will design and evaluate a K-12 mathematics curriculum using formative assessment to improve student achievement in public schools.",
+        "This project provides professional development for teachers on inclusive classroom practices and measures changes in student engagement.",
+        "We propose an after-school literacy program for early readers and evaluate reading gains with standardized assessments.",
+        "The research studies how undergraduate students learn computational thinking in introductory courses using active learning pedagogy.",
+        "We will expand access to STEM education for underrepresented high school students through mentoring and summer bridge programs.",
+        "This proposal develops an online learning platform for adult learners and evaluates course completion and learning outcomes.",
+    ],
+    "Environment / Climate / Sustainability": [
+        "We will quantify carbon sequestration in restored wetlands and model the effects of climate change on coastal ecosystems.",
+        "This project develops community solar microgrids and measures reductions in greenhouse gas emissions and energy costs.",
+        "We propose monitoring urban air quality with low-cost sensors to inform policies that reduce pollution exposure.",
+        "The research restores native biodiversity in degraded watersheds and evaluates water quality and habitat recovery.",
+        "We will design circular-economy recycling programs to reduce plastic waste and landfill use in municipalities.",
+        "This study builds climate adaptation plans for flood-prone communities using hydrological models and sea-level rise projections.",
+    ],
+    "Social Sciences / Policy": [
+        "We will analyze how housing policy and zoning reform affect residential segregation and economic mobility in metropolitan areas.",
+        "This project evaluates a criminal justice diversion program and its effects on recidivism, community safety and public costs.",
+        "We propose a survey study of civic participation and trust in local government among immigrant communities.",
+        "The research examines labor market outcomes of a workforce development policy for displaced workers.",
+        "We will study the impact of cash transfer programs on household poverty, employment and wellbeing.",
+        "This proposal supports a nonprofit coalition to strengthen community organizing, advocacy and stakeholder engagement in public policy.",
+    ],
+    "Agriculture / Food Systems": [
+        "We will test drought-tolerant crop varieties and precision irrigation to increase yields on smallholder farms.",
+        "This project strengthens local food supply chains by connecting farmers markets, food hubs and school cafeterias.",
+        "We propose regenerative agriculture practices such as cover cropping and reduced tillage to improve soil health and farm income.",
+        "The research develops integrated pest management strategies that reduce pesticide use in fruit and vegetable production.",
+        "We will improve livestock nutrition and animal health practices to raise productivity on dairy farms.",
+        "This study addresses food insecurity by expanding community gardens, food banks and nutrition education.",
+    ],
+}
@@ -46,5 +46,13 @@ DOMAIN_WEIGHTS = {
         "Feasibility": 0.20,
         "Budget": 0.10,
         "Sustainability": 0.10
+    },
+    "Agriculture / Food Systems": {
+        "Objectives": 0.15,
+        "Methodology": 0.20,
+        "Innovation": 0.15,
+        "Feasibility": 0.25,
+        "Budget": 0.10,
+        "Sustainability": 0.15
     }
 }
@@ -0,0 +1,149 @@
+"""
+Token-budgeted packing of the proposal-derived content inserted into prompts.
+
+Token counts are estimates, not Gemini's own counts: ~4 characters per
+token, Google's rule of thumb for Gemini models on English text. Exact
+counts would need a count_tokens API call per packing step. Budgets per
+agent live under `context_budget:` in config.yaml and are meant as real
+tokens; since the estimate undercounts numbers, tables and non-English text
+by 20-30%, content is packed to budget / (1 + safety_margin) estimated tokens.
+"""
+import json
+
+from src.embeddings import load_config
+from src.utils import estimate_tokens
+
+DEFAULT_BUDGETS = {
+    "summary": 12000,
+    "domain": 2000,
+    "scoring": 6000,
+    "critique": 8000,
+    "budget": 2000,
+    "decision": 8000,
+}
+
+# Headroom for the estimate's undercount (`context_budget: safety_margin:`)
+DEFAULT_SAFETY_MARGIN = 0.3
+
+# Per-string character limits tried, in order, before whole keys are dropped
+STRING_LIMITS = (600, 250, 100)
+
+
+def _budget_config(config_path="config.yaml") -> dict:
+    try:
+        return (load_config(config_path) or {}).get("context_budget") or {}
+    except FileNotFoundError:
+        return {}
+
+
+def get_token_budget(agent: str, config_path="config.yaml") -> int:
+    """Estimated-token budget for `agent`'s variable prompt content, with the safety margin applied."""
+    config = _budget_config(config_path)
+    budget = int(config.get(agent, DEFAULT_BUDGETS[agent]))
+    margin = float(config.get("safety_margin", DEFAULT_SAFETY_MARGIN))
+    return int(budget / (1 + margin))
+
+
+def count_tokens(text: str) -> int:
+    """Estimated Gemini tokens in `text` (see module docstring)."""
+    return estimate_tokens(text)
+
+
+def _drop_empty(value):
+    """Recursively remove None, empty strings, lists and dicts."""
+    if isinstance(value, dict):
+        cleaned = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        cleaned = [_drop_empty(v) for v in value]
+        return [v for v in cleaned if v not in (None, "", [], {})]
+    return value
+
+
+def compact_json(value) -> str:
+    """JSON without indentation or empty fields."""
+    return json.dumps(_drop_empty(value), separators=(",", ":"), ensure_ascii=False)
+
+
+def _truncate_strings(value, limit: int):
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit].rstrip() + "…"
+    if isinstance(value, dict):
+        return {k: _truncate_strings(v, limit) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_truncate_strings(v, limit) for v in value]
+    return value
+
+
+def pack_json(value, max_tokens: int, priority=()) -> str:
+    """
+    Serialize `value` compactly within `max_tokens`.
+
+    If compaction is not enough, long strings are shortened and then whole
+    top-level keys dropped, lowest priority first. `priority` lists top-level
+    keys from most to least important; unlisted keys rank below all of them.
+    The highest-priority key is never dropped, so the result may still exceed
+    the budget for pathological inputs.
+    """
+    data = _drop_empty(value)
+    text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    if not isinstance(data, dict):
+        for limit in STRING_LIMITS:
+            text = json.dumps(_truncate_strings(data, limit), separators=(",", ":"), ensure_ascii=False)
+            if count_tokens(text) <= max_tokens:
+                break
+        return text
+
+    ranked = [k for k in priority if k in data] + [k for k in data if k not in priority]
+    lowest_first = list(reversed(ranked))
+
+    for limit in STRING_LIMITS:
+        for key in lowest_first:
+            data[key] = _truncate_strings(data[key], limit)
+            text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            if count_tokens(text) <= max_tokens:
+                return text
+
+    for key in lowest_first[:-1]:
+        del data[key]
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        if count_tokens(text) <= max_tokens:
+            return text
+    return text
+
+
+def sample_text(text: str, max_tokens: int, excerpts: int = 4) -> str:
+    """
+    Fit long text into `max_tokens`: keep the opening (usually title, abstract
+    and objectives) and fill the rest with evenly spaced excerpts.
+    """
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    chars_per_token = len(text) / max(total, 1)
+    budget_chars = int(max_tokens * chars_per_token)
+    while True:
+        head_chars = budget_chars // 2
+        excerpt_chars = (budget_chars - head_chars) // excerpts
+        parts = [text[:head_chars]]
+        rest = text[head_chars:]
+        step = len(rest) // excerpts
+        for i in range(excerpts):
+            start = i * step + max(0, (step - excerpt_chars) // 2)
+            parts.append(rest[start:start + excerpt_chars])
+        sampled = "\n[...]\n".join(p.strip() for p in parts if p.strip())
+        if count_tokens(sampled) <= max_tokens or budget_chars < 200:
+            return sampled
+        budget_chars = int(budget_chars * 0.9)
+
+
+def log_prompt(agent: str, prompt: str, budget: int | None = None) -> int:
+    """Log and return the estimated token count of a fully formatted prompt."""
+    tokens = count_tokens(prompt)
+    budget_note = f" (content budget {budget})" if budget is not None else ""
+    print(f"[INFO] {agent} prompt: ~{tokens} tokens{budget_note}")
+    return tokens
@@ -0,0 +1,144 @@
+"""
+Persistent per-chunk embedding cache.
+
+Vectors are keyed by SHA-256 of (embedding model, chunk text), so a revised
+upload of a proposal only re-embeds chunks whose text actually changed.
+Stored in SQLite next to the LLM response cache; once it grows beyond
+EMBEDDING_CACHE_ENTRIES, least recently used rows are evicted down to
+PRUNE_TO of that, so the table is only counted again after many more
+inserts. Reads never write: access times
+of hits are kept in memory and written with the next insert, or once
+EMBEDDING_CACHE_TOUCH_BATCH of them are pending.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1").lower() not in ("0", "false", "off")
+CACHE_DIR = Path(os.getenv("EMBEDDING_CACHE_DIR", os.getenv("LLM_CACHE_DIR", "cache")))
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_ENTRIES", "200000"))
+# Pending access-time updates that force a write without an insert
+TOUCH_BATCH = int(os.getenv("EMBEDDING_CACHE_TOUCH_BATCH", "5000"))
+# Eviction shrinks the cache to this fraction of EMBEDDING_CACHE_ENTRIES
+PRUNE_TO = 0.9
+
+# SQLite limits bound parameters per statement
+_BATCH = 500
+
+
+def chunk_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path = CACHE_DIR / "chunk_embeddings.sqlite3", max_entries: int = MAX_ENTRIES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings(accessed_at)")
+        self._conn.commit()
+        # Rows as of the last count plus our inserts since; other processes
+        # sharing the file are picked up at the next recount
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Return {key: vector} for the keys present in the cache."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i:i + _BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+            self._touched.update(dict.fromkeys(found, now))
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def _flush_touched(self):
+        """Write pending access times (caller holds the lock and commits)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def set_many(self, items: dict):
+        now = time.time()
+        with self._lock:
+            # Before eviction, so recently read rows are not taken for stale ones
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                [(key, np.asarray(vec, dtype=np.float32).tobytes(), now) for key, vec in items.items()]
+            )
+            # Replaced keys count as inserts too, so this only overestimates
+            self._count += len(items)
+            if self._count > self.max_entries:
+                (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+                if self._count > self.max_entries:
+                    overflow = self._count - int(self.max_entries * PRUNE_TO)
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY accessed_at ASC LIMIT ?)", (overflow,)
+                    )
+                    self._count -= overflow
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Process-wide chunk embedding cache, or None when EMBEDDING_CACHE is off or unavailable."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = EmbeddingCache()
+                except Exception as e:
+                    print(f"[WARNING] Chunk embedding cache unavailable: {e}")
+                    return None
+    return _cache
+
+
+def embedding_cache_stats() -> dict:
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
@@ -1,18 +1,160 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+from pathlib import Path
+import numpy as np
+from src.embedding_cache import get_embedding_cache, chunk_key
+from src.metrics import track_stage
+import threading
+import time
 import yaml
 import os
 
-def get_embedder(config_path="config.yaml"):
-    if not os.path.exists(config_path):
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_config_cache = {}
+_services = {}
+_services_lock = threading.Lock()
+
+
+def resolve_config_path(config_path="config.yaml") -> Path:
+    """Find config.yaml relative to the CWD first, then the project root."""
+    path = Path(config_path)
+    if not path.exists() and not path.is_absolute():
+        path = PROJECT_ROOT / config_path
+    if not path.exists():
         raise FileNotFoundError(f"{config_path} not found.")
+    return path
+
+
+def load_config(config_path="config.yaml") -> dict:
+    """Parse config.yaml once, re-reading only when the file changes."""
+    path = resolve_config_path(config_path)
+    mtime = path.stat().st_mtime
+    cached = _config_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = (mtime, yaml.safe_load(f))
+        _config_cache[path] = cached
+    return cached[1]
 
-    with open(config_path) as f:
-        cfg = yaml.safe_load(f)
 
+def get_embedding_model_name(config_path="config.yaml") -> str:
+    cfg = load_config(config_path)
     if cfg is None or "model" not in cfg or "embeddings" not in cfg["model"]:
         raise ValueError(f"{config_path} must contain a 'model: embeddings:' section.")
+    return cfg["model"]["embeddings"]
+
+
+class EmbeddingService(Embeddings):
+    """
+    One SentenceTransformer per process, usable both as a LangChain
+    `Embeddings` (vectorstores) and as a raw NumPy encoder (plagiarism checks).
+    Tracks model load time and per-batch encode time.
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 32):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+
+        started = time.perf_counter()
+        self.model = SentenceTransformer(model_name, device=device)
+        self.load_seconds = time.perf_counter() - started
+        print(f"[INFO] Loaded embedding model {model_name} in {self.load_seconds:.2f}s")
+
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+        self._encode_seconds = 0.0
+        self._last_batch_seconds = None
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts into a float32 matrix (one row per text)."""
+        started = time.perf_counter()
+        with track_stage("embed"):
+            vectors = self.model.encode(
+                list(texts),
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._batches += 1
+            self._texts += len(texts)
+            self._encode_seconds += elapsed
+            self._last_batch_seconds = elapsed
+        return vectors.astype(np.float32, copy=False)
+
+    # LangChain Embeddings interface (newlines flattened like HuggingFaceEmbeddings)
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, reusing cached vectors for chunks seen before (see src/embedding_cache.py)."""
+        texts = [t.replace("\n", " ") for t in texts]
+        cache = get_embedding_cache()
+        if cache is None or not texts:
+            return self.encode(texts).tolist()
+
+        keys = [chunk_key(self.model_name, t) for t in texts]
+        try:
+            vectors = cache.get_many(keys)
+        except Exception as e:
+            # A broken or locked cache only costs the re-embedding
+            print(f"[WARNING] Chunk embedding cache read failed, re-embedding: {e}")
+            vectors = {}
+        missing = {k: t for k, t in zip(keys, texts) if k not in vectors}
+        if missing:
+            encoded = dict(zip(missing, self.encode(list(missing.values()))))
+            try:
+                cache.set_many(encoded)
+            except Exception as e:
+                print(f"[WARNING] Chunk embedding cache write failed: {e}")
+            vectors.update(encoded)
+        return [vectors[k].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        # Queries are one-off; keep them out of the chunk cache
+        return self.encode([text.replace("\n", " ")])[0].tolist()
+
+    def warm_up(self):
+        """Run one tiny batch so the first real request doesn't pay for lazy init."""
+        self.encode(["warm-up"])
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "load_seconds": round(self.load_seconds, 3),
+                "batches": self._batches,
+                "texts": self._texts,
+                "encode_seconds_total": round(self._encode_seconds, 3),
+                "avg_batch_seconds": round(self._encode_seconds / self._batches, 4) if self._batches else None,
+                "last_batch_seconds": round(self._last_batch_seconds, 4) if self._last_batch_seconds is not None else None,
+            }
+
+
+def get_embedding_service(config_path="config.yaml") -> EmbeddingService:
+    """Return the process-wide service for the model named in config.yaml."""
+    model_name = get_embedding_model_name(config_path)
+    service = _services.get(model_name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(model_name)
+            if service is None:
+                cfg = load_config(config_path).get("embedding") or {}
+                params = cfg.get("params") or {}
+                service = EmbeddingService(
+                    model_name,
+                    device=cfg.get("device", "cpu"),
+                    batch_size=params.get("batch_size", 32)
+                )
+                _services[model_name] = service
+    return service
+
+
+def get_embedder(config_path="config.yaml"):
+    """LangChain-compatible embedder; shares the process-wide model."""
+    return get_embedding_service(config_path)
+
 
-    embedder =HuggingFaceEmbeddings(
-        model_name=cfg["model"]["embeddings"]
-    )
-    return embedder
\ No newline at end of file
+def embedding_metrics() -> list[dict]:
+    return [service.metrics() for service in list(_services.values())]
@@ -0,0 +1,219 @@
+# src/llm_cache.py
+"""
+Content-addressed cache for LLM responses.
+
+Keys are SHA-256 hashes of (model, prompt, generation params). Lookups go
+through an ordered list of backends (in-memory LRU first, then SQLite on
+disk); a hit in a slower tier is copied into the faster ones.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "off")
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "cache"))
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+MEMORY_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
+
+
+def make_cache_key(model_name: str, prompt: str, params: dict) -> str:
+    payload = json.dumps({"model": model_name, "prompt": prompt, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUBackend:
+    """Thread-safe in-process LRU with per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl and time.time() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    Persistent tier shared by every process on the host.
+    Entries expire after `ttl` seconds; beyond `max_entries` the least
+    recently used rows are evicted.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path = CACHE_DIR / "llm_responses.sqlite3",
+                 max_entries: int = DISK_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._writes += 1
+            # Evict periodically rather than on every write
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        if self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)", (overflow,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class LLMResponseCache:
+    """Tiered cache with hit/miss counters. Backends need get/set/clear."""
+
+    def __init__(self, backends: list):
+        self.backends = backends
+        self.hits = {b.name: 0 for b in backends}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        for i, backend in enumerate(self.backends):
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                print(f"[WARNING] LLM cache backend '{backend.name}' read failed: {e}")
+                continue
+            if value is not None:
+                # Promote into faster tiers
+                for faster in self.backends[:i]:
+                    faster.set(key, value)
+                with self._lock:
+                    self.hits[backend.name] += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str):
+        for backend in self.backends:
+            try:
+                backend.set(key, value)
+            except Exception as e:
+                print(f"[WARNING] LLM cache backend '{backend.name}' write failed: {e}")
+
+    def clear(self):
+        for backend in self.backends:
+            backend.clear()
+
+    def stats(self) -> dict:
+        total_hits = sum(self.hits.values())
+        lookups = total_hits + self.misses
+        return {
+            "enabled": True,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round(total_hits / lookups, 3) if lookups else None,
+            "entries": {b.name: len(b) for b in self.backends},
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide cache (memory + SQLite), or None when LLM_CACHE is off"""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backends = [MemoryLRUBackend()]
+                try:
+                    backends.append(SQLiteBackend())
+                except Exception as e:
+                    print(f"[WARNING] Disk LLM cache unavailable, using memory only: {e}")
+                _cache = LLMResponseCache(backends)
+    return _cache
+
+
+def cache_stats() -> dict:
+    cache = get_llm_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
@@ -0,0 +1,189 @@
+"""
+Buffered JSONL logging of LLM calls
+
+Callers only put a record on a bounded in-memory queue; a QueueListener
+thread writes it to `LLM_LOG_DIR/llm_calls.jsonl`, rotated by size (or by
+time with LLM_LOG_ROTATE_WHEN, e.g. "midnight"). When the queue is full the
+record is dropped and counted rather than blocking the call.
+
+With LLM_LOG_CAPTURE=1 the full prompt and response of every call are also
+written to gzip segments under `LLM_LOG_DIR/capture/`, starting a new
+segment after LLM_CAPTURE_SEGMENT_BYTES of uncompressed JSON and keeping
+the newest LLM_CAPTURE_MAX_SEGMENTS. A segment is a complete gzip file once
+it has been rolled over or the process exits.
+"""
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+LOG_DIR = Path(os.getenv("LLM_LOG_DIR", "logs"))
+LOG_MAX_BYTES = int(os.getenv("LLM_LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LLM_LOG_BACKUPS", "10"))
+# "" rotates by size; otherwise a TimedRotatingFileHandler `when` (S, M, H, D, midnight, W0-W6)
+LOG_ROTATE_WHEN = os.getenv("LLM_LOG_ROTATE_WHEN", "")
+LOG_QUEUE_SIZE = int(os.getenv("LLM_LOG_QUEUE_SIZE", "10000"))
+CAPTURE = os.getenv("LLM_LOG_CAPTURE", "0").lower() in ("1", "true", "on")
+CAPTURE_SEGMENT_BYTES = int(os.getenv("LLM_CAPTURE_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+# Oldest capture segments beyond this are deleted (0 keeps all)
+CAPTURE_MAX_SEGMENTS = int(os.getenv("LLM_CAPTURE_MAX_SEGMENTS", "100"))
+
+
+def _file_suffix() -> str:
+    # Worker processes get their own files: rotation is not safe across processes
+    if multiprocessing.current_process().name == "MainProcess":
+        return ""
+    return f".{os.getpid()}"
+
+
+class _JsonlFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.llm, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records beyond the queue size are dropped"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Entries are plain dicts; skip the default message formatting on the caller's thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: a full queue must still be drained on shutdown
+        self.queue.put(self._sentinel)
+
+
+class CaptureSegmentHandler(logging.Handler):
+    """Full prompts and responses as JSON lines in rolling gzip segments"""
+
+    def __init__(self, directory: Path, segment_bytes: int = CAPTURE_SEGMENT_BYTES,
+                 max_segments: int = CAPTURE_MAX_SEGMENTS):
+        super().__init__()
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self._file = None
+        self._written = 0
+        self._segments = 0
+
+    def _roll(self):
+        if self._file is not None:
+            self._file.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self._segments += 1
+        path = self.directory / f"llm_capture_{stamp}_{os.getpid()}_{self._segments:04d}.jsonl.gz"
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._written = 0
+        if self.max_segments > 0:
+            segments = sorted(self.directory.glob("llm_capture_*.jsonl.gz"), key=lambda p: p.stat().st_mtime)
+            for old in segments[:max(0, len(segments) - self.max_segments)]:
+                if old != path:
+                    old.unlink(missing_ok=True)
+
+    def emit(self, record):
+        capture = getattr(record, "llm_capture", None)
+        if capture is None:
+            return
+        try:
+            line = json.dumps({**record.llm, **capture}, ensure_ascii=False, default=str) + "\n"
+            if self._file is None or self._written >= self.segment_bytes:
+                self._roll()
+            self._file.write(line)
+            self._written += len(line)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class LLMCallLog:
+    """Process-wide LLM call log; the writer thread starts on first use"""
+
+    def __init__(self, log_dir: Path = LOG_DIR, capture: bool = CAPTURE):
+        self.log_dir = Path(log_dir)
+        self.capture = capture
+        self._lock = threading.Lock()
+        self._handler = None
+        self._listener = None
+
+    def _start(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        path = self.log_dir / f"llm_calls{_file_suffix()}.jsonl"
+        if LOG_ROTATE_WHEN:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUPS, encoding="utf-8", utc=True
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+            )
+        file_handler.setFormatter(_JsonlFormatter())
+        handlers = [file_handler]
+        if self.capture:
+            handlers.append(CaptureSegmentHandler(self.log_dir / "capture"))
+
+        self._handler = _DroppingQueueHandler(queue.Queue(maxsize=max(1, LOG_QUEUE_SIZE)))
+        self._listener = _Listener(self._handler.queue, *handlers)
+        self._listener.start()
+        atexit.register(self.stop)
+
+    def log(self, entry: dict, prompt: str | None = None, response: str | None = None):
+        """Queue one call record; prompt/response are kept only when capture is on"""
+        handler = self._handler
+        if handler is None:
+            with self._lock:
+                if self._handler is None:
+                    self._start()
+                handler = self._handler
+        record = logging.LogRecord("llm_calls", logging.INFO, __file__, 0, "", None, None)
+        record.llm = entry
+        if self.capture:
+            record.llm_capture = {"prompt": prompt, "response": response}
+        handler.enqueue(record)
+
+    def stop(self):
+        """Drain the queue and close the files (registered with atexit)"""
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+            self._handler = None
+
+    def stats(self) -> dict:
+        handler = self._handler
+        return {
+            "queued": handler.queue.qsize() if handler else 0,
+            "dropped": handler.dropped if handler else 0,
+            "capture": self.capture,
+        }
+
+
+# Process-wide log used by src/llm_wrapper.py
+llm_call_log = LLMCallLog()
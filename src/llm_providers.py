@@ -0,0 +1,434 @@
+"""
+LLM backends behind gemini_llm / agemini_llm
+
+LLM_PROVIDER selects where prompts go:
+
+  gemini     Google Gemini; GOOGLE_API_KEY is checked on the first call
+  replay     responses recorded earlier, looked up by the SHA-256 of the prompt
+  synthetic  made-up but schema-valid output for each agent
+
+Replay reads LLM_REPLAY_PATH, a JSONL file or a directory of .jsonl /
+.jsonl.gz files such as the LLM_LOG_CAPTURE segments (src/llm_log.py). Each
+line needs "response" and either "prompt" or "prompt_hash". With
+LLM_REPLAY_RECORD=1 a miss is sent to Gemini and the answer appended to the
+file; otherwise a miss raises ReplayMissError, or is answered by the
+synthetic backend with LLM_REPLAY_MISS=synthetic.
+
+Both offline backends wait a lognormal delay (median LLM_FAKE_LATENCY
+seconds, spread LLM_FAKE_LATENCY_SIGMA) and fail LLM_FAKE_ERROR_RATE of calls
+with a retryable 503, so rate limits, retries and the circuit breaker behave
+as they would against the API. Like Gemini, they cut answers off at
+max_output_tokens (estimated at ~4 characters per token), and synthetic
+answers are about as long as real ones, so a too-small limit shows up offline. Synthetic responses depend only on the prompt
+and LLM_FAKE_SEED; delays also on how often the prompt was asked.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+from src.config.domain_weights import DOMAIN_WEIGHTS
+from src.metrics import current_stage
+from src.utils import estimate_tokens
+
+load_dotenv()
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
+REPLAY_PATH = Path(os.getenv("LLM_REPLAY_PATH", os.path.join("fixtures", "llm_replay.jsonl")))
+REPLAY_RECORD = os.getenv("LLM_REPLAY_RECORD", "0").lower() in ("1", "true", "on")
+# "error" or "synthetic"
+REPLAY_MISS = os.getenv("LLM_REPLAY_MISS", "error").lower()
+FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "1.0"))
+FAKE_LATENCY_SIGMA = float(os.getenv("LLM_FAKE_LATENCY_SIGMA", "0.4"))
+FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+FAKE_SEED = int(os.getenv("LLM_FAKE_SEED", "0"))
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class ProviderError(Exception):
+    """Simulated API error; `code` is the HTTP status, as on google.api_core exceptions"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class ReplayMissError(LookupError):
+    """No recorded response for a prompt"""
+
+
+class LLMResponse:
+    """The parts of a Gemini response llm_wrapper reads: `.text` and `.usage_metadata`"""
+
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt),
+            candidates_token_count=estimate_tokens(text)
+        )
+
+
+class LLMProvider:
+    """
+    Backend interface: generate() returns a response with `.text` and
+    should honour `timeout` (seconds) for one attempt. Retries, caching,
+    rate limits and logging stay in llm_wrapper.
+    """
+
+    name = "base"
+
+    def generate(self, model_name: str, prompt: str, params: dict, timeout: float):
+        raise NotImplementedError
+
+    async def agenerate(self, model_name: str, prompt: str, params: dict, timeout: float):
+        return await asyncio.to_thread(self.generate, model_name, prompt, params, timeout)
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini through google.generativeai, with one GenerativeModel per
+    model name. The SDK keeps one default sync and one async client per
+    process, so reusing the model also reuses their gRPC connections.
+    """
+
+    name = "gemini"
+
+    def __init__(self):
+        self._genai = None
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, model_name: str):
+        model = self._models.get(model_name)
+        if model is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+
+                    api_key = os.getenv("GOOGLE_API_KEY")
+                    if not api_key:
+                        raise ValueError("GOOGLE_API_KEY not found in .env file")
+                    genai.configure(api_key=api_key)
+                    self._genai = genai
+                model = self._models.get(model_name)
+                if model is None:
+                    model = self._genai.GenerativeModel(model_name)
+                    self._models[model_name] = model
+        return model
+
+    # generation_config and request_options need google-generativeai >= 0.8
+    # (pinned in requirements.txt); without them temperature, output limits
+    # and the per-attempt timeout would be silently ignored
+    def generate(self, model_name, prompt, params, timeout):
+        model = self.get_model(model_name)
+        return model.generate_content(prompt, generation_config=params, request_options={"timeout": timeout})
+
+    async def agenerate(self, model_name, prompt, params, timeout):
+        # The SDK's async client binds to the first event loop that uses it
+        model = self.get_model(model_name)
+        return await model.generate_content_async(
+            prompt, generation_config=params, request_options={"timeout": timeout}
+        )
+
+
+class _OfflineProvider(LLMProvider):
+    """Shared delay and error injection for the providers that never touch the network"""
+
+    def __init__(self, latency: float = FAKE_LATENCY, sigma: float = FAKE_LATENCY_SIGMA,
+                 error_rate: float = FAKE_ERROR_RATE, seed: int = FAKE_SEED):
+        self.latency = latency
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.seed = seed
+        self._asked = {}
+        self._lock = threading.Lock()
+
+    def _draw(self, digest: str) -> tuple[float, bool]:
+        """(delay, fails) for this prompt's next call"""
+        with self._lock:
+            n = self._asked.get(digest, 0)
+            self._asked[digest] = n + 1
+        rng = random.Random(f"{self.seed}:{digest}:{n}")
+        delay = self.latency * rng.lognormvariate(0, self.sigma) if self.latency > 0 else 0.0
+        return delay, rng.random() < self.error_rate
+
+    def respond(self, model_name: str, prompt: str, digest: str) -> str:
+        raise NotImplementedError
+
+    def _answer(self, model_name: str, prompt: str, digest: str, params: dict) -> LLMResponse:
+        text = self.respond(model_name, prompt, digest)
+        # Gemini stops at max_output_tokens mid-answer; so do the fakes
+        return LLMResponse(text[:params.get("max_output_tokens", len(text)) * 4], prompt)
+
+    def generate(self, model_name, prompt, params, timeout):
+        digest = prompt_hash(prompt)
+        delay, fails = self._draw(digest)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"{self.name} provider timed out after {timeout:.1f}s")
+        time.sleep(delay)
+        if fails:
+            raise ProviderError(503, f"{self.name} provider: simulated 503")
+        return self._answer(model_name, prompt, digest, params)
+
+    async def agenerate(self, model_name, prompt, params, timeout):
+        digest = prompt_hash(prompt)
+        delay, fails = self._draw(digest)
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"{self.name} provider timed out after {timeout:.1f}s")
+        await asyncio.sleep(delay)
+        if fails:
+            raise ProviderError(503, f"{self.name} provider: simulated 503")
+        return self._answer(model_name, prompt, digest, params)
+
+
+# Same order as summarizer.GRANT_SECTIONS
+_SECTIONS = [
+    "CoverLetter", "Objectives", "Methodology", "EvaluationPlan", "ExpectedOutcomes",
+    "Budget", "Feasibility", "Innovation", "Sustainability", "LettersOfSupport"
+]
+_CRITIQUES = [
+    "scientific_critique", "practical_critique", "language_critique", "context_critique",
+    "persuasiveness_critique", "ethical_critique", "innovation_critique"
+]
+_BUDGET_CATEGORIES = ["Personnel", "Equipment", "Travel", "Materials", "Indirect costs"]
+_WORDS = (
+    "the proposal describes clear measurable objectives with a realistic timeline and "
+    "defined responsibilities for project staff partners and community stakeholders while "
+    "evaluation relies on surveys pilot data and outcome metrics although sustainability "
+    "funding and risk mitigation need further detail"
+).split()
+
+# Phrases from each agent's prompt (src/prompts.py) that identify the caller
+_AGENT_MARKERS = [
+    ("domain", "domain classifier"),
+    ("decision", "final funding decision"),
+    ("critique", "master-level grant reviewer"),
+    ("budget", "grant budget reviewer"),
+    ("scoring", "expert grant evaluator"),
+    ("summary", "summarize the following grant proposal"),
+]
+
+
+def _agent_for(prompt: str) -> str:
+    head = prompt[:1000].lower()
+    for agent, marker in _AGENT_MARKERS:
+        if marker in head:
+            return agent
+    return current_stage.get()
+
+
+class SyntheticProvider(_OfflineProvider):
+    """Plausible, valid output shaped like each agent's prompt asks for"""
+
+    name = "synthetic"
+
+    def respond(self, model_name, prompt, digest):
+        rng = random.Random(f"{self.seed}:{digest}")
+        agent = _agent_for(prompt)
+        if agent == "domain":
+            return rng.choice(sorted(DOMAIN_WEIGHTS))
+        build = getattr(self, f"_{agent}", self._other)
+        return json.dumps(build(rng, prompt))
+
+    @staticmethod
+    def _sentence(rng, words: int = 14) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+    def _points(self, rng, low: int = 1, high: int = 3) -> list:
+        return [self._sentence(rng, 22) for _ in range(rng.randint(low, high))]
+
+    def _summary(self, rng, prompt):
+        pages = sorted({int(p) for p in re.findall(r"\[Page (\d+)", prompt)}) or [1]
+        return {
+            section: {
+                "text": self._sentence(rng, 120),
+                "pages": sorted(rng.sample(pages, min(len(pages), rng.randint(1, 3)))),
+                "references": [self._sentence(rng, 20) for _ in range(rng.randint(1, 3))],
+                "notes": self._sentence(rng, 25)
+            }
+            for section in _SECTIONS
+        }
+
+    def _scoring(self, rng, prompt):
+        scores = {
+            section: {
+                "score": rng.randint(4, 10),
+                "summary": self._sentence(rng, 30),
+                "strengths": self._points(rng),
+                "weaknesses": self._points(rng)
+            }
+            for section in _SECTIONS
+        }
+        return {"scores": scores, "overall_summary": self._sentence(rng, 40)}
+
+    def _critique(self, rng, prompt):
+        critique = {
+            key: {"issues": self._points(rng, 2, 5), "recommendations": self._points(rng, 2, 5)}
+            for key in _CRITIQUES
+        }
+        critique["priority_focus"] = [self._sentence(rng, 5) for _ in range(3)]
+        critique["overall_feedback"] = self._sentence(rng, 50)
+        return critique
+
+    def _budget(self, rng, prompt):
+        match = re.search(r"Maximum allowed budget: ([0-9.]+)", prompt)
+        limit = float(match.group(1)) if match else 50000.0
+        total = round(limit * rng.uniform(0.6, 1.2), 2)
+        shares = [rng.random() + 0.2 for _ in _BUDGET_CATEGORIES]
+        breakdown = [
+            {
+                "category": category,
+                "amount": round(total * share / sum(shares), 2),
+                "percentage": round(100 * share / sum(shares), 1)
+            }
+            for category, share in zip(_BUDGET_CATEGORIES, shares)
+        ]
+        flags = [{"type": "warning", "message": self._sentence(rng, 10)}]
+        if total > limit:
+            flags.insert(0, {"type": "error", "message": f"Total budget {total:,.2f} exceeds the maximum of {limit:,.2f}."})
+        return {
+            "totalBudget": total,
+            "breakdown": breakdown,
+            "flags": flags,
+            "summary": self._sentence(rng, 30),
+            "budget_score": rng.randint(4, 10),
+            "recommendations": self._points(rng)
+        }
+
+    def _decision(self, rng, prompt):
+        match = re.search(r"already calculated by the evaluation engine: (-?[0-9.]+)", prompt)
+        score = float(match.group(1)) if match else round(rng.uniform(4, 10), 2)
+        if score >= 8.0:
+            decision = "ACCEPT"
+        elif score >= 6.0:
+            decision = "CONDITIONALLY ACCEPT"
+        else:
+            decision = "REJECT"
+        return {
+            "final_score": score,
+            "decision": decision,
+            "rationale": self._sentence(rng, 40),
+            "key_strengths": self._points(rng, 2, 3),
+            "key_weaknesses": self._points(rng, 2, 3),
+            "next_steps": self._sentence(rng)
+        }
+
+    def _other(self, rng, prompt):
+        return {"response": self._sentence(rng, 30)}
+
+
+class ReplayProvider(_OfflineProvider):
+    """Recorded responses keyed by prompt hash; optionally records misses from Gemini"""
+
+    name = "replay"
+
+    def __init__(self, path: Path = REPLAY_PATH, record: bool = REPLAY_RECORD, miss: str = REPLAY_MISS, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.record = record
+        self.miss = miss
+        self._responses = None
+        self._load_lock = threading.Lock()
+        self._fallback = SyntheticProvider(**kwargs) if miss == "synthetic" else None
+        self._source = GeminiProvider() if record else None
+
+    def _files(self) -> list[Path]:
+        if self.path.is_dir():
+            return sorted(p for p in self.path.iterdir() if p.name.endswith((".jsonl", ".jsonl.gz")))
+        return [self.path] if self.path.exists() else []
+
+    def _load(self) -> dict:
+        if self._responses is None:
+            with self._load_lock:
+                if self._responses is None:
+                    responses = {}
+                    for path in self._files():
+                        opener = gzip.open if path.suffix == ".gz" else open
+                        try:
+                            with opener(path, "rt", encoding="utf-8") as f:
+                                for line in f:
+                                    try:
+                                        entry = json.loads(line)
+                                    except json.JSONDecodeError:
+                                        continue  # e.g. the unfinished tail of a live capture segment
+                                    digest = entry.get("prompt_hash") or (
+                                        prompt_hash(entry["prompt"]) if entry.get("prompt") else None
+                                    )
+                                    if digest and entry.get("response") is not None:
+                                        responses[digest] = entry["response"]
+                        except (OSError, EOFError) as e:
+                            print(f"[WARNING] Could not read LLM replay file {path}: {e}")
+                    print(f"[INFO] Loaded {len(responses)} recorded LLM responses from {self.path}")
+                    self._responses = responses
+        return self._responses
+
+    def _save(self, model_name: str, prompt: str, digest: str, text: str):
+        path = self.path / "recorded.jsonl" if self.path.is_dir() else self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({"prompt_hash": digest, "model": model_name, "prompt": prompt, "response": text},
+                          ensure_ascii=False)
+        with self._load_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def respond(self, model_name, prompt, digest):
+        text = self._load().get(digest)
+        if text is not None:
+            return text
+        if self._fallback is not None:
+            return self._fallback.respond(model_name, prompt, digest)
+        raise ReplayMissError(f"No recorded LLM response for prompt {digest[:12]} in {self.path}")
+
+    def generate(self, model_name, prompt, params, timeout):
+        digest = prompt_hash(prompt)
+        if self._source is not None and digest not in self._load():
+            text = getattr(self._source.generate(model_name, prompt, params, timeout), "text", None)
+            if text:
+                self._save(model_name, prompt, digest, text)
+                self._responses[digest] = text
+            return LLMResponse(text or "", prompt)
+        return super().generate(model_name, prompt, params, timeout)
+
+    async def agenerate(self, model_name, prompt, params, timeout):
+        digest = prompt_hash(prompt)
+        if self._source is not None and digest not in self._load():
+            return await asyncio.to_thread(self.generate, model_name, prompt, params, timeout)
+        return await super().agenerate(model_name, prompt, params, timeout)
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "replay": ReplayProvider,
+    "synthetic": SyntheticProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> LLMProvider:
+    """Process-wide provider chosen by LLM_PROVIDER"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if LLM_PROVIDER not in PROVIDERS:
+                    raise ValueError(f"Unknown LLM_PROVIDER '{LLM_PROVIDER}'. Use one of: {', '.join(PROVIDERS)}")
+                _provider = PROVIDERS[LLM_PROVIDER]()
+                if LLM_PROVIDER != "gemini":
+                    print(f"[INFO] LLM provider: {LLM_PROVIDER} (offline)")
+    return _provider
@@ -0,0 +1,338 @@
+"""
+Deadlines, retries, hedged requests and a circuit breaker for LLM calls
+
+ResilientCaller.call(attempt) runs `attempt(timeout)`, which must give up
+after `timeout` seconds (the Gemini SDK's request timeout does), until it
+succeeds, raises a non-retryable error, or LLM_MAX_ATTEMPTS attempts or
+LLM_DEADLINE seconds are used up. Retries wait with full-jitter exponential
+backoff (tenacity). With LLM_HEDGE_PERCENTILE set, an attempt still running
+after that percentile of recent call latencies gets a second, concurrent
+request and the first answer wins. An optional `quota` (local rate limits)
+is waited for before each request, outside the attempt's timeout and the
+breaker, and a hedge is only sent when quota is free at once. After
+LLM_BREAKER_FAILURES consecutive provider errors the breaker opens: calls fail at once with CircuitOpenError
+for LLM_BREAKER_RESET seconds, then a single trial call decides whether it
+closes again.
+"""
+import asyncio
+import collections
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, stop_before_delay, \
+    wait_random_exponential
+
+from src.metrics import LLM_BREAKER_STATE, record_llm_hedge, record_llm_retry
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "180"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+# 0 disables hedging; 95 sends a second request once an attempt is slower than p95
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Consecutive provider errors that open the breaker (0 disables it)
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+# HTTP statuses worth retrying; google.api_core exceptions carry theirs as `code`
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+LATENCY_WINDOW = 200
+HEDGE_THREADS = 16
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class AttemptTimeout(TimeoutError):
+    """An attempt (or the whole call) ran past its deadline"""
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider is failing; calls are rejected without being sent"""
+
+    def __init__(self, retry_after: float):
+        # Single arg so the error survives pickling back from worker processes
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return f"LLM provider circuit is open, retry in {math.ceil(self.retry_after)}s"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient provider failures: rate limits, 5xx, timeouts and dropped connections"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker shared by every call in the process"""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, reset_after: float = LLM_BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        self.state = state
+        LLM_BREAKER_STATE.set(BREAKER_STATES[state])
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        if self.failures <= 0:
+            return
+        with self._lock:
+            if self.state == "open":
+                remaining = self._opened_at + self.reset_after - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(remaining)
+                self._set_state("half_open")
+                self._trial_running = False
+            if self.state == "half_open":
+                # One trial call at a time while half open
+                if self._trial_running:
+                    raise CircuitOpenError(self.reset_after)
+                self._trial_running = True
+
+    def open_for(self) -> float:
+        """Seconds until calls may go out again (0 unless the breaker is open)"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_after - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._trial_running = False
+            if self.state != "closed":
+                self._set_state("closed")
+
+    def record_failure(self, error: BaseException):
+        if not is_retryable(error):
+            # The provider answered (e.g. a bad request); it is not degraded
+            self.record_success()
+            return
+        with self._lock:
+            self._consecutive += 1
+            self._trial_running = False
+            if self.failures > 0 and (self.state == "half_open" or self._consecutive >= self.failures):
+                if self.state != "open":
+                    print(f"[WARNING] LLM circuit breaker opened after {self._consecutive} failures: {error}")
+                self._opened_at = time.monotonic()
+                self._set_state("open")
+
+
+class LatencyTracker:
+    """Recent successful attempt latencies, for the hedging threshold"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class ResilientCaller:
+    """Retry, deadline, hedging and breaker policy around one provider's calls"""
+
+    def __init__(self, timeout: float = LLM_TIMEOUT, deadline: float = LLM_DEADLINE,
+                 max_attempts: int = LLM_MAX_ATTEMPTS, backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX, hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+                 hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES, breaker: CircuitBreaker | None = None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _retrying(self, retrying_cls, model: str):
+        def count_retry(retry_state):
+            record_llm_retry(model)
+
+        return retrying_cls(
+            stop=stop_after_attempt(self.max_attempts) | stop_before_delay(self.deadline),
+            wait=wait_random_exponential(multiplier=self.backoff_base, max=self.backoff_max),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=count_retry,
+            reraise=True,
+        )
+
+    def _attempt_timeout(self, started: float) -> float:
+        remaining = self.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            raise AttemptTimeout(f"LLM call exceeded its {self.deadline:.0f}s deadline")
+        return min(self.timeout, remaining)
+
+    def _hedge_after(self, timeout: float) -> float | None:
+        if self.hedge_percentile <= 0:
+            return None
+        threshold = self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        return threshold if threshold is not None and threshold < timeout else None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=HEDGE_THREADS, thread_name_prefix="llm-hedge")
+        return self._pool
+
+    # Blocking calls
+
+    def _quota_wait(self, quota, started: float) -> float:
+        """Reserve quota for one request; seconds to sleep, at most until the deadline"""
+        if quota is None:
+            return 0.0
+        wait = quota.reserve()
+        return max(0.0, min(wait, self.deadline - (time.monotonic() - started)))
+
+    def call(self, attempt, model: str = "unknown", quota=None):
+        """
+        Run `attempt(timeout)` under the retry policy and return its result.
+        `quota.reserve()` returns seconds to wait before a request may go out;
+        `quota.try_reserve()` takes quota only if it is free now (for hedges).
+        """
+        started = time.monotonic()
+        return self._retrying(Retrying, model)(self._run_attempt, attempt, started, model, quota)
+
+    def _run_attempt(self, attempt, started: float, model: str, quota=None):
+        # Local throttling is not a provider failure: wait before the breaker sees anything
+        time.sleep(self._quota_wait(quota, started))
+        timeout = self._attempt_timeout(started)
+        self.breaker.before_call()
+        attempt_started = time.monotonic()
+        try:
+            hedge_after = self._hedge_after(timeout)
+            if hedge_after is None:
+                result = attempt(timeout)
+            else:
+                result = self._hedged(attempt, timeout, hedge_after, model, quota)
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        self.latency.add(time.monotonic() - attempt_started)
+        return result
+
+    def _hedged(self, attempt, timeout: float, hedge_after: float, model: str, quota=None):
+        pool = self._get_pool()
+        # Each request gets its own copy of the caller's context (metrics, tracing)
+        first = pool.submit(contextvars.copy_context().run, attempt, timeout)
+        done, _ = wait([first], timeout=hedge_after)
+        if not done and (quota is None or quota.try_reserve()):
+            record_llm_hedge(model)
+            second = pool.submit(contextvars.copy_context().run, attempt, timeout - hedge_after)
+            pending = {first, second}
+            error = None
+            deadline = time.monotonic() + timeout - hedge_after
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    raise AttemptTimeout(f"Hedged LLM requests exceeded {timeout:.1f}s")
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+            raise error
+        return first.result()
+
+    # Async calls
+
+    async def acall(self, attempt, model: str = "unknown", quota=None):
+        """Async `call()`: `attempt(timeout)` returns an awaitable"""
+        started = time.monotonic()
+        return await self._retrying(AsyncRetrying, model)(self._arun_attempt, attempt, started, model, quota)
+
+    async def _arun_attempt(self, attempt, started: float, model: str, quota=None):
+        await asyncio.sleep(self._quota_wait(quota, started))
+        timeout = self._attempt_timeout(started)
+        self.breaker.before_call()
+        attempt_started = time.monotonic()
+        try:
+            hedge_after = self._hedge_after(timeout)
+            if hedge_after is None:
+                try:
+                    result = await asyncio.wait_for(attempt(timeout), timeout)
+                except asyncio.TimeoutError:
+                    raise AttemptTimeout(f"LLM request exceeded {timeout:.1f}s")
+            else:
+                result = await self._ahedged(attempt, timeout, hedge_after, model, quota)
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        self.latency.add(time.monotonic() - attempt_started)
+        return result
+
+    async def _ahedged(self, attempt, timeout: float, hedge_after: float, model: str, quota=None):
+        def start(seconds):
+            task = asyncio.ensure_future(attempt(seconds))
+            # A losing request's error is expected; mark it retrieved
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return task
+
+        tasks = {start(timeout)}
+        deadline = time.monotonic() + timeout
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done and (quota is None or quota.try_reserve()):
+            record_llm_hedge(model)
+            tasks.add(start(timeout - hedge_after))
+        error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()),
+                                                 return_when=FIRST_COMPLETED)
+                if not done:
+                    raise AttemptTimeout(f"Hedged LLM requests exceeded {timeout:.1f}s")
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The losing request is no longer needed
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        def rounded(seconds):
+            return round(seconds, 3) if seconds is not None else None
+
+        return {
+            "breaker": self.breaker.state,
+            "p50_s": rounded(self.latency.percentile(50)),
+            "p95_s": rounded(self.latency.percentile(95)),
+            "hedge_after_s": rounded(self._hedge_after(self.timeout)),
+        }
+
+
+# Process-wide policy used by src/llm_wrapper.py
+llm_caller = ResilientCaller()
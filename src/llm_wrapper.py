@@ -1,87 +1,408 @@
 # src/llm_wrapper.py
 import os
-import logging
-from pathlib import Path
+import asyncio
+import collections
+import json
+import re
+import threading
+import time
 from dotenv import load_dotenv
-import google.generativeai as genai
 from datetime import datetime
+from src.llm_cache import get_llm_cache, make_cache_key
+from src.llm_log import llm_call_log
+from src.llm_providers import get_provider
+from src.llm_resilience import llm_caller
+from src.metrics import current_stage, record_llm_call
+from src.tracing import set_span_attributes, traced
+from src.utils import estimate_tokens
 
 load_dotenv()
 
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY not found in .env file")
-
-genai.configure(api_key=api_key)
-
 DEFAULT_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.0"))
-DEFAULT_MAX_OUTPUT = int(os.getenv("LLM_MAX_OUTPUT", "1024"))
+# Summary, scoring and critique answers run to several thousand tokens;
+# a lower cap truncates their JSON
+DEFAULT_MAX_OUTPUT = int(os.getenv("LLM_MAX_OUTPUT", "8192"))
 DEFAULT_CANDIDATES = int(os.getenv("LLM_CANDIDATES", "1"))
 
-LOG_DIR = Path(os.getenv("LLM_LOG_DIR", "logs"))
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-LOG_FILE = LOG_DIR / "llm_calls.log"
-logging.basicConfig(
-    filename=str(LOG_FILE),
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s'
-)
 
+# Concurrency / quota limits shared by every call in this process (0 disables a limit);
+# evaluation worker processes each take an equal share (see split_limits)
+MAX_CONCURRENT_CALLS = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_RPM", "0"))
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TPM", "0"))
 
-def gemini_llm(prompt: str,
-               temperature: float | None = None,
-               max_output_tokens: int | None = None,
-               candidate_count: int | None = None,
-               model_name: str = 'gemini-2.0-flash') -> str:
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    Callers reserve capacity up front and are told how long to wait, so the
+    same bucket serves both blocking and async callers.
     """
-    Call Gemini with deterministic defaults. Logs prompt and response to `logs/llm_calls.log`.
 
-    Parameters are optional and will default to deterministic values unless overridden by env vars.
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.fill_rate = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_reserve(self, amount: float = 1.0) -> bool:
+        """Take `amount` tokens only if they are available now."""
+        if self.capacity <= 0:
+            return True
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            if self.tokens < amount:
+                return False
+            self.tokens -= amount
+            return True
+
+    def refund(self, amount: float = 1.0):
+        """Return tokens taken for a request that was not sent."""
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens (possibly going negative) and return seconds to wait."""
+        if self.capacity <= 0:
+            return 0.0
+        # Never ask for more than a full bucket, or the wait would be unbounded
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.fill_rate
+
+
+class CallSlots:
+    """
+    Concurrency cap shared by blocking and async callers. Async callers
+    queue on a future that release() completes, so waiting for a slot
+    neither blocks the event loop nor polls.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._async_waiters = collections.deque()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_use >= self.limit:
+                self._cond.wait()
+            self._in_use += 1
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._in_use < self.limit:
+                self._in_use += 1
+                return
+            waiter = loop.create_future()
+            self._async_waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled after the slot was handed over
+                self.release()
+            raise
+
+    def release(self):
+        with self._cond:
+            while self._async_waiters:
+                loop, waiter = self._async_waiters.popleft()
+                try:
+                    # The slot passes straight to the waiter; _in_use is unchanged
+                    loop.call_soon_threadsafe(self._hand_over, waiter)
+                    return
+                except RuntimeError:
+                    continue  # its event loop is closed
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _hand_over(self, waiter):
+        if waiter.cancelled():
+            self.release()
+        else:
+            waiter.set_result(None)
+
+
+def _make_limiters(rpm: float, tpm: float, concurrency: int):
+    return TokenBucket(rpm), TokenBucket(tpm), CallSlots(concurrency) if concurrency > 0 else None
+
+
+_request_bucket, _token_bucket, _call_slots = _make_limiters(
+    REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE, MAX_CONCURRENT_CALLS
+)
+
+
+def split_limits(processes: int):
+    """
+    Give this process 1/`processes` of LLM_RPM, LLM_TPM and
+    LLM_MAX_CONCURRENCY. The limiters live in process memory, so each of
+    the pool's worker processes takes an equal share and together they stay
+    within the configured limits (called by the evaluation worker pool).
     """
+    global _request_bucket, _token_bucket, _call_slots
+    processes = max(1, processes)
+    concurrency = max(1, MAX_CONCURRENT_CALLS // processes) if MAX_CONCURRENT_CALLS > 0 else 0
+    _request_bucket, _token_bucket, _call_slots = _make_limiters(
+        REQUESTS_PER_MINUTE / processes, TOKENS_PER_MINUTE / processes, concurrency
+    )
+
+def _estimate_tokens(prompt: str, max_output_tokens: int) -> int:
+    # Estimated prompt tokens plus the reserved output budget
+    return estimate_tokens(prompt) + max_output_tokens
+
+
+class _Quota:
+    """RPM / TPM quota of one prompt's requests, reserved by llm_caller before each one"""
+
+    def __init__(self, prompt: str, params: dict):
+        self.tokens = _estimate_tokens(prompt, params["max_output_tokens"])
+
+    def reserve(self) -> float:
+        """Take quota for one request and return seconds to wait"""
+        return max(_request_bucket.reserve(1), _token_bucket.reserve(self.tokens))
+
+    def try_reserve(self) -> bool:
+        """Take quota for one request only if it is free now"""
+        if not _request_bucket.try_reserve(1):
+            return False
+        if not _token_bucket.try_reserve(self.tokens):
+            _request_bucket.refund(1)
+            return False
+        return True
+
+
+def _resolve_params(temperature, max_output_tokens, candidate_count) -> dict:
     temperature = DEFAULT_TEMPERATURE if temperature is None else temperature
     max_output_tokens = DEFAULT_MAX_OUTPUT if max_output_tokens is None else max_output_tokens
     candidate_count = DEFAULT_CANDIDATES if candidate_count is None else candidate_count
-
-    model = genai.GenerativeModel(model_name)
-
-    kwargs = {
+    return {
         "temperature": float(temperature),
         "max_output_tokens": int(max_output_tokens),
         "candidate_count": int(candidate_count)
     }
 
-    try:
-        response = model.generate_content(prompt, **kwargs)
-    except TypeError:
-        response = model.generate_content(prompt)
 
-    text = None
+def _extract_text(response) -> str | None:
     if hasattr(response, 'text'):
-        text = response.text
-    else:
-        try:
-            if hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                text = getattr(candidate, 'content', None) or getattr(candidate, 'output', None) or str(candidate)
-            else:
-                text = str(response)
-        except Exception:
-            text = str(response)
+        return response.text
+    try:
+        if hasattr(response, 'candidates') and response.candidates:
+            candidate = response.candidates[0]
+            return getattr(candidate, 'content', None) or getattr(candidate, 'output', None) or str(candidate)
+        return str(response)
+    except Exception:
+        return str(response)
+
+
+def _usage_tokens(response, prompt: str, text: str | None) -> tuple[int, int]:
+    """(prompt, response) token counts reported by the API, else estimated"""
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    response_tokens = getattr(usage, 'candidates_token_count', None)
+    if not isinstance(prompt_tokens, int):
+        prompt_tokens = estimate_tokens(prompt)
+    if not isinstance(response_tokens, int):
+        response_tokens = estimate_tokens(text or '')
+    return prompt_tokens, response_tokens
+
+
+def _span_request(model_name: str, params: dict):
+    set_span_attributes({
+        "gen_ai.system": get_provider().name,
+        "gen_ai.request.model": model_name,
+        "gen_ai.request.temperature": params["temperature"],
+        "gen_ai.request.max_tokens": params["max_output_tokens"],
+        "llm.agent": current_stage.get(),
+    })
+
+
+def _parses_as_json(text: str) -> bool:
+    """True if `text` (optionally inside a ```json fence) is complete JSON"""
+    try:
+        json.loads(re.sub(r"^```(?:json)?\n|```$", "", text.strip(), flags=re.MULTILINE))
+        return True
+    except ValueError:
+        return False
+
+
+def _cacheable(text: str | None, json_response: bool) -> bool:
+    # A truncated or malformed JSON answer would otherwise be replayed until it expires
+    return bool(text) and (not json_response or _parses_as_json(text))
 
+
+def _cache_key_for(model_name: str, prompt: str, params: dict, use_cache: bool):
+    """Cache key for deterministic calls, or None when the call must not be cached."""
+    if not use_cache or get_llm_cache() is None:
+        return None
+    # Sampling at temperature > 0 is meant to vary; caching would freeze it
+    if params["temperature"] != 0.0 or params["candidate_count"] != 1:
+        return None
+    # Offline providers get their own keys so fake answers never reach Gemini callers
+    provider = get_provider().name
+    cache_model = model_name if provider == "gemini" else f"{provider}/{model_name}"
+    return make_cache_key(cache_model, prompt, params)
+
+
+def _log_call(model_name: str, params: dict, prompt: str, text: str | None, cache_hit: bool = False):
+    # Only queues the entry; src/llm_log.py writes it on a background thread
     try:
         log_entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "model": model_name,
-            "temperature": temperature,
-            "max_output_tokens": max_output_tokens,
-            "candidate_count": candidate_count,
+            "agent": current_stage.get(),
+            **params,
+            "cache_hit": cache_hit,
             "prompt_snippet": prompt[:200].replace('\n', ' '),
             "response_snippet": (text or '')[:500].replace('\n', ' ')
         }
-        logging.info(log_entry)
+        llm_call_log.log(log_entry, prompt, text)
     except Exception:
         pass
 
+
+@traced("gemini_llm")
+def gemini_llm(prompt: str,
+               temperature: float | None = None,
+               max_output_tokens: int | None = None,
+               candidate_count: int | None = None,
+               model_name: str = 'gemini-2.0-flash',
+               use_cache: bool = True,
+               json_response: bool = False) -> str:
+    """
+    Call the configured LLM provider (Gemini unless LLM_PROVIDER says
+    otherwise, see src/llm_providers.py) with deterministic defaults.
+    Logs each call to `logs/llm_calls.jsonl` (see src/llm_log.py).
+
+    Parameters are optional and will default to deterministic values unless overridden by env vars.
+    Calls respect the process-wide concurrency (LLM_MAX_CONCURRENCY) and
+    quota (LLM_RPM / LLM_TPM) limits.
+
+    Deterministic calls (temperature 0, one candidate) are served from the
+    response cache when possible; pass use_cache=False to force a fresh call.
+    With json_response=True only answers that parse as JSON are cached.
+
+    Transient errors are retried with backoff within a deadline, slow calls
+    may be hedged, and a degraded provider trips a circuit breaker
+    (CircuitOpenError); see src/llm_resilience.py. Retries and hedges run
+    inside the call's concurrency slot; each request waits for its own quota
+    before it is sent, and that wait never counts as a provider failure.
+    """
+    params = _resolve_params(temperature, max_output_tokens, candidate_count)
+    _span_request(model_name, params)
+    cache_key = _cache_key_for(model_name, prompt, params, use_cache)
+    if cache_key is not None:
+        cached = get_llm_cache().get(cache_key)
+        if cached is not None:
+            set_span_attributes({"llm.cache_hit": True})
+            record_llm_call(model_name, 0, 0, 0.0, outcome="cache_hit")
+            _log_call(model_name, params, prompt, cached, cache_hit=True)
+            return cached
+
+    provider = get_provider()
+
+    slots = _call_slots
+    if slots is not None:
+        slots.acquire()
+    def attempt(timeout):
+        return provider.generate(model_name, prompt, params, timeout)
+
+    started = time.perf_counter()
+    try:
+        # Each request sent, including retries and hedges, spends quota
+        response = llm_caller.call(attempt, model_name, quota=_Quota(prompt, params))
+    except Exception:
+        record_llm_call(model_name, 0, 0, time.perf_counter() - started, outcome="error")
+        raise
+    finally:
+        if slots is not None:
+            slots.release()
+
+    text = _extract_text(response)
+    prompt_tokens, response_tokens = _usage_tokens(response, prompt, text)
+    set_span_attributes({
+        "llm.cache_hit": False,
+        "gen_ai.usage.input_tokens": prompt_tokens,
+        "gen_ai.usage.output_tokens": response_tokens,
+    })
+    record_llm_call(model_name, prompt_tokens, response_tokens, time.perf_counter() - started)
+    _log_call(model_name, params, prompt, text)
+    if cache_key is not None and _cacheable(text, json_response):
+        get_llm_cache().set(cache_key, text)
+    return text or ""
+
+
+@traced("agemini_llm")
+async def agemini_llm(prompt: str,
+                      temperature: float | None = None,
+                      max_output_tokens: int | None = None,
+                      candidate_count: int | None = None,
+                      model_name: str = 'gemini-2.0-flash',
+                      use_cache: bool = True,
+                      json_response: bool = False) -> str:
+    """
+    Async counterpart of `gemini_llm` using the provider's async path
+    (the SDK's native async client for Gemini).
+
+    Shares the provider, concurrency slots and rate limits with `gemini_llm`,
+    so sync and async callers together stay under the configured quotas.
+    The SDK's async client binds to the first event loop that uses it; call
+    this from one long-lived loop (e.g. the FastAPI loop).
+    """
+    params = _resolve_params(temperature, max_output_tokens, candidate_count)
+    _span_request(model_name, params)
+    cache_key = _cache_key_for(model_name, prompt, params, use_cache)
+    if cache_key is not None:
+        cached = get_llm_cache().get(cache_key)
+        if cached is not None:
+            set_span_attributes({"llm.cache_hit": True})
+            record_llm_call(model_name, 0, 0, 0.0, outcome="cache_hit")
+            _log_call(model_name, params, prompt, cached, cache_hit=True)
+            return cached
+
+    provider = get_provider()
+
+    slots = _call_slots
+    if slots is not None:
+        await slots.acquire_async()
+    async def attempt(timeout):
+        return await provider.agenerate(model_name, prompt, params, timeout)
+
+    started = time.perf_counter()
+    try:
+        response = await llm_caller.acall(attempt, model_name, quota=_Quota(prompt, params))
+    except Exception:
+        record_llm_call(model_name, 0, 0, time.perf_counter() - started, outcome="error")
+        raise
+    finally:
+        if slots is not None:
+            slots.release()
+
+    text = _extract_text(response)
+    prompt_tokens, response_tokens = _usage_tokens(response, prompt, text)
+    set_span_attributes({
+        "llm.cache_hit": False,
+        "gen_ai.usage.input_tokens": prompt_tokens,
+        "gen_ai.usage.output_tokens": response_tokens,
+    })
+    record_llm_call(model_name, prompt_tokens, response_tokens, time.perf_counter() - started)
+    _log_call(model_name, params, prompt, text)
+    if cache_key is not None and _cacheable(text, json_response):
+        get_llm_cache().set(cache_key, text)
     return text or ""
 
 
@@ -1,5 +1,7 @@
 from langchain_community.document_loaders import PyPDFLoader
+from langchain.schema import Document
 import docx
+import os
 
 try:
     from langchain_community.document_loaders import PyMuPDFLoader
@@ -8,6 +10,8 @@ except ImportError:
     PYMUPDF_AVAILABLE = False
     print("[WARNING] PyMuPDF not available, falling back to PyPDF")
 
+from src.pdf_extract import pymupdf, iter_pdf_texts
+
 def load_pdf(path: str):
     try:
         if PYMUPDF_AVAILABLE:
@@ -31,4 +35,69 @@ def load_docx(path: str):
 def load_txt(path: str):
     with open(path, "r", encoding="utf-8") as f:
         text = f.read()
-    return [{"page_content": text, "metadata": {"source": path}}]
\ No newline at end of file
+    return [{"page_content": text, "metadata": {"source": path}}]
+
+
+def _page(text: str, path: str, number: int) -> Document:
+    return Document(page_content=text, metadata={"source": os.path.basename(path), "page": number})
+
+
+def _iter_pdf_texts(path: str):
+    if pymupdf is not None:
+        # Page ranges across a process pool for large files (see src/pdf_extract.py)
+        yield from iter_pdf_texts(path)
+    else:
+        for doc in PyPDFLoader(path).lazy_load():
+            yield doc.page_content
+
+
+def _iter_docx_texts(path: str):
+    """Paragraph text grouped into pages at explicit page breaks."""
+    lines = []
+    for para in docx.Document(path).paragraphs:
+        if para.paragraph_format.page_break_before and lines:
+            yield "\n".join(lines)
+            lines = []
+        lines.append(para.text)
+        if para._element.xpath('.//w:br[@w:type="page"]'):
+            yield "\n".join(lines)
+            lines = []
+    if lines:
+        yield "\n".join(lines)
+
+
+def _iter_txt_texts(path: str):
+    """Form feeds separate pages; read line by line."""
+    lines = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            *done, rest = line.split("\f")
+            for part in done:
+                lines.append(part)
+                yield "".join(lines)
+                lines = []
+            lines.append(rest)
+    # A trailing form feed does not start another page
+    if "".join(lines):
+        yield "".join(lines)
+
+
+def iter_pages(path: str):
+    """
+    Yield one Document per page (metadata: source file name, 1-based page)
+    as soon as it is parsed, instead of materializing the whole file.
+    PDFs are read with PyMuPDF, in parallel for large files (PyPDF if
+    unavailable), DOCX is split on page breaks and TXT on form feeds.
+    """
+    lower = path.lower()
+    if lower.endswith(".pdf"):
+        texts = _iter_pdf_texts(path)
+    elif lower.endswith(".docx"):
+        texts = _iter_docx_texts(path)
+    elif lower.endswith(".txt"):
+        texts = _iter_txt_texts(path)
+    else:
+        raise ValueError("Unsupported file type. Use PDF, DOCX, or TXT.")
+
+    for number, text in enumerate(texts, start=1):
+        yield _page(text, path, number)
@@ -0,0 +1,360 @@
+"""
+Process-wide metrics in the Prometheus text format, plus per-evaluation timings.
+
+prometheus_client is not a dependency, so this keeps a minimal registry of
+counters, gauges and histograms with labels. Pipeline code records through
+`track_stage` and `record_llm_call`; each records into the registry and
+into the current evaluation's `EvaluationTimings` (if one is active), which
+becomes the `timings` block stored with the evaluation.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from src.tracing import span
+
+# Seconds; wide enough for a single embedding batch up to a whole evaluation
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# USD per 1M tokens (prompt, response); update from the provider's price list
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+                for key, child in sorted(self._children.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.labels(**labels).set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float, **labels):
+        self.labels(**labels).observe(value)
+
+    def _samples(self):
+        lines = []
+        for key, child in sorted(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "grant_stage_duration_seconds", "Wall time of pipeline and API stages", ["stage"])
+LLM_CALL_SECONDS = Histogram(
+    "grant_llm_call_duration_seconds", "Latency of LLM calls (cache hits excluded)", ["agent", "model"])
+LLM_CALLS = Counter(
+    "grant_llm_calls_total", "LLM calls by outcome (ok, error, cache_hit)", ["agent", "model", "outcome"])
+LLM_RETRIES = Counter(
+    "grant_llm_retries_total", "LLM call attempts retried after an error", ["agent", "model"])
+LLM_HEDGES = Counter(
+    "grant_llm_hedged_requests_total", "Second requests sent for slow LLM attempts", ["agent", "model"])
+LLM_BREAKER_STATE = Gauge(
+    "grant_llm_circuit_state", "LLM circuit breaker state (0 closed, 1 half open, 2 open)")
+LLM_TOKENS = Counter(
+    "grant_llm_tokens_total", "LLM tokens by direction (prompt, response)", ["agent", "model", "direction"])
+LLM_COST = Counter(
+    "grant_llm_cost_usd_total", "Estimated LLM spend in USD", ["agent", "model"])
+EVALUATIONS = Counter(
+    "grant_evaluations_total", "Evaluation pool jobs by outcome (completed, failed, rejected)", ["outcome"])
+QUEUE_DEPTH = Gauge(
+    "grant_eval_queue_depth", "Evaluations waiting for a worker")
+RUNNING = Gauge(
+    "grant_eval_running", "Evaluations running on a worker")
+
+# Pipeline stage the current thread is working for; labels LLM calls by agent
+current_stage = contextvars.ContextVar("current_stage", default="other")
+_current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, response_tokens: int) -> float:
+    prompt_price, response_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + response_tokens * response_price) / 1_000_000
+
+
+class EvaluationTimings:
+    """Per-evaluation stage durations and LLM usage, stored as `timings`"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.stages = {}
+        self.llm = {}
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def _usage(self, agent: str, model: str) -> dict:
+        return self.llm.setdefault(agent, {
+            "model": model, "calls": 0, "cache_hits": 0, "errors": 0, "retries": 0, "hedges": 0,
+            "prompt_tokens": 0, "response_tokens": 0, "seconds": 0.0, "cost_usd": 0.0,
+        })
+
+    def add_llm_event(self, agent: str, model: str, event: str):
+        """Count a failed call ("errors"), a retried attempt ("retries") or a hedge ("hedges")"""
+        with self._lock:
+            self._usage(agent, model)[event] += 1
+
+    def add_llm_call(self, agent: str, model: str, prompt_tokens: int, response_tokens: int,
+                     seconds: float, cost: float, cache_hit: bool):
+        with self._lock:
+            usage = self._usage(agent, model)
+            usage["calls"] += 1
+            usage["cache_hits"] += int(cache_hit)
+            usage["prompt_tokens"] += prompt_tokens
+            usage["response_tokens"] += response_tokens
+            usage["seconds"] += seconds
+            usage["cost_usd"] += cost
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            llm = {agent: {**usage, "seconds": round(usage["seconds"], 3), "cost_usd": round(usage["cost_usd"], 6)}
+                   for agent, usage in self.llm.items()}
+            return {
+                "total_seconds": round(time.perf_counter() - self._started, 3),
+                "stages": {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+                "llm": llm,
+                "prompt_tokens": sum(u["prompt_tokens"] for u in llm.values()),
+                "response_tokens": sum(u["response_tokens"] for u in llm.values()),
+                "cost_usd": round(sum(u["cost_usd"] for u in llm.values()), 6),
+                # Breaker state of the process that ran the evaluation, as it finished
+                "llm_breaker_state": int(LLM_BREAKER_STATE.labels().value),
+            }
+
+
+@contextmanager
+def collect_timings():
+    """Make a fresh EvaluationTimings current for the enclosed pipeline run."""
+    timings = EvaluationTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Time a block as `stage` in the histogram and the current timings, and
+    trace it as a span. LLM calls made inside the block are attributed to `stage`.
+    """
+    token = current_stage.set(stage)
+    started = time.perf_counter()
+    try:
+        with span(stage, {"pipeline.stage": stage}):
+            yield
+    finally:
+        elapsed = time.perf_counter() - started
+        current_stage.reset(token)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add_stage(stage, elapsed)
+
+
+def record_llm_call(model: str, prompt_tokens: int, response_tokens: int, seconds: float,
+                    outcome: str = "ok"):
+    """Count one LLM call for the current agent; cache hits cost nothing."""
+    agent = current_stage.get()
+    LLM_CALLS.inc(agent=agent, model=model, outcome=outcome)
+    if outcome == "error":
+        _record_llm_event(agent, model, "errors")
+        return
+    cache_hit = outcome == "cache_hit"
+    cost = 0.0 if cache_hit else estimate_cost(model, prompt_tokens, response_tokens)
+    if not cache_hit:
+        LLM_CALL_SECONDS.observe(seconds, agent=agent, model=model)
+        LLM_TOKENS.inc(prompt_tokens, agent=agent, model=model, direction="prompt")
+        LLM_TOKENS.inc(response_tokens, agent=agent, model=model, direction="response")
+        LLM_COST.inc(cost, agent=agent, model=model)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_llm_call(agent, model, prompt_tokens if not cache_hit else 0,
+                             response_tokens if not cache_hit else 0, seconds, cost, cache_hit)
+
+
+def _record_llm_event(agent: str, model: str, event: str):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_llm_event(agent, model, event)
+
+
+def record_llm_retry(model: str):
+    """Count an LLM attempt that failed and is about to be retried"""
+    agent = current_stage.get()
+    LLM_RETRIES.inc(agent=agent, model=model)
+    _record_llm_event(agent, model, "retries")
+
+
+def record_llm_hedge(model: str):
+    """Count a second request sent for a slow LLM attempt"""
+    agent = current_stage.get()
+    LLM_HEDGES.inc(agent=agent, model=model)
+    _record_llm_event(agent, model, "hedges")
+
+
+def observe_timings(timings: dict):
+    """
+    Replay a stored `timings` block into this process's registry. Used when
+    the pipeline ran in a worker process whose own registry is not scraped;
+    repeated stages (embed, retrieve) arrive as one per-evaluation total, and
+    the breaker gauge shows the state the latest finished evaluation saw.
+    """
+    for stage, seconds in (timings.get("stages") or {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    for agent, usage in (timings.get("llm") or {}).items():
+        model = usage.get("model", "unknown")
+        LLM_CALLS.inc(usage.get("calls", 0) - usage.get("cache_hits", 0), agent=agent, model=model, outcome="ok")
+        LLM_CALLS.inc(usage.get("cache_hits", 0), agent=agent, model=model, outcome="cache_hit")
+        LLM_CALLS.inc(usage.get("errors", 0), agent=agent, model=model, outcome="error")
+        LLM_RETRIES.inc(usage.get("retries", 0), agent=agent, model=model)
+        LLM_HEDGES.inc(usage.get("hedges", 0), agent=agent, model=model)
+        LLM_TOKENS.inc(usage.get("prompt_tokens", 0), agent=agent, model=model, direction="prompt")
+        LLM_TOKENS.inc(usage.get("response_tokens", 0), agent=agent, model=model, direction="response")
+        LLM_COST.inc(usage.get("cost_usd", 0.0), agent=agent, model=model)
+    if "llm_breaker_state" in timings:
+        LLM_BREAKER_STATE.set(timings["llm_breaker_state"])
+
+
+def observe_pool(stats: dict):
+    """Copy an EvaluationWorkerPool.stats() snapshot into the pool gauges and counters"""
+    QUEUE_DEPTH.set(stats["queued"])
+    RUNNING.set(stats["running"])
+    for outcome in ("completed", "failed", "rejected"):
+        EVALUATIONS.labels(outcome=outcome).set(stats[outcome])
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,120 @@
+"""
+Multi-process PDF text extraction.
+
+Large proposals (appendices, letters of support, CVs) are split into
+contiguous page ranges that are extracted with PyMuPDF in a shared process
+pool. Ranges come back in page order, so callers can start on the first
+pages while later ranges are still being extracted. A range PyMuPDF fails
+on is re-read with pypdf (the library behind PyPDFLoader).
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many pages, process start-up and pickling cost more than they save
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "48"))
+# Ranges per worker; more, smaller ranges balance uneven pages and return the first pages sooner
+RANGES_PER_WORKER = 4
+# In-process extraction still goes range by range so a bad page only costs its range
+SERIAL_RANGE_PAGES = 16
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def page_ranges(n_pages: int, n_ranges: int) -> list[tuple[int, int]]:
+    """Split [0, n_pages) into at most n_ranges contiguous, near-equal (start, stop) ranges."""
+    n_ranges = max(1, min(n_ranges, n_pages))
+    size, extra = divmod(n_pages, n_ranges)
+    ranges, start = [], 0
+    for i in range(n_ranges):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_range_pypdf(path: str, start: int, stop: int) -> list[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_range(path: str, start: int, stop: int) -> list[str]:
+    """Text of pages [start, stop); runs in a pool worker."""
+    if pymupdf is not None:
+        try:
+            with pymupdf.open(path) as pdf:
+                return [pdf.load_page(i).get_text() for i in range(start, stop)]
+        except Exception as e:
+            print(f"[WARNING] PyMuPDF failed on pages {start + 1}-{stop} of {path}: {e}; retrying with pypdf")
+    return _extract_range_pypdf(path, start, stop)
+
+
+def page_count(path: str) -> int:
+    if pymupdf is not None:
+        try:
+            with pymupdf.open(path) as pdf:
+                return pdf.page_count
+        except Exception as e:
+            print(f"[WARNING] PyMuPDF could not open {path}: {e}")
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Long-lived pool per size, so worker start-up is paid once per process."""
+    pool = _pools.get(workers)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(workers)
+            if pool is None:
+                # spawn: forking a process that runs threads (uvicorn, the stage executor) is unsafe
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+                _pools[workers] = pool
+    return pool
+
+
+def iter_pdf_texts(path: str, workers: int | None = None):
+    """
+    Yield the text of every page in order.
+
+    Documents with at least PARALLEL_MIN_PAGES pages are extracted range by
+    range across the process pool (workers=1 forces in-process extraction).
+    """
+    workers = EXTRACT_WORKERS if workers is None else workers
+    n_pages = page_count(path)
+    if workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+        for start, stop in page_ranges(n_pages, max(1, n_pages // SERIAL_RANGE_PAGES)):
+            yield from extract_range(path, start, stop)
+        return
+
+    ranges = page_ranges(n_pages, workers * RANGES_PER_WORKER)
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(extract_range, path, start, stop) for start, stop in ranges]
+    except Exception as e:
+        print(f"[WARNING] PDF extraction pool unavailable ({e}); extracting in-process")
+        futures = None
+
+    for i, (start, stop) in enumerate(ranges):
+        if futures is None:
+            yield from extract_range(path, start, stop)
+            continue
+        try:
+            yield from futures[i].result()
+        except Exception as e:
+            # Worker crashed (e.g. BrokenProcessPool); redo this range here
+            print(f"[WARNING] Parallel extraction of pages {start + 1}-{stop} failed: {e}")
+            yield from extract_range(path, start, stop)
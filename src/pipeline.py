@@ -0,0 +1,93 @@
+"""
+Dependency-graph executor for evaluation pipeline stages.
+
+Each Stage names the stages it depends on and receives their results as
+keyword arguments. Stages whose dependencies are satisfied run concurrently
+on a small thread pool, so independent LLM calls overlap instead of queueing.
+"""
+
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_MAX_PARALLEL = int(os.getenv("PIPELINE_MAX_PARALLEL_STAGES", "3"))
+
+
+class Stage:
+    """A named pipeline step: `fn(**{dep: result})` runs once all `deps` are done."""
+
+    def __init__(self, name: str, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={list(self.deps)})"
+
+
+def _validate(stages: list[Stage]):
+    names = [s.name for s in stages]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate stage names in pipeline: {names}")
+
+    known = set(names)
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in known]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    # Kahn's algorithm: every stage must become runnable eventually
+    remaining = {s.name: set(s.deps) for s in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle detected among stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stage_graph(stages: list[Stage], max_workers: int = DEFAULT_MAX_PARALLEL, on_complete=None) -> dict:
+    """
+    Execute a stage DAG and return {stage_name: result}.
+
+    Args:
+        stages: Stages in any order; dependencies are resolved by name
+        max_workers: Maximum number of stages running at the same time
+        on_complete: Optional callable(stage_name, result), called from the
+            calling thread as each stage finishes
+
+    Raises:
+        The first exception raised by any stage. Stages not yet started are cancelled.
+    """
+    _validate(stages)
+
+    results = {}
+    pending = {s.name: s for s in stages}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="stage") as executor:
+        while pending or running:
+            # Launch every stage whose dependencies have finished
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    kwargs = {dep: results[dep] for dep in stage.deps}
+                    # Copy context so per-request state (e.g. tracing) follows the stage
+                    ctx = contextvars.copy_context()
+                    running[executor.submit(ctx.run, stage.fn, **kwargs)] = name
+                    del pending[name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                if on_complete is not None:
+                    on_complete(name, results[name])
+
+    return results
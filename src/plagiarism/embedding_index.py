@@ -1,11 +1,9 @@
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from src.embeddings import get_embedding_service
 
 def build_index(text_chunks):
-    embeddings = model.encode(text_chunks, convert_to_numpy=True)
+    embeddings = get_embedding_service().encode(text_chunks)
     index = faiss.IndexFlatL2(embeddings.shape[1])
     index.add(embeddings)
     return index, embeddings
@@ -1,14 +1,14 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
+from src.embeddings import get_embedding_service
 from .reference_loader import load_reference_corpus
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
 def detect_plagiarism(proposal_text: str):
     reference_texts = load_reference_corpus()
 
-    proposal_emb = model.encode([proposal_text], convert_to_numpy=True)
-    ref_embs = model.encode(reference_texts, convert_to_numpy=True)
+    # Shared process-wide model (same all-MiniLM-L6-v2 used for retrieval)
+    model = get_embedding_service()
+    proposal_emb = model.encode([proposal_text])
+    ref_embs = model.encode(reference_texts)
 
     # Cosine Similarity
     sims = (proposal_emb @ ref_embs.T) / (
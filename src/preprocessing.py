@@ -1,13 +1,12 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-import yaml
-import os
+from src.embeddings import load_config
 
-def split_docs(docs, config_path="config.yaml"):
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"{config_path} not found.")
-
-    with open(config_path) as f:
-        cfg = yaml.safe_load(f)
+def split_docs(docs, config_path="config.yaml", chunk_size=None, chunk_overlap=None):
+    """
+    Split pages into overlapping chunks; each chunk keeps its page's metadata.
+    `chunk_size` / `chunk_overlap` override the `retrieval:` values in config.yaml.
+    """
+    cfg = load_config(config_path)
 
     if cfg is None:
         raise ValueError(f"{config_path} is empty. It must contain a 'retrieval' section.")
@@ -15,8 +14,14 @@ def split_docs(docs, config_path="config.yaml"):
     if "retrieval" not in cfg:
         raise ValueError("The config file must contain a 'retrieval' section.")
 
+    chunk_size = chunk_size or cfg["retrieval"].get("chunk_size", 1000)
+    chunk_overlap = cfg["retrieval"].get("chunk_overlap", 100) if chunk_overlap is None else chunk_overlap
+    # A small chunk_size from settings must not be swallowed by the configured overlap
+    if chunk_overlap >= chunk_size:
+        chunk_overlap = chunk_size // 10
+
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=cfg["retrieval"].get("chunk_size", 1000),
-        chunk_overlap=cfg["retrieval"].get("chunk_overlap", 100)
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
     )
     return splitter.split_documents(docs)
\ No newline at end of file
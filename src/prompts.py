@@ -257,6 +257,39 @@ End with:
 
 
 
+BUDGET_PROMPT = """
+You are a grant budget reviewer for a proposal in the field of **{domain}**.
+
+You are given the Budget section of the proposal summary together with the
+Scoring Agent's evaluation of that section.
+
+Maximum allowed budget: {max_budget}
+
+### CRITICAL RULES:
+- **Do NOT invent amounts.** Use only figures stated in the input; if none are given, use 0.
+- Flag any total above the maximum allowed budget as an "error".
+- Flag missing justification, unclear cost categories or unrealistic amounts as "warning".
+
+### INPUT (JSON):
+{budget_json}
+
+### OUTPUT (STRICT JSON ONLY):
+{{
+  "totalBudget": float,
+  "breakdown": [
+    {{"category": str, "amount": float, "percentage": float}}
+  ],
+  "flags": [
+    {{"type": "warning" | "error" | "info", "message": str}}
+  ],
+  "summary": str,
+  "budget_score": int,
+  "recommendations": [str, ...]
+}}
+"""
+
+
+
 FINAL_DECISION_PROMPT = """
 You are an expert grant reviewer making a final funding decision for a proposal in the field of **{domain}**.
 
@@ -279,15 +312,18 @@ You are provided the following:
 ### Your Task:
 Write a professional, concise justification referencing meaningful strengths and weaknesses.
 
+### INPUT (JSON):
+{data}
+
 ### OUTPUT FORMAT (STRICT JSON):
-{
+{{
   "final_score": {final_weighted_score},
   "decision": "ACCEPT" | "CONDITIONALLY ACCEPT" | "REJECT",
   "rationale": "Short paragraph explaining the decision.",
   "key_strengths": [str, ...],
   "key_weaknesses": [str, ...],
   "next_steps": "One clear recommendation for improvement."
-}
+}}
 
 ### Output Rules:
 - Return **only the JSON object**.
@@ -0,0 +1,105 @@
+"""
+On-disk store of embeddings for fixed retrieval queries.
+
+The summarizer's section queries never change between proposals, so their
+embeddings are computed once per embedding model, saved next to the other
+caches and loaded at startup. Each file is tied to one model name, so
+changing `model.embeddings` in config.yaml selects (or builds) a new file
+and stale vectors are never reused.
+"""
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.embeddings import get_embedding_service
+
+STORE_DIR = Path(os.getenv("QUERY_EMBEDDINGS_DIR", "cache"))
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class QueryEmbeddingStore:
+    """Query text -> embedding vector for one embedding model, persisted as .npz"""
+
+    def __init__(self, service, store_dir: Path = STORE_DIR):
+        self.service = service
+        self.model_name = service.model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.model_name)
+        self.path = Path(store_dir) / f"query_embeddings_{slug}.npz"
+        self._vectors = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    print(f"[INFO] Ignoring query embeddings for {data['model']} (current model: {self.model_name})")
+                    return
+                self._vectors = dict(zip(data["queries"].tolist(), data["vectors"]))
+            print(f"[INFO] Loaded {len(self._vectors)} precomputed query embeddings from {self.path}")
+        except Exception as e:
+            print(f"[WARNING] Could not read query embeddings at {self.path}: {e}")
+            self._vectors = {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        queries = list(self._vectors)
+        tmp_path = self.path.with_name(self.path.stem + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            model=np.array(self.model_name),
+            queries=np.array(queries),
+            vectors=np.stack([self._vectors[q] for q in queries]).astype(np.float32)
+        )
+        os.replace(tmp_path, self.path)
+
+    def _encode(self, queries: list[str]) -> np.ndarray:
+        # Straight to the model: query vectors must not fill the chunk cache
+        return self.service.encode([q.replace("\n", " ") for q in queries])
+
+    def register(self, queries: list[str]):
+        """Make sure `queries` are stored, encoding and persisting any that are missing."""
+        with self._lock:
+            missing = [q for q in dict.fromkeys(queries) if q not in self._vectors]
+            if not missing:
+                return
+            vectors = self._encode(missing)
+            self._vectors.update(zip(missing, vectors))
+            try:
+                self._save()
+            except Exception as e:
+                print(f"[WARNING] Could not persist query embeddings to {self.path}: {e}")
+
+    def embed_queries(self, queries: list[str]) -> np.ndarray:
+        """
+        Embedding matrix for `queries`: stored vectors are reused, any others
+        are encoded in one batch (and not persisted).
+        """
+        vectors = {q: self._vectors[q] for q in queries if q in self._vectors}
+        missing = [q for q in dict.fromkeys(queries) if q not in vectors]
+        if missing:
+            vectors.update(zip(missing, self._encode(missing)))
+        return np.stack([vectors[q] for q in queries]) if queries else np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self._vectors)
+
+
+def get_query_embedding_store(config_path="config.yaml") -> QueryEmbeddingStore:
+    """Process-wide store for the embedding model currently named in config.yaml."""
+    service = get_embedding_service(config_path)
+    store = _stores.get(service.model_name)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(service.model_name)
+            if store is None:
+                store = QueryEmbeddingStore(service)
+                _stores[service.model_name] = store
+    return store
@@ -0,0 +1,147 @@
+"""
+OpenTelemetry tracing for the API, pipeline stages and LLM calls
+
+Tracing is off unless OTEL_TRACES_EXPORTER is "console", "file" (one JSON
+span per line in TRACE_FILE) or "otlp" (OTEL_EXPORTER_OTLP_ENDPOINT, gRPC).
+Every process that runs pipeline code calls setup_tracing() once: the API,
+evaluation worker processes and the batch CLI. Without the OpenTelemetry
+packages installed every helper here is a no-op.
+"""
+import functools
+import inspect
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.trace import SpanKind
+except ImportError:  # optional dependency
+    trace = None
+
+TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("logs", "traces.jsonl"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "grant-evaluator")
+
+_setup_lock = threading.Lock()
+_configured = False
+_tracer = trace.get_tracer("grant_evaluator") if trace is not None else None
+
+
+def setup_tracing():
+    """Install the tracer provider and exporter for this process (idempotent)"""
+    global _configured
+    if _configured or trace is None or TRACES_EXPORTER in ("", "none"):
+        return
+    with _setup_lock:
+        if _configured:
+            return
+        _configured = True
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        except ImportError:
+            print("[WARNING] opentelemetry-sdk is not installed; tracing disabled")
+            return
+
+        if TRACES_EXPORTER == "console":
+            exporter = ConsoleSpanExporter()
+        elif TRACES_EXPORTER == "file":
+            os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+            exporter = ConsoleSpanExporter(
+                out=open(TRACE_FILE, "a", encoding="utf-8"),
+                formatter=lambda span: span.to_json(indent=None) + "\n"
+            )
+        elif TRACES_EXPORTER == "otlp":
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        else:
+            print(f"[WARNING] Unknown OTEL_TRACES_EXPORTER '{TRACES_EXPORTER}'; tracing disabled")
+            return
+
+        provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+        print(f"[INFO] Tracing enabled: {TRACES_EXPORTER} exporter (pid {os.getpid()})")
+
+
+def shutdown_tracing():
+    """Flush buffered spans (worker processes flush at exit)"""
+    if trace is not None and hasattr(trace.get_tracer_provider(), "shutdown"):
+        trace.get_tracer_provider().shutdown()
+
+
+def _clean(attributes: dict | None) -> dict:
+    # OpenTelemetry rejects None attribute values
+    return {k: v for k, v in (attributes or {}).items() if v is not None}
+
+
+@contextmanager
+def span(name: str, attributes: dict | None = None, server: bool = False, carrier: dict | None = None):
+    """
+    Run the enclosed block in a child span of the current one. server=True
+    marks an incoming request; `carrier` (e.g. request headers) supplies a
+    remote parent. Exceptions are recorded on the span and re-raised.
+    """
+    if trace is None:
+        yield None
+        return
+    parent = propagate.extract(carrier) if carrier is not None else None
+    with _tracer.start_as_current_span(
+        name,
+        context=parent,
+        kind=SpanKind.SERVER if server else SpanKind.INTERNAL,
+        attributes=_clean(attributes)
+    ) as current:
+        yield current
+
+
+def set_span_attributes(attributes: dict):
+    """Annotate the current span, if one is recording"""
+    if trace is None:
+        return
+    current = trace.get_current_span()
+    if current.is_recording():
+        current.set_attributes(_clean(attributes))
+
+
+def traced(name: str):
+    """Decorator: run each call of a sync or async function in its own span"""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return run
+    return decorate
+
+
+def inject_context() -> dict:
+    """The current trace context as a picklable carrier for run_with_context()"""
+    carrier = {}
+    if trace is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+def run_with_context(carrier: dict, fn, *args, **kwargs):
+    """
+    Call fn under a trace context captured with inject_context(), so spans
+    created on a pool thread or in a worker process join the caller's trace.
+    """
+    if trace is None or not carrier:
+        return fn(*args, **kwargs)
+    setup_tracing()
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        otel_context.detach(token)
@@ -0,0 +1,3 @@
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-size estimate: ~4 characters per token for English prose."""
+    return (len(text) + 3) // 4
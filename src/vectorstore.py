@@ -1,20 +1,118 @@
 from langchain_community.vectorstores import Chroma
+import numpy as np
 import os
 import shutil
+import uuid
 from langchain.schema import Document
 
-def create_vectorstore(docs: list[Document], embeddings, persist_dir=None):
+VECTORSTORE_BACKENDS = ("chroma", "numpy")
+
+
+class NumpyVectorIndex:
+    """
+    Ephemeral exact-search index: L2-normalized embeddings in one contiguous
+    float32 matrix, ranked by a single matrix product (cosine similarity).
+
+    Meant for per-proposal retrieval over tens to hundreds of chunks, where
+    building a Chroma collection costs more than the search itself.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.documents = []
+        # Row blocks from add_documents, concatenated on first search
+        self._blocks = []
+
+    @property
+    def matrix(self):
+        if not self._blocks:
+            return None
+        if len(self._blocks) > 1:
+            self._blocks = [np.vstack(self._blocks)]
+        return self._blocks[0]
+
+    @classmethod
+    def from_documents(cls, documents: list[Document], embedding):
+        index = cls(embedding)
+        index.add_documents(documents)
+        return index
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms)
+
+    def add_documents(self, documents: list[Document]):
+        if not documents:
+            return
+        vectors = self._normalize(self.embeddings.embed_documents([d.page_content for d in documents]))
+        self._blocks.append(vectors)
+        self.documents.extend(documents)
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, scores.shape[-1])
+        if k < scores.shape[-1]:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.shape[-1])
+        # Highest score first; ties keep document order for deterministic output
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4) -> list[Document]:
+        if self.matrix is None:
+            return []
+        scores = self.matrix @ self._normalize(embedding)[0]
+        return [self.documents[i] for i in self._top_k(scores, k)]
+
+    def similarity_search(self, query: str, k: int = 4) -> list[Document]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k=k)
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4) -> list[list[Document]]:
+        """Top-k for many query vectors with one (queries x documents) matrix product."""
+        if self.matrix is None:
+            return [[] for _ in range(len(embeddings))]
+        scores = self._normalize(embeddings) @ self.matrix.T
+        return [[self.documents[i] for i in self._top_k(row, k)] for row in scores]
+
+    def similarity_search_many(self, queries: list[str], k: int = 4) -> list[list[Document]]:
+        """Embed all queries in one batch, then search them together."""
+        if not queries:
+            return []
+        return self.similarity_search_by_vectors(self.embeddings.embed_documents(queries), k=k)
+
+    def __len__(self):
+        return len(self.documents)
+
+
+def create_vectorstore(docs: list[Document], embeddings, persist_dir=None, backend: str = "chroma"):
     """
-    Create a Chroma vectorstore from Document objects with metadata.
+    Create a vectorstore from Document objects with metadata.
     
+    backend="chroma" builds a Chroma collection; backend="numpy" builds an
+    in-memory NumpyVectorIndex (no persistence).
     If persist_dir is None, creates an in-memory vectorstore (recommended for evaluation isolation).
     If persist_dir is provided, persists to that directory.
     """
+    if backend not in VECTORSTORE_BACKENDS:
+        raise ValueError(f"Unknown vectorstore backend: {backend}. Use one of {VECTORSTORE_BACKENDS}.")
+
+    if backend == "numpy":
+        if persist_dir is not None:
+            raise ValueError("The numpy vectorstore backend is in-memory only; set persist_dir to None.")
+        return NumpyVectorIndex.from_documents(docs, embeddings)
+
     if persist_dir is None:
-        # In-memory mode - no persistence, no contamination
+        # In-memory mode - no persistence, no contamination. In-memory clients
+        # share one store per process, so each build gets its own collection
         db = Chroma.from_documents(
             documents=docs,
-            embedding=embeddings
+            embedding=embeddings,
+            collection_name=_private_collection_name()
         )
     else:
         os.makedirs(persist_dir, exist_ok=True)
@@ -26,6 +124,28 @@ def create_vectorstore(docs: list[Document], embeddings, persist_dir=None):
     return db
 
 
+def _private_collection_name() -> str:
+    return f"evaluation-{uuid.uuid4().hex}"
+
+
+def empty_vectorstore(embeddings, backend: str = "chroma"):
+    """An empty in-memory vectorstore to fill with add_documents()."""
+    if backend not in VECTORSTORE_BACKENDS:
+        raise ValueError(f"Unknown vectorstore backend: {backend}. Use one of {VECTORSTORE_BACKENDS}.")
+    if backend == "numpy":
+        return NumpyVectorIndex(embeddings)
+    return Chroma(collection_name=_private_collection_name(), embedding_function=embeddings)
+
+
+def release_vectorstore(db):
+    """Free an in-memory vectorstore's collection once its evaluation is done."""
+    if isinstance(db, Chroma):
+        try:
+            db.delete_collection()
+        except Exception as e:
+            print(f"[WARNING] Could not delete vectorstore collection: {e}")
+
+
 def cleanup_vectorstore(persist_dir):
     """
     Delete a vectorstore directory to prevent contamination between evaluations.
@@ -0,0 +1,21 @@
+import importlib
+import os
+import sys
+
+# Same import roots the app uses: `src.*` from the project root, bare backend modules
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, "backend")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BACKEND)
+
+
+def import_api():
+    """backend/main.py; backend modules put the project root (and its main.py) first on sys.path"""
+    loaded = sys.modules.get("main")
+    if loaded is not None and os.path.dirname(os.path.abspath(loaded.__file__)) != BACKEND:
+        del sys.modules["main"]
+    sys.path.insert(0, BACKEND)
+    try:
+        return importlib.import_module("main")
+    finally:
+        sys.path.remove(BACKEND)
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from src import context_packing
+from src.context_packing import count_tokens, get_token_budget, pack_json, sample_text
+
+
+def section(words: int) -> dict:
+    return {
+        "text": " ".join(f"word{i}" for i in range(words)),
+        "notes": "",
+        "references": [{"page": 1, "quote": None}],
+    }
+
+
+def test_small_values_are_compacted_not_truncated():
+    value = {"Budget": {"text": "Total $40,000", "notes": "", "references": []}, "Risks": None}
+    assert pack_json(value, max_tokens=100) == '{"Budget":{"text":"Total $40,000"}}'
+
+
+@pytest.mark.parametrize("max_tokens", [200, 500, 1000, 2000])
+def test_packed_json_fits_budget_and_stays_valid(max_tokens):
+    value = {name: section(400) for name in ("Objectives", "Methods", "Budget", "Team", "Impact")}
+    text = pack_json(value, max_tokens, priority=["Budget", "Objectives"])
+    assert count_tokens(text) <= max_tokens
+    json.loads(text)
+
+
+def test_strings_are_shortened_before_keys_are_dropped():
+    value = {name: section(400) for name in ("Impact", "Budget", "Objectives")}
+    packed = json.loads(pack_json(value, 150, priority=["Budget", "Objectives"]))
+    assert list(packed) == ["Impact", "Budget", "Objectives"]
+    assert packed["Impact"]["text"].endswith("…")
+
+
+def test_unlisted_keys_are_dropped_first():
+    value = {name: section(400) for name in ("Impact", "Budget", "Objectives")}
+    packed = json.loads(pack_json(value, 90, priority=["Budget", "Objectives"]))
+    assert list(packed) == ["Budget", "Objectives"]
+
+
+def test_highest_priority_key_is_never_dropped():
+    value = {"Budget": section(2000), "Impact": section(10)}
+    packed = json.loads(pack_json(value, 10, priority=["Budget"]))
+    assert list(packed) == ["Budget"]
+
+
+def test_sample_text_keeps_opening_within_budget():
+    text = "TITLE Abstract. " + " ".join(f"sentence {i}." for i in range(5000))
+    sampled = sample_text(text, 500)
+    assert sampled.startswith("TITLE Abstract.")
+    assert count_tokens(sampled) <= 500
+    assert sample_text("short text", 500) == "short text"
+
+
+def test_budgets_leave_headroom_for_the_estimate(monkeypatch):
+    monkeypatch.setattr(context_packing, "_budget_config", lambda config_path="config.yaml": {"scoring": 6500})
+    assert get_token_budget("scoring") == int(6500 / (1 + context_packing.DEFAULT_SAFETY_MARGIN))
+
+    config = {"scoring": 6500, "safety_margin": 0}
+    monkeypatch.setattr(context_packing, "_budget_config", lambda config_path="config.yaml": config)
+    assert get_token_budget("scoring") == 6500
+    assert get_token_budget("decision") == context_packing.DEFAULT_BUDGETS["decision"]
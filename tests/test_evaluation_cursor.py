@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from conftest import import_api
+
+main = import_api()
+
+
+def test_cursor_round_trips_created_at_and_id():
+    doc = {"created_at": datetime(2025, 3, 1, 12, 30, 5, 123456), "_id": ObjectId()}
+    assert main.decode_cursor(main.encode_cursor(doc)) == (doc["created_at"], doc["_id"])
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bm8tc2VwYXJhdG9y", "MjAyNXxub3QtYW4taWQ="])
+def test_malformed_cursors_are_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        main.decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(key)
+            for op, arg in condition.items():
+                if op == "$lt" and not value < arg:
+                    return False
+                if op == "$gte" and not value >= arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeEvaluations:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if _matches(d, query)])
+
+
+@pytest.fixture
+def evaluations(monkeypatch):
+    start = datetime(2025, 1, 1)
+    docs = []
+    for i in range(23):
+        # Pairs share a timestamp, so paging must fall back to _id
+        docs.append({
+            "_id": ObjectId(), "file_name": f"p{i}.pdf", "decision": "ACCEPT" if i % 3 else "REJECT",
+            "overall_score": 5.0, "domain": None, "created_at": start + timedelta(minutes=i // 2),
+        })
+    monkeypatch.setattr(main.database, "evaluations_collection", FakeEvaluations(docs))
+    return docs
+
+
+def _all_pages(client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = client.get("/api/evaluations", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        ids.extend(item["id"] for item in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_paging_visits_every_evaluation_once_newest_first(evaluations):
+    ids, pages = _all_pages(TestClient(main.app), limit=5)
+    newest_first = sorted(evaluations, key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+    assert ids == [str(d["_id"]) for d in newest_first]
+    assert pages == 5
+
+
+def test_paging_keeps_filters(evaluations):
+    ids, _ = _all_pages(TestClient(main.app), limit=2, decision="REJECT")
+    assert len(ids) == len(set(ids)) == sum(d["decision"] == "REJECT" for d in evaluations)
+
+
+def test_last_full_page_has_no_cursor(evaluations):
+    body = TestClient(main.app).get("/api/evaluations", params={"limit": 23}).json()
+    assert len(body["items"]) == 23 and body["next_cursor"] is None
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src import llm_wrapper
+from src.llm_wrapper import CallSlots, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_wrapper.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_then_asks_callers_to_wait(clock):
+    bucket = TokenBucket(60)  # one token per second
+    assert all(bucket.reserve() == 0.0 for _ in range(60))
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    clock.now += 30
+    assert bucket.reserve(30) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+    clock.now += 3600
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) > 0
+
+
+def test_oversized_requests_wait_at_most_a_full_refill(clock):
+    bucket = TokenBucket(600)
+    bucket.reserve(600)
+    assert bucket.reserve(10_000) == pytest.approx(60.0)
+
+
+def test_try_reserve_never_overdraws_and_refund_returns_tokens(clock):
+    bucket = TokenBucket(60)
+    assert bucket.try_reserve(59)
+    assert not bucket.try_reserve(2)
+    assert bucket.tokens == pytest.approx(1.0)
+    bucket.refund(2)
+    assert bucket.try_reserve(3)
+    bucket.refund(1000)
+    assert bucket.tokens == bucket.capacity
+
+
+def test_zero_rate_disables_the_limit(clock):
+    bucket = TokenBucket(0)
+    assert bucket.reserve(10_000) == 0.0
+    assert bucket.try_reserve(10_000)
+
+
+def test_call_slots_cap_blocking_callers():
+    slots = CallSlots(2)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal active, peak
+        slots.acquire()
+        try:
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+        finally:
+            slots.release()
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == 2
+    assert slots._in_use == 0
+
+
+def test_call_slots_queue_async_callers_without_leaking():
+    async def run():
+        slots = CallSlots(1)
+        await slots.acquire_async()
+
+        waiter = asyncio.create_task(slots.acquire_async())
+        cancelled = asyncio.create_task(slots.acquire_async())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert not waiter.done()
+
+        # A release from another thread hands the slot to the waiting coroutine
+        threading.Thread(target=slots.release).start()
+        await asyncio.wait_for(waiter, 1)
+        slots.release()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return slots
+
+    slots = asyncio.run(run())
+    assert slots._in_use == 0
+    assert not slots._async_waiters
+
+
+def test_split_limits_divides_quota_between_worker_processes(monkeypatch):
+    monkeypatch.setattr(llm_wrapper, "REQUESTS_PER_MINUTE", 60)
+    monkeypatch.setattr(llm_wrapper, "TOKENS_PER_MINUTE", 100_000)
+    monkeypatch.setattr(llm_wrapper, "MAX_CONCURRENT_CALLS", 8)
+    for name in ("_request_bucket", "_token_bucket", "_call_slots"):
+        monkeypatch.setattr(llm_wrapper, name, getattr(llm_wrapper, name))
+
+    llm_wrapper.split_limits(4)
+    assert llm_wrapper._request_bucket.capacity == 15
+    assert llm_wrapper._token_bucket.capacity == 25_000
+    assert llm_wrapper._call_slots.limit == 2
+
+    llm_wrapper.split_limits(16)
+    assert llm_wrapper._call_slots.limit == 1
+
+
+def test_quota_try_reserve_refunds_the_request_when_tokens_run_out(clock, monkeypatch):
+    monkeypatch.setattr(llm_wrapper, "_request_bucket", TokenBucket(60))
+    monkeypatch.setattr(llm_wrapper, "_token_bucket", TokenBucket(1000))
+    quota = llm_wrapper._Quota("x" * 400, {"max_output_tokens": 800})  # ~900 tokens
+
+    assert quota.try_reserve()
+    assert not quota.try_reserve()
+    assert llm_wrapper._request_bucket.tokens == pytest.approx(59)
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from src import llm_resilience
+from src.llm_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class ProviderError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_resilience.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_provider_errors(clock):
+    breaker = CircuitBreaker(failures=3, reset_after=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(ProviderError(503))
+    assert breaker.state == "closed"
+
+    breaker.before_call()
+    breaker.record_failure(TimeoutError())
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == pytest.approx(30)
+    assert breaker.open_for() == pytest.approx(30)
+
+
+def test_success_and_client_errors_reset_the_count(clock):
+    breaker = CircuitBreaker(failures=2, reset_after=30)
+    breaker.record_failure(ProviderError(500))
+    breaker.record_success()
+    breaker.record_failure(ProviderError(500))
+    # A 400 means the provider answered; it is not degraded
+    breaker.record_failure(ProviderError(400))
+    breaker.record_failure(ProviderError(500))
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_one_trial_that_closes_the_breaker(clock):
+    breaker = CircuitBreaker(failures=1, reset_after=30)
+    breaker.record_failure(ProviderError(429))
+    clock.now += 30
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failures=5, reset_after=30)
+    for _ in range(5):
+        breaker.record_failure(ProviderError(503))
+    clock.now += 31
+
+    breaker.before_call()
+    breaker.record_failure(ProviderError(503))
+    assert breaker.state == "open"
+    assert breaker.open_for() == pytest.approx(30)
+
+
+def test_zero_failures_disables_the_breaker(clock):
+    breaker = CircuitBreaker(failures=0)
+    for _ in range(100):
+        breaker.record_failure(ProviderError(503))
+        breaker.before_call()
+
+
+def fast_caller(**kwargs) -> ResilientCaller:
+    options = dict(timeout=1, deadline=5, max_attempts=4, backoff_base=0.001, backoff_max=0.001,
+                   breaker=CircuitBreaker(failures=3, reset_after=30))
+    options.update(kwargs)
+    return ResilientCaller(**options)
+
+
+def test_transient_errors_are_retried_until_success():
+    caller = fast_caller()
+    errors = [ProviderError(503), TimeoutError()]
+
+    def attempt(timeout):
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert caller.call(attempt) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_client_errors_are_not_retried():
+    caller = fast_caller()
+    calls = []
+
+    def attempt(timeout):
+        calls.append(timeout)
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        caller.call(attempt)
+    assert len(calls) == 1
+
+
+def test_open_breaker_fails_fast_without_sending():
+    caller = fast_caller(max_attempts=10)
+    calls = []
+
+    def attempt(timeout):
+        calls.append(timeout)
+        raise ProviderError(503)
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(attempt)
+    assert len(calls) == 3
+    assert caller.breaker.state == "open"
+
+
+def test_waiting_for_local_quota_is_not_a_provider_failure():
+    class SlowQuota:
+        def reserve(self):
+            return 0.2
+
+        def try_reserve(self):
+            return False
+
+    # The quota wait is longer than an attempt may take
+    caller = fast_caller(timeout=0.1, breaker=CircuitBreaker(failures=1, reset_after=30))
+    assert caller.call(lambda timeout: timeout, quota=SlowQuota()) == pytest.approx(0.1)
+    assert caller.breaker.state == "closed"
+
+
+def test_async_calls_share_the_policy():
+    caller = fast_caller()
+    errors = [ProviderError(502)]
+
+    async def attempt(timeout):
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert asyncio.run(caller.acall(attempt)) == "ok"
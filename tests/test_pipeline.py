@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from src.pipeline import Stage, run_stage_graph
+
+
+def test_stages_receive_dependency_results():
+    stages = [
+        Stage("total", lambda double, square: double + square, deps=["double", "square"]),
+        Stage("double", lambda load: load * 2, deps=["load"]),
+        Stage("square", lambda load: load ** 2, deps=["load"]),
+        Stage("load", lambda: 3),
+    ]
+    assert run_stage_graph(stages) == {"load": 3, "double": 6, "square": 9, "total": 15}
+
+
+def test_dependencies_finish_before_dependents_start():
+    order = []
+    lock = threading.Lock()
+
+    def step(name, seconds=0.0):
+        def run(**deps):
+            time.sleep(seconds)
+            with lock:
+                order.append(name)
+        return run
+
+    stages = [
+        Stage("load", step("load", 0.05)),
+        Stage("slow", step("slow", 0.1), deps=["load"]),
+        Stage("fast", step("fast"), deps=["load"]),
+        Stage("decision", step("decision"), deps=["slow", "fast"]),
+    ]
+    completed = []
+    run_stage_graph(stages, on_complete=lambda name, result: completed.append(name))
+
+    assert order[0] == "load" and order[-1] == "decision"
+    assert order.index("fast") < order.index("slow")
+    assert completed == order
+
+
+def test_independent_stages_overlap():
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [
+        Stage("a", lambda: barrier.wait()),
+        Stage("b", lambda: barrier.wait()),
+    ]
+    # Deadlocks (BrokenBarrierError) unless both run at the same time
+    run_stage_graph(stages, max_workers=2)
+
+
+def test_cycle_is_rejected_before_anything_runs():
+    ran = []
+    stages = [
+        Stage("load", lambda: ran.append("load")),
+        Stage("a", lambda b: None, deps=["b"]),
+        Stage("b", lambda a: None, deps=["a"]),
+    ]
+    with pytest.raises(ValueError, match="Cycle"):
+        run_stage_graph(stages)
+    assert ran == []
+
+
+def test_unknown_and_duplicate_stages_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        run_stage_graph([Stage("a", lambda missing: None, deps=["missing"])])
+    with pytest.raises(ValueError, match="Duplicate"):
+        run_stage_graph([Stage("a", lambda: 1), Stage("a", lambda: 2)])
+
+
+def test_failure_propagates_and_skips_dependents():
+    ran = []
+
+    def fail(load):
+        raise RuntimeError("scoring failed")
+
+    stages = [
+        Stage("load", lambda: 1),
+        Stage("scoring", fail, deps=["load"]),
+        Stage("decision", lambda scoring: ran.append("decision"), deps=["scoring"]),
+    ]
+    with pytest.raises(RuntimeError, match="scoring failed"):
+        run_stage_graph(stages)
+    assert ran == []
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+import worker_pool
+from worker_pool import EvaluationWorkerPool, PoolSaturatedError
+
+
+@pytest.fixture(autouse=True)
+def no_warm_up(monkeypatch):
+    # The real initializer loads the pipeline and embedding model
+    monkeypatch.setattr(worker_pool, "_warm_worker", lambda processes=0: None)
+
+
+def test_jobs_beyond_workers_and_queue_are_rejected():
+    release = threading.Event()
+
+    async def run():
+        pool = EvaluationWorkerPool(kind="thread", max_workers=1, max_queue=1)
+        jobs = [asyncio.create_task(pool.submit(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()["running"] == 1 and pool.stats()["queued"] == 1
+
+        with pytest.raises(PoolSaturatedError) as raised:
+            await pool.submit(release.wait, 5)
+        assert raised.value.retry_after == worker_pool.DEFAULT_RETRY_AFTER
+
+        release.set()
+        await asyncio.gather(*jobs)
+        # Capacity frees up as jobs finish
+        assert await pool.submit(lambda: "ok") == "ok"
+        pool.shutdown()
+        return pool.stats()
+
+    stats = asyncio.run(run())
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+
+
+def test_retry_after_follows_recent_job_durations():
+    pool = EvaluationWorkerPool(kind="thread", max_workers=2, max_queue=2)
+    pool._record_duration(40)
+    pool._in_flight = 4
+    with pytest.raises(PoolSaturatedError) as raised:
+        pool.check_capacity()
+    # Two jobs queued ahead on two workers: wait about (2 + 1) * 40 / 2 seconds
+    assert raised.value.retry_after == 60
+
+
+def test_failed_jobs_free_their_slot():
+    def fail():
+        raise ValueError("bad proposal")
+
+    async def run():
+        pool = EvaluationWorkerPool(kind="thread", max_workers=1, max_queue=0)
+        with pytest.raises(ValueError):
+            await pool.submit(fail)
+        assert await pool.submit(lambda: "ok") == "ok"
+        pool.shutdown()
+        return pool.stats()
+
+    stats = asyncio.run(run())
+    assert stats["failed"] == 1 and stats["completed"] == 1 and stats["rejected"] == 0
+
+
+def test_api_answers_429_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+    from conftest import import_api
+
+    main = import_api()
+
+    async def settings():
+        return 50000, None
+
+    async def not_cached(*args):
+        return None
+
+    saturated = EvaluationWorkerPool(kind="thread", max_workers=1, max_queue=0)
+    saturated._in_flight = 1
+    monkeypatch.setattr(main, "worker_pool", saturated)
+    monkeypatch.setattr(main, "get_evaluation_settings", settings)
+    monkeypatch.setattr(main, "find_cached_evaluation", not_cached)
+
+    client = TestClient(main.app)
+    for path in ("/api/evaluations", "/api/evaluations/jobs"):
+        response = client.post(path, files={"file": ("proposal.pdf", b"%PDF-1.4 test", "application/pdf")})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == str(worker_pool.DEFAULT_RETRY_AFTER)
+    assert saturated.stats()["rejected"] == 2